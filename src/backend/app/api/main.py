@@ -4,7 +4,11 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from backend.app.core.config import settings
 from backend.app.core.middlewares import add_middlewares
-from backend.app.logic.universal_controller_instance import universal_controller
+from backend.app.logic.universal_controller_instance import universal_controller, async_universal_controller
+from backend.app.logic.async_controller import get_database_executor
+from backend.app.logic.transit_graph import route_planner_for
+from backend.app.logic.batch_planner import shutdown_planner_pool
+from backend.app.logic.vehicle_positions import position_store_for
 from backend.app.api.routes import (
     incidence_cud_service,
     maintainance_status_query_service,
@@ -28,7 +32,9 @@ from backend.app.api.routes import (
     reporte_service,
     planificador_service,
     rutaparada_query_service,
-    rutaparada_cud_service
+    rutaparada_cud_service,
+    metrics_service,
+    vehicle_position_service
 )
 from backend.app.api.routes.card_service import (card_cud_service, card_query_service)
 from backend.app.api.routes.maintainance_service import (maintance_cud_service, maintance_query_service)
@@ -67,13 +73,25 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 # Eventos de inicio y apagado
 @app.on_event("startup")
 async def startup_event():
+    universal_controller.counters.start_refresher(settings.DB_COUNTER_REFRESH_INTERVAL)
+    position_store_for(universal_controller).start_writer()
+    # Grafo de rutas y tabla de transbordos listos antes de la primera planificación
+    try:
+        await route_planner_for(universal_controller).load()
+    except Exception as e:
+        print(f"No se pudo precargar el grafo de rutas: {e}")
     print("Conexión establecida con la base de datos")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    if universal_controller.conn:
-        universal_controller.conn.close()
-        print("Conexión cerrada correctamente")
+    # Posiciones pendientes antes de cerrar las conexiones
+    position_store_for(universal_controller).stop_writer()
+    get_database_executor().shutdown()
+    shutdown_planner_pool()
+    if async_universal_controller is not None:
+        await async_universal_controller.close()
+    universal_controller.close()
+    print("Conexiones cerradas correctamente")
 
 # Incluir rutas de los microservicios
 app.include_router(reporte_service.app)
@@ -122,4 +140,6 @@ app.include_router(asistance_query_service.router)
 app.include_router(behavior_cud_service.router)
 app.include_router(behavior_query_service.router)
 app.include_router(rutaparada_query_service.app)
-app.include_router(rutaparada_cud_service.app)
\ No newline at end of file
+app.include_router(rutaparada_cud_service.app)
+app.include_router(metrics_service.app)
+app.include_router(vehicle_position_service.app)
\ No newline at end of file
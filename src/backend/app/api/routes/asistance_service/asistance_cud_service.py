@@ -1,12 +1,14 @@
 import logging
+from typing import List
 from fastapi import (
-    Form, HTTPException, APIRouter, Security, status
+    Body, Form, HTTPException, APIRouter, Security, status
 )
 from fastapi.responses import JSONResponse
 
 from backend.app.models.asistance import AsistanceCreate, AsistanceOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from backend.app.core.auth import get_current_user
+from backend.app.core.batch import run_batch
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -149,4 +151,34 @@ async def delete_asistance(
         raise e
     except Exception as e:
         logger.error(f"[POST /delete] Error interno: {str(e)}")
-        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/batch/create", response_class=JSONResponse)
+def create_asistances_batch(
+    asistencias: List[AsistanceCreate] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Registra varias asistencias en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/asistance/batch/create", "create", controller.add_many, asistencias)
+
+@router.post("/batch/update", response_class=JSONResponse)
+def update_asistances_batch(
+    asistencias: List[AsistanceOut] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Actualiza varias asistencias en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/asistance/batch/update", "update", controller.update_many, asistencias)
+
+@router.post("/batch/delete", response_class=JSONResponse)
+def delete_asistances_batch(
+    ids: List[int] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Elimina varias asistencias por ID en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/asistance/batch/delete", "delete", controller.delete_many, AsistanceOut, ids)
@@ -1,8 +1,10 @@
 import logging
+from typing import Optional
 from fastapi import APIRouter, Security, Query, status, HTTPException
 from fastapi.responses import JSONResponse
 
 from backend.app.core.auth import get_current_user
+from backend.app.core.pagination import MAX_PAGE_SIZE, ndjson_export, parse_columns
 from backend.app.models.asistance import AsistanceOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 
@@ -53,16 +55,37 @@ def consultar_tecnico(
 
 @router.get("/asistencias", response_class=JSONResponse)
 def get_asistencias(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página"),
+    after: Optional[int] = Query(None, description="Cursor: ID de la última asistencia de la página anterior"),
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     """
-    Devuelve todas las asistencias.
+    Devuelve todas las asistencias. Con `limit` devuelve una página y el
+    `next_cursor` para pedir la siguiente.
     """
+    if limit is not None:
+        try:
+            page = controller.read_page(AsistanceOut, limit, after=after, columns=parse_columns(AsistanceOut, columns))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        logger.info(f"[GET /asistencias] Página de {len(page['items'])} asistencias después de ID {after}")
+        return JSONResponse(content={"asistencias": page["items"], "next_cursor": page["next_cursor"]})
     #logger.info(f"[GET /asistencias] Usuario: {current_user['user_id']} - Consultando todas las asistencias.")
     asistencias = controller.read_all(AsistanceOut)
     logger.info(f"[GET /asistencias] Número de asistencias encontradas: {len(asistencias)}")
     return JSONResponse(content={"asistencias": asistencias or []})
 
+@router.get("/asistencias/export")
+def export_asistencias(
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Exporta todas las asistencias como NDJSON en streaming.
+    """
+    return ndjson_export(controller, AsistanceOut, columns=parse_columns(AsistanceOut, columns))
+
 @router.get("/find", response_class=JSONResponse)
 def asistencia_by_id(
     id: int = Query(...),
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     Form, HTTPException, APIRouter, Security, status
 )
@@ -6,6 +7,7 @@ from fastapi.responses import JSONResponse
 
 from backend.app.models.behavior import BehaviorCreate, BehaviorOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
 from backend.app.core.auth import get_current_user
 
 # Configuración de logging
@@ -24,9 +26,8 @@ def index_create_supervisor(
     Devuelve el próximo ID disponible para supervisor y la lista de behaviors.
     """
     try:
+        nuevo_id = id_allocator_for(controller).peek_id(BehaviorOut)
         behaviors = controller.read_all(BehaviorOut)
-        ultimo_id = max(p["ID"] for p in behaviors) if behaviors else 0
-        nuevo_id = ultimo_id + 1
         return JSONResponse(
             content={
                 "nuevo_id": nuevo_id,
@@ -50,9 +51,8 @@ def index_create_admin(
     Devuelve el próximo ID disponible para administrador y la lista de behaviors.
     """
     try:
+        nuevo_id = id_allocator_for(controller).peek_id(BehaviorOut)
         behaviors = controller.read_all(BehaviorOut)
-        ultimo_id = max(p["ID"] for p in behaviors) if behaviors else 0
-        nuevo_id = ultimo_id + 1
         return JSONResponse(
             content={
                 "nuevo_id": nuevo_id,
@@ -86,7 +86,7 @@ def index_delete(
 
 @router.post("/create", response_class=JSONResponse)
 async def create_behavior(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     iduser: int = Form(...),
     cantidadrutas: int = Form(...),
     horastrabajadas: int = Form(...),
@@ -97,8 +97,10 @@ async def create_behavior(
     #logger.info(f"[POST /create] Behavior: {current_user['user_id']} - Intentando crear rendimiento con ID: {ID}")
 
     try:
-        existing_behavior = controller.get_by_id(BehaviorOut, ID)
-        if existing_behavior:
+        # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+        if ID is None:
+            ID = await id_allocator_for(controller).allocate(BehaviorOut)
+        elif controller.get_by_id(BehaviorOut, ID):
             logger.warning(f"[POST /create] Error de validación: El rendimiento ya existe con identificación {ID}")
             raise HTTPException(400, detail="El rendimiento ya existe con la misma identificación.")
 
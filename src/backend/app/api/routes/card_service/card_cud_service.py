@@ -1,13 +1,16 @@
 import logging
+from typing import Optional
 from fastapi import (
-    Form, HTTPException, APIRouter, Request, Security
+    Form, Header, HTTPException, APIRouter, Request, Security
 )
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 
 from backend.app.models.card import CardCreate, CardOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.async_controller import as_async, DatabaseBusyError
 from backend.app.core.auth import get_current_user
+from backend.app.core.idempotency import idempotent
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
@@ -22,28 +25,35 @@ async def create_card(
     ID: int = Form(...),
     IDUsuario: int = Form(...),
     IDTipoTarjeta: int = Form(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: dict = Security(
         get_current_user,
         scopes=["system", "administrador", "pasajero"]
     )
 ):
-    try:
-        new_card = CardCreate(ID=ID, IDUsuario=IDUsuario,IDTipoTarjeta=IDTipoTarjeta, Saldo=0)
-        controller.add(new_card)
+    async def crear():
+        try:
+            new_card = CardCreate(ID=ID, IDUsuario=IDUsuario,IDTipoTarjeta=IDTipoTarjeta, Saldo=0)
+            await as_async(controller).add(new_card)
 
-        logger.info(f"[POST /create] Tarjeta creada exitosamente: {new_card}")
-        return {
-            "operation": "create",
-            "success": True,
-            "data": CardOut(ID=new_card.ID, IDUsuario=new_card.IDUsuario,IDTipoTarjeta=new_card.IDTipoTarjeta, Saldo=new_card.Saldo).model_dump(),
-            "message": "Card created successfully."
-        }
-    except ValueError as e:
-        logger.warning(f"[POST /create] Error de validación: {str(e)}")
-        raise HTTPException(400, detail=str(e))
-    except Exception as e:
-        logger.error(f"[POST /create] Error interno: {str(e)}")
-        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+            logger.info(f"[POST /create] Tarjeta creada exitosamente: {new_card}")
+            return {
+                "operation": "create",
+                "success": True,
+                "data": CardOut(ID=new_card.ID, IDUsuario=new_card.IDUsuario,IDTipoTarjeta=new_card.IDTipoTarjeta, Saldo=new_card.Saldo).model_dump(),
+                "message": "Card created successfully."
+            }
+        except ValueError as e:
+            logger.warning(f"[POST /create] Error de validación: {str(e)}")
+            raise HTTPException(400, detail=str(e))
+        except DatabaseBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"[POST /create] Error interno: {str(e)}")
+            raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+
+    params = {"ID": ID, "IDUsuario": IDUsuario, "IDTipoTarjeta": IDTipoTarjeta}
+    return await idempotent(controller, "/card/create", idempotency_key, current_user, params, crear)
 
 
 @app.post("/update")
@@ -57,14 +67,15 @@ async def update_card(
     )
     
 ):
+    db = as_async(controller)
     try:
-        existing = controller.get_by_id(CardOut, ID)
+        existing = await db.get_by_id(CardOut, ID)
         if existing is None:
             logger.warning(f"[POST /update] Tarjeta no encontrada: ID={ID}")
             raise HTTPException(404, detail="Card not found")
 
         updated_card = CardCreate(ID=ID,IDUsuario=IDUsuario,IDTipoTarjeta=IDTipoTarjeta, Saldo=existing.Saldo)
-        controller.update(updated_card)
+        await db.update(updated_card)
 
         logger.info(f"[POST /update] Tarjeta actualizada exitosamente: {updated_card}")
         return {
@@ -88,21 +99,22 @@ async def delete_card(
     )
     
 ):
+    db = as_async(controller)
     try:
-        existing = controller.get_by_id(CardOut, ID)
+        existing = await db.get_by_id(CardOut, ID)
         if not existing:
             logger.warning(f"[POST /delete] Tarjeta no encontrada: ID={ID}")
             raise HTTPException(404, detail="Card not found")
 
-        controller.delete(existing)
+        await db.delete(existing)
         logger.info(f"[POST /delete] Tarjeta eliminada exitosamente: ID={ID}")
         return {
             "operation": "delete",
             "success": True,
             "message": f"Card {ID} deleted successfully."
         }
-    except HTTPException as e:
-        raise e
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"[POST /delete] Error interno: {str(e)}")
         raise HTTPException(500, detail=str(e))
\ No newline at end of file
@@ -5,6 +5,8 @@ from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import Depends, Request, HTTPException, status, APIRouter, Form, Security
 from backend.app.core.auth import encode_token, settings
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.dashboard import dashboard_provider
+from backend.app.logic.async_controller import as_async, DatabaseBusyError
 from backend.app.models.user import UserCreate, UserOut
 from fastapi.responses import JSONResponse
 from backend.app.core.auth import get_current_user
@@ -26,7 +28,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
         # Convertir el username a entero antes de pasarlo al controlador
         user_id = int(form_data.username)
-        user = controller.get_by_column(UserOut, "ID", user_id)
+        user = await as_async(controller).get_by_column(UserOut, "ID", user_id)
 
         if not user:
             logger.warning("[POST /token] User not found: %s", form_data.username)
@@ -52,8 +54,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             "access_token": token,
             "token_type": "bearer"
         }
-    except HTTPException as http_exc:
-        raise http_exc
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error("[POST /token] Error occurred: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -66,9 +68,10 @@ async def general_dashboard(
 
     user_id = current_user.get("sub")
     logger.info(f"[DASHBOARD] user_id (tipo: {type(user_id)}): {user_id}")
+    db = as_async(controller)
     try:
         user_id_int = int(user_id)
-        user = controller.get_by_column(UserOut, "ID", user_id_int)
+        user = await db.get_by_column(UserOut, "ID", user_id_int)
         if not user:
             logger.warning("[DASHBOARD] Usuario no encontrado en la base de datos para ID: %s", user_id)
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -81,29 +84,18 @@ async def general_dashboard(
             logger.error(f"[DASHBOARD] Error al serializar usuario: {e}")
             user_data = {}
         try:
-            response_data = {
-                "user": user_data,
-                "id": user.ID,
-                "total_vehiculos": controller.total_unidades(),
-                "total_passanger": controller.total_pasajeros(),
-                "total_operative": controller.total_operarios(),
-                "total_supervisors": controller.total_supervisores(),
-                "type_card": controller.get_type_card(user.ID),
-                "buses_mantenimiento": controller.total_unidades(),
-                "registros_mantenimiento": controller.total_mantenimiento(),
-                "proximo_mantenimiento": controller.proximos_mantenimientos(),
-                "ultimo_uso_tarjeta": controller.last_card_used(user.ID),
-                "turno": controller.get_turno_usuario(user.ID),
-                "Saldo": controller.get_saldo_usuario(user.ID),
-            }
+            dashboard, timings = await dashboard_provider.load(db, user.ID)
+            response_data = {"user": user_data, "id": user.ID, **dashboard}
+        except DatabaseBusyError:
+            raise
         except Exception as e:
             logger.error(f"[DASHBOARD] Error al construir datos del dashboard: {e}")
             raise HTTPException(status_code=500, detail=f"Error interno al construir dashboard: {e}")
 
-        logger.info("[DASHBOARD] Respuesta del dashboard generada correctamente")
-        return JSONResponse(response_data)
-    except HTTPException as http_exc:
-        raise http_exc
+        logger.info("[DASHBOARD] Respuesta del dashboard generada correctamente (%s)", timings)
+        return JSONResponse(response_data, headers={"Server-Timing": dashboard_provider.server_timing(timings)})
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"[DASHBOARD] Error inesperado: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error interno inesperado: {e}")
@@ -1,8 +1,10 @@
 import logging
-from fastapi import APIRouter, HTTPException, Security,Request
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Security,Request
 from fastapi.responses import HTMLResponse
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from backend.app.core.auth import get_current_user
+from backend.app.core.pagination import MAX_PAGE_SIZE, ndjson_export, parse_columns
 from backend.app.models.maintainance import MaintenanceOut
 
 # Initialize the maintenance controller
@@ -14,8 +16,11 @@ app = APIRouter(prefix="/maintainance", tags=["maintainance"])
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-@app.get("/maintainancements", response_model=list[dict])
+@app.get("/maintainancements")
 def read_all(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor: last maintenance ID of the previous page"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
     current_user: dict = Security(
         get_current_user,
         scopes=["system", "administrador", "mantenimiento"]
@@ -24,12 +29,22 @@ def read_all(
     Returns all maintenance records.
 
     Args:
+    - limit (int, optional): Page size. When given, returns one page instead of the full list.
+    - after (int, optional): Keyset cursor (`next_cursor` of the previous page).
+    - columns (str, optional): Comma-separated list of columns to return.
     - current_user (dict): User information from authentication.
 
     Returns:
-    - List of maintenance records.
+    - List of maintenance records, or `{"mantenimientos": [...], "next_cursor": ...}` when paginated.
     """
-    
+    if limit is not None:
+        try:
+            page = controller.read_page(MaintenanceOut, limit, after=after, columns=parse_columns(MaintenanceOut, columns))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.info(f"[GET /maintainancements] Página de {len(page['items'])} registros después de ID {after}.")
+        return {"mantenimientos": page["items"], "next_cursor": page["next_cursor"]}
+
     try:
         records = controller.read_all(MaintenanceOut)
         logger.info(f"[GET /maintainancements] Se han recuperado {len(records)} registros de mantenimiento.")
@@ -39,6 +54,19 @@ def read_all(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/maintainancements/export")
+def export_maintainancements(
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
+    current_user: dict = Security(
+        get_current_user,
+        scopes=["system", "administrador", "mantenimiento"]
+    )):
+    """
+    Streams every maintenance record as NDJSON.
+    """
+    return ndjson_export(controller, MaintenanceOut, columns=parse_columns(MaintenanceOut, columns))
+
+
 @app.get("/id/{ID}")
 def get_by_id(
     ID: int,
@@ -0,0 +1,117 @@
+import logging
+from fastapi import APIRouter, Security
+from fastapi.responses import JSONResponse
+from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.async_controller import get_database_executor
+from backend.app.logic.transit_graph import route_planner_for
+from backend.app.logic.vehicle_positions import position_store_for
+from backend.app.logic.fleet_feed import fleet_broadcaster_for
+from backend.app.logic.unit_schedule_view import unit_schedule_view_for
+from backend.app.logic.fare_engine import fare_engine_for
+from backend.app.logic.tap_ingestion import tap_ingestor_for
+from backend.app.logic.idempotency import idempotency_store_for
+from backend.app.logic.fare_catalog import fare_catalog_for
+from backend.app.core.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+app = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@app.get("/db_pool", response_class=JSONResponse)
+def metricas_pool(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve las métricas del pool de conexiones: tiempos de espera y saturación.
+    """
+    if not hasattr(controller, "pool_metrics"):
+        return JSONResponse(status_code=404, content={"detail": "El backend configurado no usa pool de conexiones."})
+    metricas = controller.pool_metrics()
+    logger.info(f"[GET /metrics/db_pool] Conexiones en uso: {metricas['in_use']}/{metricas['size']}")
+    return metricas
+
+@app.get("/db_executor", response_class=JSONResponse)
+def metricas_executor(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve el estado del pool de hilos de la base de datos: pendientes y rechazos.
+    """
+    return get_database_executor().metrics()
+
+@app.get("/counters", response_class=JSONResponse)
+def metricas_conteos(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve la caché de conteos: valor, antigüedad, aciertos y fallos de cada conteo.
+    """
+    return controller.counters.stats()
+
+@app.get("/planner", response_class=JSONResponse)
+def metricas_planificador(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve la caché del planificador (aciertos, peticiones agrupadas, expulsiones)
+    junto con la versión y el tamaño del grafo de rutas.
+    """
+    planner = route_planner_for(controller)
+    graph = planner.graph
+    return {
+        "graph_version": planner.version,
+        "graph": graph.stats() if graph is not None else None,
+        "cache": planner.cache.stats(),
+    }
+
+@app.get("/positions", response_class=JSONResponse)
+def metricas_posiciones(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve el estado del almacén de posiciones: reportes recibidos y escrituras pendientes.
+    """
+    return position_store_for(controller).stats()
+
+@app.get("/fleet", response_class=JSONResponse)
+def metricas_flota(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve el estado de la flota en vivo: clientes conectados, versión y mensajes enviados.
+    """
+    return fleet_broadcaster_for(controller).stats()
+
+@app.get("/unit_schedules", response_class=JSONResponse)
+def metricas_unidades_con_horarios(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve el estado de la vista de unidades con horarios: versión, armados y aciertos.
+    """
+    return unit_schedule_view_for(controller).stats()
+
+@app.get("/fares", response_class=JSONResponse)
+def metricas_cobros(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve los taps cobrados y rechazados (por motivo) desde el arranque, el
+    estado de la ingesta por lotes y el del catálogo de tarifas.
+    """
+    return {
+        "taps": fare_engine_for(controller).stats(),
+        "ingestion": tap_ingestor_for(controller).stats(),
+        "catalog": fare_catalog_for(controller).stats(),
+    }
+
+@app.get("/idempotency", response_class=JSONResponse)
+def metricas_idempotencia(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Devuelve el estado de las llaves de idempotencia: tamaño de la caché, aciertos
+    (en memoria y en la base de datos), respuestas guardadas y conflictos.
+    """
+    return idempotency_store_for(controller).stats()
@@ -1,12 +1,17 @@
 import logging
+from typing import List, Optional
 from fastapi import (
-    Form, HTTPException, APIRouter, Security, status
+    Body, Form, Header, HTTPException, APIRouter, Security, status
 )
 from fastapi.responses import JSONResponse
 from backend.app.models.type_movement import TypeMovementOut
 from backend.app.models.movement import MovementCreate, MovementOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
+from backend.app.logic.async_controller import as_async, DatabaseBusyError
 from backend.app.core.auth import get_current_user
+from backend.app.core.batch import run_batch
+from backend.app.core.idempotency import idempotent
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
@@ -19,13 +24,12 @@ def index_create(
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     """
-    Devuelve el próximo ID disponible y todos los tipos de movimientos (JSON).
+    Devuelve el próximo ID disponible (solo informativo: el ID se asigna al crear) y
+    todos los tipos de movimientos (JSON).
     """
     try:
         typemovements = controller.read_all(TypeMovementOut)
-        movements = controller.read_all(MovementOut)
-        ultimo_id = max(p["ID"] for p in movements) if movements else 0
-        nuevo_id = ultimo_id + 1
+        nuevo_id = id_allocator_for(controller).peek_id(MovementOut)
         return JSONResponse(
             content={
                 "nuevo_id": nuevo_id,
@@ -59,39 +63,53 @@ def index_delete(
 
 @router.post("/create", response_class=JSONResponse)
 async def create_movement(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     IDTipoMovimiento: int = Form(...),
     Monto: float = Form(...),
     IDTarjeta: int = Form(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_movement: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     """
-    Crea un nuevo movimiento. Devuelve JSON con el resultado.
+    Crea un nuevo movimiento; sin `ID`, el servidor le asigna uno. Devuelve JSON con
+    el resultado. Con `Idempotency-Key`, un reintento recibe la respuesta original sin
+    volver a crear el movimiento.
     """
-    try:
-        existing_movement = controller.get_by_column(MovementOut, "ID", ID)
-        if existing_movement:
-            logger.warning(f"[POST /create] Error de validación: El movimiento ya existe con identificación {ID}")
-            raise HTTPException(400, detail="El movimiento ya existe con la misma identificación.")
-
-        new_movement = MovementCreate(ID=ID, IDTipoMovimiento=IDTipoMovimiento, Monto=Monto, IDTarjeta=IDTarjeta)
-        controller.add(new_movement)
-        logger.info(f"[POST /create] Movimiento creado exitosamente con identificación {ID}")
-        return JSONResponse(
-            status_code=status.HTTP_201_CREATED,
-            content={
-                "operation": "create",
-                "success": True,
-                "data": MovementOut(ID=new_movement.ID, IDTipoMovimiento=new_movement.IDTipoMovimiento, Monto=new_movement.Monto,IDTarjeta=new_movement.IDTarjeta).model_dump(),
-                "message": "Movement created successfully."
-            }
-        )
-    except ValueError as e:
-        logger.warning(f"[POST /create] Error de validación: {str(e)}")
-        raise HTTPException(400, detail=str(e))
-    except Exception as e:
-        logger.error(f"[POST /create] Error interno: {str(e)}")
-        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+    db = as_async(controller)
+
+    async def crear():
+        try:
+            movement_id = ID
+            # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+            if movement_id is None:
+                movement_id = await id_allocator_for(controller).allocate(MovementOut)
+            elif await db.get_by_column(MovementOut, "ID", movement_id):
+                logger.warning(f"[POST /create] Error de validación: El movimiento ya existe con identificación {movement_id}")
+                raise HTTPException(400, detail="El movimiento ya existe con la misma identificación.")
+
+            new_movement = MovementCreate(ID=movement_id, IDTipoMovimiento=IDTipoMovimiento, Monto=Monto, IDTarjeta=IDTarjeta)
+            await db.add(new_movement)
+            logger.info(f"[POST /create] Movimiento creado exitosamente con identificación {movement_id}")
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content={
+                    "operation": "create",
+                    "success": True,
+                    "data": MovementOut(ID=new_movement.ID, IDTipoMovimiento=new_movement.IDTipoMovimiento, Monto=new_movement.Monto,IDTarjeta=new_movement.IDTarjeta).model_dump(),
+                    "message": "Movement created successfully."
+                }
+            )
+        except ValueError as e:
+            logger.warning(f"[POST /create] Error de validación: {str(e)}")
+            raise HTTPException(400, detail=str(e))
+        except (HTTPException, DatabaseBusyError):
+            raise
+        except Exception as e:
+            logger.error(f"[POST /create] Error interno: {str(e)}")
+            raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+
+    params = {"ID": ID, "IDTipoMovimiento": IDTipoMovimiento, "Monto": Monto, "IDTarjeta": IDTarjeta}
+    return await idempotent(controller, "/movement/create", idempotency_key, current_movement, params, crear)
 
 @router.post("/update", response_class=JSONResponse)
 async def update_movement(
@@ -104,14 +122,15 @@ async def update_movement(
     """
     Actualiza un movimiento existente. Devuelve JSON con el resultado.
     """
+    db = as_async(controller)
     try:
-        existing = controller.get_by_column(MovementOut, "ID", ID)
+        existing = await db.get_by_column(MovementOut, "ID", ID)
         if existing is None:
             logger.warning(f"[POST /update] Movimiento no encontrada: id={ID}")
             raise HTTPException(404, detail="Movement not found")
 
         updated_movement = MovementOut(ID=ID, IDTipoMovimiento=IDTipoMovimiento, Monto=Monto, IDTarjeta=IDTarjeta)
-        controller.update(updated_movement)
+        await db.update(updated_movement)
         logger.info(f"[POST /update] Movimiento actualizada exitosamente: {updated_movement}")
         return JSONResponse(
             content={
@@ -133,13 +152,14 @@ async def delete_movement(
     """
     Elimina un movimiento existente. Devuelve JSON con el resultado.
     """
+    db = as_async(controller)
     try:
-        existing = controller.get_by_column(MovementOut, "ID", ID)
+        existing = await db.get_by_column(MovementOut, "ID", ID)
         if not existing:
             logger.warning(f"[POST /delete] Movimiento no encontrado en la base de datos: id={ID}")
             raise HTTPException(404, detail="Movement not found")
 
-        controller.delete(existing)
+        await db.delete(existing)
         logger.info(f"[POST /delete] Movimiento eliminada exitosamente: id={ID}")
         return JSONResponse(
             content={
@@ -148,8 +168,38 @@ async def delete_movement(
                 "message": f"Movement {ID} deleted successfully."
             }
         )
-    except HTTPException as e:
-        raise e
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"[POST /delete] Error interno: {str(e)}")
-        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/batch/create", response_class=JSONResponse)
+def create_movements_batch(
+    movements: List[MovementCreate] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Crea varios movimientos en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/movement/batch/create", "create", controller.add_many, movements)
+
+@router.post("/batch/update", response_class=JSONResponse)
+def update_movements_batch(
+    movements: List[MovementOut] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Actualiza varios movimientos en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/movement/batch/update", "update", controller.update_many, movements)
+
+@router.post("/batch/delete", response_class=JSONResponse)
+def delete_movements_batch(
+    ids: List[int] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Elimina varios movimientos por ID en lotes. Devuelve el resultado por fila.
+    """
+    return run_batch("/movement/batch/delete", "delete", controller.delete_many, MovementOut, ids)
@@ -1,7 +1,10 @@
 import logging
-from fastapi import APIRouter, Query, Security, status
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Security, status
 from fastapi.responses import JSONResponse
 from backend.app.core.auth import get_current_user
+from backend.app.core.pagination import MAX_PAGE_SIZE, ndjson_export, parse_columns
+from backend.app.logic.async_controller import as_async
 from backend.app.models.movement import MovementOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 
@@ -10,27 +13,59 @@ logging.basicConfig(level=logging.INFO)
 
 router = APIRouter(prefix="/movement", tags=["movement"])
 
+async def _movements_page(limit: int, after: Optional[int], columns: Optional[str]) -> JSONResponse:
+    """Página de movimientos ordenada por ID, con el cursor de la siguiente."""
+    try:
+        page = await as_async(controller).read_page(MovementOut, limit, after=after, columns=parse_columns(MovementOut, columns))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return JSONResponse(content={"movimientos": page["items"], "next_cursor": page["next_cursor"]})
+
 @router.get("/pasajero/movements", response_class=JSONResponse)
-async def get_all_pasajero_movements():
+async def get_all_pasajero_movements(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor: last movement ID of the previous page"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
+):
     """
     Returns all movement records as JSON for passenger.
+    With `limit`, returns one page and the `next_cursor`.
     """
-    movimientos = controller.read_all(MovementOut)
+    if limit is not None:
+        return await _movements_page(limit, after, columns)
+    movimientos = await as_async(controller).read_all(MovementOut)
     logger.info(f"[GET /pasajero/movements] Número de Movimientos encontrados: {len(movimientos)}")
     # Convert to dicts if needed
     movimientos_dicts = [m.model_dump() if hasattr(m, "model_dump") else m.dict() if hasattr(m, "dict") else m for m in movimientos]
     return JSONResponse(content=movimientos_dicts)
 
 @router.get("/administrador/movements", response_class=JSONResponse)
-async def get_all_admin_movements():
+async def get_all_admin_movements(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor: last movement ID of the previous page"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
+):
     """
     Returns all movement records as JSON for administrator.
+    With `limit`, returns one page and the `next_cursor`.
     """
-    movimientos = controller.read_all(MovementOut)
+    if limit is not None:
+        return await _movements_page(limit, after, columns)
+    movimientos = await as_async(controller).read_all(MovementOut)
     logger.info(f"[GET /administrador/movements] Número de Movimientos encontrados: {len(movimientos)}")
     movimientos_dicts = [m.model_dump() if hasattr(m, "model_dump") else m.dict() if hasattr(m, "dict") else m for m in movimientos]
     return JSONResponse(content=movimientos_dicts)
 
+@router.get("/administrador/movements/export")
+def export_movements(
+    columns: Optional[str] = Query(None, description="Comma-separated columns"),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Streams every movement record as NDJSON.
+    """
+    return ndjson_export(controller, MovementOut, columns=parse_columns(MovementOut, columns))
+
 @router.get("/administrador/byid", response_class=JSONResponse)
 async def get_movement_by_id(
     ID: int = Query(...),
@@ -39,7 +74,7 @@ async def get_movement_by_id(
     """
     Returns a movement by its ID as JSON. Requires administrator scope.
     """
-    result = controller.get_by_column(MovementOut, "ID", ID)
+    result = await as_async(controller).get_by_column(MovementOut, "ID", ID)
     if result:
         return JSONResponse(content=result.model_dump() if hasattr(result, "model_dump") else result.dict())
     else:
@@ -54,7 +89,7 @@ async def get_movement_by_cardid(
     ID: int = Query(...),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador","pasajero"])
 ):
-    result = controller.get_by_column(MovementOut, "IDTarjeta", ID)
+    result = await as_async(controller).get_by_column(MovementOut, "IDTarjeta", ID)
     if result:
         # Always return a list
         if isinstance(result, list):
@@ -1,10 +1,18 @@
+import json
 import logging
 import re
-from fastapi import APIRouter, Form, HTTPException, Security
+from typing import List, Optional
+from fastapi import APIRouter, Body, Form, Header, HTTPException, Request, Security
 from fastapi.responses import JSONResponse
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from backend.app.models.payments import Payment
 from backend.app.core.auth import get_current_user
+from backend.app.core.batch import run_batch
+from backend.app.core.idempotency import idempotent
+from backend.app.logic.async_controller import as_async
+from backend.app.logic.fare_engine import CHARGED, INSUFFICIENT_FUNDS, INVALID, fare_engine_for
+from backend.app.logic.tap_ingestion import tap_ingestor_for
+from backend.app.core.config import settings
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -12,30 +20,96 @@ logging.basicConfig(level=logging.INFO)
 app = APIRouter(prefix="/payments", tags=["payments"])
 
 @app.post("/create", response_class=JSONResponse)
-def crear_pago(
+async def crear_pago(
     IDMovimiento: int = Form(...),
     IDPrecio: int = Form(...),
     IDTarjeta: int = Form(...),
     IDUnidad: str = Form("EMPTY"),
     ID: int = Form(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"]),
 ):
+    """
+    Crea un pago. Con `Idempotency-Key`, un reintento recibe la respuesta original
+    sin volver a escribir el pago.
+    """
     safe_unidad = re.sub(r"[^\w\-]", "_", IDUnidad)
+
+    async def crear():
+        try:
+            pago = Payment(
+                IDMovimiento=IDMovimiento,
+                IDPrecio=IDPrecio,
+                IDTarjeta=IDTarjeta,
+                IDUnidad=safe_unidad,
+                ID=ID
+            )
+            await as_async(controller).add(pago)
+            logger.info("[POST /payments/create] Pago creado exitosamente: ID=%s", ID)
+            return JSONResponse(content={"message": "Pago creado exitosamente.", "data": pago.model_dump()})
+        except ValueError as e:
+            logger.warning("[POST /payments/create] Error al crear pago: %s", e)
+            raise HTTPException(status_code=400, detail=str(e))
+
+    params = {"ID": ID, "IDMovimiento": IDMovimiento, "IDPrecio": IDPrecio, "IDTarjeta": IDTarjeta, "IDUnidad": safe_unidad}
+    return await idempotent(controller, "/payments/create", idempotency_key, current_user, params, crear)
+
+@app.post("/tap", response_class=JSONResponse)
+def cobrar_pasaje(
+    IDTarjeta: int = Form(...),
+    IDPrecio: int = Form(...),
+    IDUnidad: str = Form("EMPTY"),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"]),
+):
+    """
+    Cobra un pasaje: descuenta el monto del precio del saldo de la tarjeta y registra
+    el Movimiento y el Pago en una sola transacción. Responde 400 si el saldo no
+    alcanza y 404 si la tarjeta o el precio no existen.
+    """
     try:
-        pago = Payment(
-            IDMovimiento=IDMovimiento,
-            IDPrecio=IDPrecio,
-            IDTarjeta=IDTarjeta,
-            IDUnidad=safe_unidad,
-            ID=ID
-        )
-        controller.add(pago)
-        logger.info("[POST /payments/create] Pago creado exitosamente: ID=%s", ID)
-        return JSONResponse(content={"message": "Pago creado exitosamente.", "data": pago.model_dump()})
-    except ValueError as e:
-        logger.warning("[POST /payments/create] Error al crear pago: %s", e)
-        raise HTTPException(status_code=400, detail=str(e))
-    
+        resultado = fare_engine_for(controller).charge(IDTarjeta, IDPrecio, IDUnidad)
+    except Exception as e:
+        logger.error("[POST /payments/tap] Error: %s", e)
+        raise HTTPException(status_code=500, detail="Error al cobrar el pasaje.")
+    if resultado["status"] == CHARGED:
+        logger.info("[POST /payments/tap] Pasaje cobrado: tarjeta=%s, pago=%s", IDTarjeta, resultado["IDPago"])
+        return JSONResponse(content={"message": "Pasaje cobrado exitosamente.", "data": resultado})
+    logger.warning("[POST /payments/tap] Pasaje rechazado: tarjeta=%s, %s", IDTarjeta, resultado["status"])
+    if resultado["status"] == INSUFFICIENT_FUNDS:
+        return JSONResponse(status_code=400, content={"detail": "Saldo insuficiente.", "data": resultado})
+    if resultado["status"] == INVALID:
+        return JSONResponse(status_code=400, content={"detail": resultado["error"], "data": resultado})
+    return JSONResponse(status_code=404, content={"detail": "Tarjeta o precio no encontrado.", "data": resultado})
+
+@app.post("/taps/batch", response_class=JSONResponse)
+async def cobrar_taps_lote(
+    request: Request,
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"]),
+):
+    """
+    Cobra un lote de taps de un validador: una lista o `{"taps": [...]}` (como máximo
+    `FARE_BATCH_MAX`), cada uno con `IDTarjeta`, `IDPrecio`, `IDUnidad` opcional e
+    `IDTap` (ID del tap en el validador). Un `IDTap` ya procesado no se vuelve a
+    cobrar y devuelve su resultado original con `duplicate`. Los taps de varias
+    peticiones se cobran juntos en transacciones de hasta `TAP_GROUP_COMMIT_SIZE`.
+    """
+    try:
+        taps = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="El cuerpo debe ser JSON.")
+    if isinstance(taps, dict):
+        taps = taps.get("taps")
+    if not isinstance(taps, list):
+        raise HTTPException(status_code=400, detail="Se esperaba una lista de taps o {\"taps\": [...]}.")
+    if len(taps) > settings.FARE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"El lote supera el máximo de {settings.FARE_BATCH_MAX} taps.")
+    resultado = await tap_ingestor_for(controller).submit(taps)
+    logger.info(
+        "[POST /payments/taps/batch] %s taps: %s cobrados, %s duplicados, %s rechazados, %s fallidos.",
+        resultado["total"], resultado["charged"], resultado["duplicate"], resultado["rejected"], resultado["failed"],
+    )
+    return resultado
+
 @app.post("/update", response_class=JSONResponse)
 def actualizar_pago(
     ID: int = Form(...),
@@ -84,4 +158,27 @@ def eliminar_pago(
         raise
     except Exception as e:
         logger.error("[POST /payments/delete] Error: %s", e)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/batch/create", response_class=JSONResponse)
+def crear_pagos_lote(
+    pagos: List[Payment] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"]),
+):
+    for pago in pagos:
+        pago.IDUnidad = re.sub(r"[^\w\-]", "_", pago.IDUnidad)
+    return run_batch("/payments/batch/create", "create", controller.add_many, pagos)
+
+@app.post("/batch/update", response_class=JSONResponse)
+def actualizar_pagos_lote(
+    pagos: List[Payment] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"]),
+):
+    return run_batch("/payments/batch/update", "update", controller.update_many, pagos)
+
+@app.post("/batch/delete", response_class=JSONResponse)
+def eliminar_pagos_lote(
+    ids: List[int] = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"]),
+):
+    return run_batch("/payments/batch/delete", "delete", controller.delete_many, Payment, ids)
@@ -3,10 +3,13 @@ from fastapi import (
     Form, HTTPException, APIRouter, Request, Security
 )
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 import base64
 from backend.app.models.card import CardCreate, CardOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.transit_graph import route_planner_for
+from backend.app.logic.batch_planner import parse_od_pairs, plan_batch
+from backend.app.core.pagination import ndjson_line
 from backend.app.core.auth import get_current_user
 
 # Configuración de logging
@@ -16,7 +19,7 @@ logging.basicConfig(level=logging.INFO)
 app = APIRouter(prefix="/planificador", tags=["Planificador"])
 
 @app.post("/ubicaciones")
-async def get_route_plan(request: Request, ubicacion_entrada: str = Form(...), ubicacion_final: str = Form(...),current_user: dict = Security(get_current_user,scopes=["system", "administrador","pasajero"])):
+async def get_route_plan(request: Request, ubicacion_entrada: str = Form(...), ubicacion_final: str = Form(...), hora_salida: str = Form(None), current_user: dict = Security(get_current_user,scopes=["system", "administrador","pasajero"])):
     try:
         # Log seguro de los datos de entrada ANTES de usarlos
         for label, value in [("ubicacion_entrada", ubicacion_entrada), ("ubicacion_final", ubicacion_final)]:
@@ -30,10 +33,37 @@ async def get_route_plan(request: Request, ubicacion_entrada: str = Form(...), u
                     base64.b64encode(value.encode('UTF-8')).decode()
                 )
 
-        resultado = controller.ruta_interconexion(ubicacion_entrada, ubicacion_final)
+        # El grafo de rutas se carga una vez por proceso y la búsqueda se hace en memoria
+        planner = route_planner_for(controller)
+        if hora_salida:
+            resultado = await planner.plan_at(ubicacion_entrada, ubicacion_final, hora_salida)
+        else:
+            resultado = await planner.plan(ubicacion_entrada, ubicacion_final)
         
         if not resultado:
             logger.log(logging.CRITICAL, "Resultado vacío o inválido")
         return resultado
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error("Error al obtener las rutas con interconexión: %s", str(e))
\ No newline at end of file
+        logger.error("Error al obtener las rutas con interconexión: %s", str(e))
+
+@app.post("/batch")
+async def plan_route_batch(request: Request, current_user: dict = Security(get_current_user, scopes=["system", "administrador"])):
+    """
+    Planifica muchos pares origen/destino en una sola petición. El cuerpo es una
+    lista JSON o NDJSON de objetos con `ubicacion_entrada`, `ubicacion_final` y
+    opcionalmente `hora_salida`. La respuesta es NDJSON, un resultado por línea
+    (con el `index` del par) en el orden en que terminan.
+    """
+    try:
+        pares = parse_od_pairs(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("Planificación por lotes de %d pares", len(pares))
+
+    async def stream():
+        async for resultado in plan_batch(route_planner_for(controller), pares):
+            yield ndjson_line(resultado)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     Form, HTTPException, APIRouter, Security, status
 )
@@ -6,6 +7,7 @@ from fastapi.responses import JSONResponse
 
 from backend.app.models.pqr import PQRCreate, PQROut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
 #from backend.app.core.auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -19,9 +21,7 @@ def index_create_admin():
     Devuelve el siguiente ID disponible para crear un PQR (admin).
     """
     try:
-        pqrs = controller.read_all(PQROut)
-        ultimo_id = max(p["ID"] for p in pqrs) if pqrs else 0
-        nuevo_id = ultimo_id + 1
+        nuevo_id = id_allocator_for(controller).peek_id(PQROut)
     except Exception as e:
         logger.error(f"Error al obtener el último ID: {str(e)}")
         nuevo_id = 1  # Por defecto
@@ -34,9 +34,7 @@ def index_create_pasajero():
     Devuelve el siguiente ID disponible para crear un PQR (pasajero).
     """
     try:
-        pqrs = controller.read_all(PQROut)
-        ultimo_id = max(p["ID"] for p in pqrs) if pqrs else 0
-        nuevo_id = ultimo_id + 1
+        nuevo_id = id_allocator_for(controller).peek_id(PQROut)
     except Exception as e:
         logger.error(f"Error al obtener el último ID: {str(e)}")
         nuevo_id = 1  # Por defecto
@@ -59,15 +57,17 @@ def index_delete_admin():
 
 @router.post("/create", response_class=JSONResponse)
 async def create_pqr(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     type: str = Form(...),
     description: str = Form(...),
     fecha: str = Form(...),
     identificationuser: int = Form(...),
 ):
     try:
-        existing_pqr = controller.get_by_column(PQROut, "ID", ID)
-        if existing_pqr:
+        # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+        if ID is None:
+            ID = await id_allocator_for(controller).allocate(PQROut)
+        elif controller.get_by_column(PQROut, "ID", ID):
             logger.warning(f"[POST /create] Error de validación: El PQR ya existe con ID {ID}")
             raise HTTPException(400, detail="El PQR ya existe con la misma identificación.")
 
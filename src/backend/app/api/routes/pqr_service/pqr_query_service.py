@@ -1,8 +1,10 @@
 import logging
+from typing import Optional
 from fastapi import APIRouter, Security, Query, HTTPException
 from fastapi.responses import JSONResponse
 
 from backend.app.core.auth import get_current_user
+from backend.app.core.pagination import MAX_PAGE_SIZE, ndjson_export, parse_columns
 from backend.app.models.pqr import PQROut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 
@@ -42,15 +44,36 @@ def get_pqrs_pasajero(
 
 @router.get("/administrador/pqrs", response_class=JSONResponse)
 def get_pqrs_admin(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página"),
+    after: Optional[int] = Query(None, description="Cursor: ID del último PQR de la página anterior"),
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     """
-    Devuelve todos los registros de PQR para administrador.
+    Devuelve todos los registros de PQR para administrador. Con `limit` devuelve
+    una página y el `next_cursor` para pedir la siguiente.
     """
+    if limit is not None:
+        try:
+            page = controller.read_page(PQROut, limit, after=after, columns=parse_columns(PQROut, columns))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.info(f"[GET /administrador/pqrs] Página de {len(page['items'])} PQRs después de ID {after}")
+        return JSONResponse(content={"pqrs": page["items"], "next_cursor": page["next_cursor"]})
     pqrs = controller.read_all(PQROut)
     logger.info(f"[GET /administrador/pqrs] Número de PQRs encontrados: {len(pqrs) if pqrs else 0}")
     return JSONResponse(content={"pqrs": pqrs or []})
 
+@router.get("/administrador/pqrs/export")
+def export_pqrs(
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Exporta todos los PQR como NDJSON en streaming.
+    """
+    return ndjson_export(controller, PQROut, columns=parse_columns(PQROut, columns))
+
 @router.get("/find", response_class=JSONResponse)
 def pqr_by_id(
     ID: int = Query(...),
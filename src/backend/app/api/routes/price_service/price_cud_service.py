@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     Form, HTTPException, APIRouter, Security, status
 )
@@ -6,6 +7,7 @@ from fastapi.responses import JSONResponse
 
 from backend.app.models.price import PriceCreate, PriceOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
 from backend.app.core.auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -18,9 +20,7 @@ def index_create(
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     try:
-        prices = controller.read_all(PriceOut)
-        ultimo_id = max(p["ID"] for p in prices) if prices else 0
-        nuevo_id = ultimo_id + 1
+        nuevo_id = id_allocator_for(controller).peek_id(PriceOut)
     except Exception as e:
         logger.error(f"Error al obtener el último ID: {str(e)}")
         nuevo_id = 1  # Por defecto
@@ -41,14 +41,16 @@ def index_delete(
 
 @router.post("/create", response_class=JSONResponse)
 async def create_price(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     IDTipoTransporte: int = Form(...),
     Monto: float = Form(...),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     try:
-        existing_price = controller.get_by_column(PriceOut, "ID", ID)
-        if existing_price:
+        # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+        if ID is None:
+            ID = await id_allocator_for(controller).allocate(PriceOut)
+        elif controller.get_by_column(PriceOut, "ID", ID):
             logger.warning(f"[POST /create] Error de validación: El precio ya existe con identificación {ID}")
             raise HTTPException(400, detail="El precio ya existe con la misma identificación.")
 
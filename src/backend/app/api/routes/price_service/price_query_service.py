@@ -1,10 +1,12 @@
 import logging
-from fastapi import APIRouter, Security, Query, HTTPException
+import numpy as np
+from fastapi import APIRouter, Body, Security, Query, HTTPException
 from fastapi.responses import JSONResponse
 
 from backend.app.core.auth import get_current_user
 from backend.app.models.price import PriceOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.fare_catalog import fare_catalog_for
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -64,4 +66,31 @@ def price_admin(
         logger.warning(f"[GET /administrador/precio] No se encontró precio con id={id}")
         raise HTTPException(status_code=404, detail="Precio no encontrado")
     logger.info(f"[GET /administrador/precio] Precio encontrado: {unit_price.ID}, {unit_price.IDTipoTransporte},{unit_price.Monto}")
-    return JSONResponse(content=unit_price.model_dump())
\ No newline at end of file
+    return JSONResponse(content=unit_price.model_dump())
+
+@router.post("/administrador/simular", response_class=JSONResponse)
+def simular_tarifas(
+    taps: dict = Body(...),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Tarifa un conjunto de taps con el catálogo de tarifas en memoria. El cuerpo trae
+    columnas de igual largo: `IDPrecio` o `IDTipoTransporte` y, opcionalmente,
+    `IDTipoTarjeta`. Devuelve la tarifa de cada tap (null si no se puede tarifar),
+    el total y cuántos quedaron sin tarifa.
+    """
+    columnas = {name: taps[name] for name in ("IDPrecio", "IDTipoTransporte", "IDTipoTarjeta") if name in taps}
+    if any(not isinstance(col, list) for col in columnas.values()) or len({len(col) for col in columnas.values()}) > 1:
+        raise HTTPException(status_code=400, detail="Las columnas deben ser listas del mismo largo.")
+    try:
+        fares = fare_catalog_for(controller).compute_fares(columnas)
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.warning(f"[POST /administrador/simular] Taps inválidos: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    sin_tarifa = np.isnan(fares)
+    logger.info(f"[POST /administrador/simular] {len(fares)} taps tarifados, {int(sin_tarifa.sum())} sin tarifa")
+    return JSONResponse(content={
+        "fares": np.where(sin_tarifa, None, fares).tolist(),
+        "total": float(fares[~sin_tarifa].sum()),
+        "unpriced": int(sin_tarifa.sum()),
+    })
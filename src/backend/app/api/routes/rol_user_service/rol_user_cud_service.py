@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     Form, HTTPException, APIRouter, Security, status
 )
@@ -6,6 +7,7 @@ from fastapi.responses import JSONResponse
 
 from backend.app.models.rol_user import RolUserCreate, RolUserOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
 from backend.app.core.auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -18,9 +20,7 @@ def index_create(
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
     try:
-        rolusers = controller.read_all(RolUserOut)
-        ultimo_id = max(p["ID"] for p in rolusers) if rolusers else 0
-        nuevo_id = ultimo_id + 1
+        nuevo_id = id_allocator_for(controller).peek_id(RolUserOut)
     except Exception as e:
         logger.error(f"Error al obtener el último ID: {str(e)}")
         nuevo_id = 1  # Por defecto
@@ -41,7 +41,7 @@ def index_delete(
 
 @router.post("/create", response_class=JSONResponse)
 async def create_roluser(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     Rol: str = Form(...),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
 ):
@@ -51,6 +51,9 @@ async def create_roluser(
             logger.warning(f"[POST /create] Error de validación: El rol de usuario ya existe con ID {ID}")
             raise HTTPException(400, detail="El rol de usuario ya existe con la misma identificación.")
 
+        # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+        if ID is None:
+            ID = await id_allocator_for(controller).allocate(RolUserOut)
         new_roluser = RolUserCreate(ID=ID, Rol=Rol)
         logger.info(f"Intentando insertar rol de usuario con datos: {new_roluser.model_dump()}")
         controller.add(new_roluser)
@@ -2,6 +2,7 @@ import logging
 from fastapi import APIRouter, HTTPException, Query, Security
 from fastapi.responses import JSONResponse
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.transit_graph import route_planner_for
 from backend.app.core.auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -54,6 +55,46 @@ def listar_rutaparada_nombres(
             content={"detail": "Error interno al listar los nombres de las relaciones Ruta-Parada."}
         )
 
+@app.get("/interconexiones", response_class=JSONResponse)
+async def interconexiones_ruta(
+    id_ruta: int = Query(..., description="Ruta de partida"),
+    id_ruta_final: int = Query(None, description="Si se indica, solo las paradas compartidas con esta ruta"),
+):
+    """
+    Paradas donde se puede transbordar desde una ruta, leídas de la tabla de
+    transbordos precalculada (sin consultar la base de datos).
+    """
+    try:
+        graph = await route_planner_for(controller).load()
+        if id_ruta_final is not None:
+            transbordos = {id_ruta_final: graph.transfers.shared_stops(id_ruta, id_ruta_final)}
+        else:
+            transbordos = graph.transfers.transfers_from(id_ruta)
+        data = [
+            {
+                "IDRuta": otra,
+                "paradas": [
+                    {"IDParada": parada, "Ubicacion": graph.stop_locations[graph.stop_index[parada]]}
+                    for parada in paradas if parada in graph.stop_index
+                ],
+            }
+            for otra, paradas in transbordos.items() if paradas
+        ]
+        if not data:
+            logger.warning(f"[GET /ruta_parada/interconexiones] Sin interconexiones para la ruta {id_ruta}.")
+            return JSONResponse(
+                status_code=404,
+                content={"detail": "No se encontraron interconexiones para la ruta especificada."}
+            )
+        logger.info(f"[GET /ruta_parada/interconexiones] Ruta {id_ruta}: {len(data)} rutas conectadas.")
+        return {"IDRuta": id_ruta, "data": data}
+    except Exception as e:
+        logger.error(f"[GET /ruta_parada/interconexiones] Error: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Error interno al consultar las interconexiones de la ruta."}
+        )
+
 @app.get("/{id_parada}", response_class=JSONResponse)
 def detalle_rutaparada(
     id_parada: int,
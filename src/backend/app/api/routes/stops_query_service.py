@@ -1,8 +1,11 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from backend.app.core.auth import get_current_user
+from backend.app.core.config import settings
+from backend.app.logic.spatial_index import nearby
+from backend.app.logic.stop_search import stop_search_for
 from fastapi import Security
 
 from backend.app.models.stops import Parada
@@ -33,6 +36,44 @@ def listar_paradas(
         logger.error(f"[GET /stops/] Error al listar paradas: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/search", response_class=JSONResponse)
+async def buscar_paradas(
+    q: str = Query(..., min_length=1, description="Texto a buscar en el nombre o la ubicación"),
+    limit: int = Query(None, ge=1, le=100),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario", "pasajero"])
+):
+    """
+    Autocompleta paradas por nombre o ubicación, sin distinguir tildes ni mayúsculas.
+    """
+    try:
+        resultados = await stop_search_for(controller).search(
+            q, limit or settings.STOP_SEARCH_LIMIT
+        )
+        logger.info(f"[GET /stops/search] '{q}': {len(resultados)} paradas.")
+        return resultados
+    except Exception as e:
+        logger.error(f"[GET /stops/search] Error al buscar paradas: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/nearby", response_class=JSONResponse)
+async def paradas_cercanas(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(None, gt=0, le=settings.NEARBY_MAX_RADIUS_METERS, description="Radio en metros"),
+    limit: int = Query(None, ge=1, le=500),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario", "pasajero"])
+):
+    """
+    Lista las paradas con coordenadas en su ubicación a menos de `radius` metros, de la más cercana a la más lejana.
+    """
+    try:
+        paradas = await nearby(controller, Parada, lat, lon, radius, limit)
+        logger.info(f"[GET /stops/nearby] ({lat}, {lon}): {len(paradas)} paradas.")
+        return paradas
+    except Exception as e:
+        logger.error(f"[GET /stops/nearby] Error al buscar paradas cercanas: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/{id}", response_class=JSONResponse)
 def obtener_detalle_parada(
     id: int,
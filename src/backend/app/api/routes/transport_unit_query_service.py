@@ -1,10 +1,17 @@
+import asyncio
+import json
 import logging
 import re
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, Header, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from backend.app.models.transport import UnidadTransporte
-from backend.app.core.auth import get_current_user
+from backend.app.core.auth import get_current_user, get_websocket_user
+from backend.app.core.config import settings
+from backend.app.logic.fleet_feed import fleet_broadcaster_for
+from backend.app.logic.spatial_index import nearby
+from backend.app.logic.unit_schedule_view import etag_matches, unit_schedule_view_for
 from fastapi import Security
 
 logger = logging.getLogger(__name__)
@@ -51,22 +58,95 @@ def listar_unidades_con_nombres(
         )
 
 @app.get("/with_schedules", response_class=JSONResponse)
-def listar_unidades_con_horarios(
+async def listar_unidades_con_horarios(
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"])
 ):
     """
-    Lista todas las unidades de transporte con sus horarios asociados (por IDRuta).
+    Lista todas las unidades de transporte con sus horarios asociados (por IDRuta) y
+    los nombres de su ruta y tipo de transporte. Se sirve desde una vista en memoria
+    con ETag: si `If-None-Match` coincide se responde 304 sin cuerpo.
     """
     try:
-        unidades = controller.get_all_units_with_schedules()
+        cuerpo, etag = await unit_schedule_view_for(controller).get()
+        encabezados = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=encabezados)
         logger.info("[GET /transport_units/with_schedules] Unidades de transporte con horarios listadas.")
-        return unidades
+        return Response(content=cuerpo, media_type="application/json", headers=encabezados)
     except Exception as e:
         logger.error("[GET /transport_units/with_schedules] Error: %s", e)
         return JSONResponse(
             status_code=500,
             content={"detail": "Error al listar unidades de transporte con horarios."}
         )
+@app.get("/nearby", response_class=JSONResponse)
+async def unidades_cercanas(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(None, gt=0, le=settings.NEARBY_MAX_RADIUS_METERS, description="Radio en metros"),
+    limit: int = Query(None, ge=1, le=500),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario"])
+):
+    """
+    Lista las unidades de transporte a menos de `radius` metros, de la más cercana a la más lejana.
+    """
+    try:
+        unidades = await nearby(controller, UnidadTransporte, lat, lon, radius, limit)
+        logger.info("[GET /transport_units/nearby] (%s, %s): %s unidades.", lat, lon, len(unidades))
+        return unidades
+    except Exception as e:
+        logger.error("[GET /transport_units/nearby] Error: %s", e)
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Error al buscar unidades de transporte cercanas."}
+        )
+
+FLEET_SCOPES = ["system", "administrador", "operario", "supervisor"]
+
+@app.websocket("/ws")
+async def flota_en_vivo_ws(websocket: WebSocket):
+    """
+    Flota en vivo por WebSocket: un snapshot de las unidades al conectar y luego
+    deltas (`updated`, `removed`). Un cliente que no recibe un mensaje en
+    `FLEET_SEND_TIMEOUT` segundos se desconecta.
+    """
+    if get_websocket_user(websocket, FLEET_SCOPES) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    feed = fleet_broadcaster_for(controller).feed()
+    try:
+        async for mensaje in feed:
+            await asyncio.wait_for(websocket.send_text(json.dumps(mensaje, default=str)), settings.FLEET_SEND_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("[WS /transport_units/ws] Cliente lento desconectado.")
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except WebSocketDisconnect:
+        logger.info("[WS /transport_units/ws] Conexión cerrada.")
+    finally:
+        await feed.aclose()
+
+@app.get("/live")
+async def flota_en_vivo_sse(
+    current_user: dict = Security(get_current_user, scopes=FLEET_SCOPES)
+):
+    """
+    Flota en vivo como Server-Sent Events, con los mismos mensajes que `/transport_units/ws`.
+    """
+    async def eventos():
+        feed = fleet_broadcaster_for(controller).feed()
+        try:
+            async for mensaje in feed:
+                if mensaje["type"] == "heartbeat":
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"event: {mensaje['type']}\nid: {mensaje['version']}\ndata: {json.dumps(mensaje, default=str)}\n\n"
+        finally:
+            await feed.aclose()
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/{ID}", response_class=JSONResponse)
 def detalle_unidad_transporte(
     ID: str,
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from fastapi import (
     Form, HTTPException, APIRouter, Security, status
 )
@@ -8,6 +9,7 @@ from backend.app.models.user import UserCreate, UserOut
 from backend.app.models.rol_user import RolUserOut
 from backend.app.models.shift import Shift
 from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.id_allocator import id_allocator_for
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -17,11 +19,9 @@ router = APIRouter(prefix="/user", tags=["user"])
 @router.get("/crear", response_class=JSONResponse)
 def index_create():
     try:
-        users = controller.read_all(UserOut)
+        nuevo_id = id_allocator_for(controller).peek_id(UserOut)
         roles = controller.read_all(RolUserOut)
         turnos = controller.read_all(Shift)
-        ultimo_id = max(p["ID"] for p in users) if users else 0
-        nuevo_id = ultimo_id + 1
         return JSONResponse(
             content={
                 "nuevo_id": nuevo_id,
@@ -46,7 +46,7 @@ def index_delete():
 
 @router.post("/create", response_class=JSONResponse)
 async def create_user(
-    ID: int = Form(...),
+    ID: Optional[int] = Form(None),
     Identificacion: int = Form(...),
     Nombre: str = Form(...),
     Apellido: str = Form(...),
@@ -61,6 +61,9 @@ async def create_user(
         if existing_user:
             raise HTTPException(400, detail="El usuario ya existe con la misma identificación.")
 
+        # Sin ID, se asigna en el servidor: el que muestra el formulario de creación es solo informativo
+        if ID is None:
+            ID = await id_allocator_for(controller).allocate(UserOut)
         new_user = UserCreate(
             ID=ID,
             Identificacion=Identificacion,
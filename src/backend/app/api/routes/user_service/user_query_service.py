@@ -1,8 +1,11 @@
 import logging
+from typing import Optional
 from fastapi import APIRouter, Security, Query, HTTPException, status
 from fastapi.responses import JSONResponse
 
 from backend.app.core.auth import get_current_user
+from backend.app.core.pagination import MAX_PAGE_SIZE, ndjson_export, parse_columns
+from backend.app.logic.async_controller import as_async
 from backend.app.models.user import UserOut
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 
@@ -19,14 +22,36 @@ def consultar():
     return JSONResponse(content={"message": "Consulta de usuarios habilitada."})
 
 @router.get("/users", response_class=JSONResponse)
-async def get_users():
+async def get_users(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página"),
+    after: Optional[int] = Query(None, description="Cursor: ID del último usuario de la página anterior"),
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
+):
     """
-    Devuelve todos los usuarios registrados.
+    Devuelve todos los usuarios registrados. Con `limit` devuelve una página y el
+    `next_cursor` para pedir la siguiente.
     """
+    if limit is not None:
+        try:
+            page = await as_async(controller).read_page(UserOut, limit, after=after, columns=parse_columns(UserOut, columns))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        logger.info(f"[GET /users] Página de {len(page['items'])} usuarios después de ID {after}")
+        return JSONResponse(content={"cantidad": len(page["items"]), "usuarios": page["items"], "next_cursor": page["next_cursor"]})
     usuarios = controller.read_all(UserOut)
     logger.info(f"[GET /users] Número de usuarios encontrados: {len(usuarios) if usuarios else 0}")
     return JSONResponse(content= {"cantidad":len(usuarios), "usuarios": usuarios})
 
+@router.get("/users/export")
+def export_users(
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador"])
+):
+    """
+    Exporta todos los usuarios como NDJSON en streaming.
+    """
+    return ndjson_export(controller, UserOut, columns=parse_columns(UserOut, columns))
+
 @router.get("/usuario", response_class=JSONResponse)
 def usuario(
     id: int = Query(...),
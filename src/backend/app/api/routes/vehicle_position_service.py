@@ -0,0 +1,97 @@
+import json
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request, Security, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse
+from backend.app.logic.universal_controller_instance import universal_controller as controller
+from backend.app.logic.vehicle_positions import position_store_for
+from backend.app.core.auth import get_current_user, get_websocket_user
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+app = APIRouter(prefix="/positions", tags=["positions"])
+
+REPORT_SCOPES = ["system", "administrador", "operario"]
+
+
+def _reports(payload) -> list:
+    """Reportes de un cuerpo JSON: un objeto, una lista o `{"posiciones": [...]}`."""
+    if isinstance(payload, dict):
+        payload = payload.get("posiciones", [payload])
+    if not isinstance(payload, list):
+        raise ValueError("Se esperaba una posición o una lista de posiciones.")
+    if len(payload) > settings.POSITION_BATCH_MAX:
+        raise ValueError(f"El lote supera el máximo de {settings.POSITION_BATCH_MAX} posiciones.")
+    return payload
+
+
+@app.post("/batch", response_class=JSONResponse)
+async def registrar_posiciones(
+    request: Request,
+    current_user: dict = Security(get_current_user, scopes=REPORT_SCOPES)
+):
+    """
+    Registra un lote de posiciones de unidades (`ID` y `Ubicacion`, o `lat` y `lon`;
+    `timestamp` opcional en segundos epoch). Se guardan en memoria y se escriben en
+    `UnidadTransporte` por lotes.
+    """
+    try:
+        reportes = _reports(json.loads(await request.body()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    resultado = position_store_for(controller).record_many(reportes)
+    logger.info(f"[POST /positions/batch] {resultado['accepted']}/{resultado['total']} posiciones aceptadas.")
+    return resultado
+
+
+@app.websocket("/ws")
+async def recibir_posiciones(websocket: WebSocket):
+    """
+    Canal para que las unidades reporten su posición: cada mensaje es una posición
+    o una lista de posiciones en JSON, y se responde con el resultado del lote.
+    """
+    if get_websocket_user(websocket, REPORT_SCOPES) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    store = position_store_for(controller)
+    try:
+        while True:
+            mensaje = await websocket.receive_text()
+            try:
+                resultado = store.record_many(_reports(json.loads(mensaje)))
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            await websocket.send_json(resultado)
+    except WebSocketDisconnect:
+        logger.info("[WS /positions/ws] Conexión cerrada.")
+
+
+@app.get("/", response_class=JSONResponse)
+def listar_posiciones(
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario", "supervisor"])
+):
+    """
+    Devuelve la última posición conocida de cada unidad, desde memoria.
+    """
+    return position_store_for(controller).snapshot()
+
+
+@app.get("/{ID}", response_class=JSONResponse)
+def obtener_posicion(
+    ID: str,
+    history: int = Query(0, ge=0, le=settings.POSITION_HISTORY),
+    current_user: dict = Security(get_current_user, scopes=["system", "administrador", "operario", "supervisor"])
+):
+    """
+    Devuelve la última posición de una unidad y, con `history`, sus últimos reportes.
+    """
+    store = position_store_for(controller)
+    posicion = store.latest(ID)
+    if posicion is None:
+        return JSONResponse(status_code=404, content={"detail": "No hay posiciones registradas para la unidad."})
+    if history:
+        posicion["historial"] = store.history_of(ID, history)
+    return posicion
@@ -1,8 +1,8 @@
-from fastapi import Depends, HTTPException, status, Request, Security
+from fastapi import Depends, HTTPException, status, Request, Security, WebSocket
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jose import jwt, JWTError
 from backend.app.core.config import settings
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,6 +62,16 @@ def get_current_user(
             detail="Not authenticated",
         )
 
+    return decode_token(token)
+
+
+def decode_token(token: str) -> Dict[str, str]:
+    """
+    Decodes a JWT token into the user's `sub` and `scope`.
+
+    Raises:
+        HTTPException: If the token is invalid or lacks `sub` or `scope`.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -74,6 +84,26 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Token inválido")
 
 
+def get_websocket_user(websocket: WebSocket, scopes: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Authenticates a WebSocket handshake, which cannot send an Authorization header
+    from browsers: the token comes from the `access_token` cookie, the
+    `Authorization` header or the `token` query parameter.
+
+    Returns:
+        dict: The current user, or None if the token is missing, invalid or its scope is not in `scopes`.
+    """
+    token = websocket.cookies.get("access_token") or websocket.headers.get("authorization") \
+        or websocket.query_params.get("token")
+    if not token:
+        return None
+    try:
+        user = decode_token(token.replace("Bearer ", ""))
+    except HTTPException:
+        return None
+    return user if user["scope"] in scopes else None
+
+
 def verify_role(allowed_roles: List[str]):
     """
     Dependency to verify if the current user has the required role(s).
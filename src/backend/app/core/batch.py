@@ -0,0 +1,25 @@
+import logging
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+def run_batch(route: str, operation: str, fn: Callable[..., dict], *args: Any) -> JSONResponse:
+    """
+    Ejecuta una operación por lotes del controlador (`add_many`, `update_many`,
+    `delete_many`) y arma la respuesta: 200 si todas las filas se aplicaron, 207
+    si alguna falló (con el detalle por fila) y 400 si el lote no es válido.
+    """
+    try:
+        result = fn(*args)
+    except ValueError as e:
+        logger.warning(f"[POST {route}] Lote inválido: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logger.info(f"[POST {route}] {result['succeeded']}/{result['total']} registros procesados, {result['failed']} con error")
+    return JSONResponse(
+        status_code=status.HTTP_207_MULTI_STATUS if result["failed"] else status.HTTP_200_OK,
+        content={"operation": operation, "success": result["failed"] == 0, **result},
+    )
@@ -16,6 +16,89 @@ class Settings:
     PASSWORD: str = os.getenv("PASSWORD")
     USER: str = os.getenv("USER")
 
+    # sqlserver (por defecto) | sqlite: backend de datos de la aplicación. Con sqlite los
+    # endpoints async usan el controlador asíncrono nativo sobre aiosqlite
+    DB_BACKEND: str = os.getenv("DB_BACKEND", "sqlserver").strip().lower()
+    DB_SQLITE_POOL_SIZE: int = int(os.getenv("DB_SQLITE_POOL_SIZE", "4"))
+    # Segundos que una conexión SQLite espera el bloqueo de escritura de otra
+    DB_SQLITE_BUSY_TIMEOUT: float = float(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "30"))
+
+    # Pool de conexiones a SQL Server
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: float = float(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_HEALTH_CHECK_AFTER: float = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30"))
+
+    # Pool de hilos para las llamadas a la base de datos desde endpoints async
+    DB_EXECUTOR_WORKERS: int = int(os.getenv("DB_EXECUTOR_WORKERS", os.getenv("DB_POOL_SIZE", "10")))
+    DB_EXECUTOR_QUEUE: int = int(os.getenv("DB_EXECUTOR_QUEUE", "100"))
+    DB_EXECUTOR_QUEUE_TIMEOUT: float = float(os.getenv("DB_EXECUTOR_QUEUE_TIMEOUT", "10"))
+    # off | warn | raise: detecta llamadas síncronas a la base de datos desde el event loop
+    DB_EVENT_LOOP_GUARD: str = os.getenv("DB_EVENT_LOOP_GUARD", "off").strip().lower()
+
+    # Cantidad de IDs que cada proceso reserva de una vez en la tabla de secuencias
+    DB_ID_BLOCK_SIZE: int = int(os.getenv("DB_ID_BLOCK_SIZE", "20"))
+    # Filas por commit en add_many / update_many / delete_many
+    DB_BULK_CHUNK_SIZE: int = int(os.getenv("DB_BULK_CHUNK_SIZE", "1000"))
+    # Caché de conteos: segundos de vigencia y cada cuánto los recarga el hilo de fondo (0 = sin hilo)
+    DB_COUNTER_TTL: float = float(os.getenv("DB_COUNTER_TTL", "60"))
+    DB_COUNTER_REFRESH_INTERVAL: float = float(os.getenv("DB_COUNTER_REFRESH_INTERVAL", "30"))
+
+    # Planificador de viajes: transbordos máximos e itinerarios por respuesta
+    PLANNER_MAX_TRANSFERS: int = int(os.getenv("PLANNER_MAX_TRANSFERS", "3"))
+    PLANNER_MAX_ITINERARIES: int = int(os.getenv("PLANNER_MAX_ITINERARIES", "10"))
+    # Caché de respuestas del planificador: entradas máximas y segundos de vigencia
+    PLANNER_CACHE_SIZE: int = int(os.getenv("PLANNER_CACHE_SIZE", "1024"))
+    PLANNER_CACHE_TTL: float = float(os.getenv("PLANNER_CACHE_TTL", "300"))
+    # Planificación por lotes: procesos (0 = hilos del servidor), pares por bloque y por petición
+    PLANNER_BATCH_WORKERS: int = int(os.getenv("PLANNER_BATCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PLANNER_BATCH_CHUNK_SIZE: int = int(os.getenv("PLANNER_BATCH_CHUNK_SIZE", "250"))
+    PLANNER_BATCH_MAX_PAIRS: int = int(os.getenv("PLANNER_BATCH_MAX_PAIRS", "10000"))
+    # Snapshot binario de la tabla de transbordos (vacío = no se guarda)
+    PLANNER_TRANSFER_SNAPSHOT: str = os.getenv(
+        "PLANNER_TRANSFER_SNAPSHOT", os.path.join(os.getcwd(), "src", "backend", "app", "data", "transfer_table.bin")
+    )
+
+    # Búsqueda de paradas: resultados máximos por consulta
+    STOP_SEARCH_LIMIT: int = int(os.getenv("STOP_SEARCH_LIMIT", "10"))
+    # Índice espacial: lado de las celdas y radios (en metros) de /nearby y del planificador
+    SPATIAL_CELL_METERS: float = float(os.getenv("SPATIAL_CELL_METERS", "250"))
+    NEARBY_RADIUS_METERS: float = float(os.getenv("NEARBY_RADIUS_METERS", "500"))
+    NEARBY_MAX_RADIUS_METERS: float = float(os.getenv("NEARBY_MAX_RADIUS_METERS", "10000"))
+    PLANNER_WALK_RADIUS_METERS: float = float(os.getenv("PLANNER_WALK_RADIUS_METERS", "400"))
+    # Posiciones de las unidades: reportes guardados por unidad, segundos entre escrituras
+    # a la base de datos (0 = sin hilo), unidades y reportes por lote máximos
+    POSITION_HISTORY: int = int(os.getenv("POSITION_HISTORY", "120"))
+    POSITION_FLUSH_INTERVAL: float = float(os.getenv("POSITION_FLUSH_INTERVAL", "5"))
+    POSITION_MAX_UNITS: int = int(os.getenv("POSITION_MAX_UNITS", "10000"))
+    POSITION_BATCH_MAX: int = int(os.getenv("POSITION_BATCH_MAX", "5000"))
+    # Flota en vivo: segundos entre envíos a los clientes, entre heartbeats, máximo por envío
+    # y unidades eliminadas que se recuerdan para armar deltas
+    FLEET_FEED_INTERVAL: float = float(os.getenv("FLEET_FEED_INTERVAL", "0.5"))
+    FLEET_FEED_HEARTBEAT: float = float(os.getenv("FLEET_FEED_HEARTBEAT", "15"))
+    FLEET_SEND_TIMEOUT: float = float(os.getenv("FLEET_SEND_TIMEOUT", "10"))
+    FLEET_MAX_TOMBSTONES: int = int(os.getenv("FLEET_MAX_TOMBSTONES", "1000"))
+    # Cobro de pasajes: tipo de movimiento de los pagos y taps máximos por lote
+    FARE_MOVEMENT_TYPE: int = int(os.getenv("FARE_MOVEMENT_TYPE", "1"))
+    FARE_BATCH_MAX: int = int(os.getenv("FARE_BATCH_MAX", "5000"))
+    # Factor de la tarifa por tipo de tarjeta, como "2:0.5,3:0" (los tipos que no están pagan 1)
+    FARE_CARD_TYPE_FACTORS: dict = {
+        int(tipo): float(factor)
+        for tipo, factor in (item.split(":") for item in os.getenv("FARE_CARD_TYPE_FACTORS", "").split(",") if item.strip())
+    }
+    # Ingesta de taps por lotes: taps por transacción y milisegundos de espera para juntarlos
+    TAP_GROUP_COMMIT_SIZE: int = int(os.getenv("TAP_GROUP_COMMIT_SIZE", "500"))
+    TAP_GROUP_COMMIT_MS: float = float(os.getenv("TAP_GROUP_COMMIT_MS", "20"))
+    # Liquidación diaria: pagos por bloque, bloques entre checkpoints y directorio de salida
+    SETTLEMENT_CHUNK_SIZE: int = int(os.getenv("SETTLEMENT_CHUNK_SIZE", "50000"))
+    SETTLEMENT_CHECKPOINT_EVERY: int = int(os.getenv("SETTLEMENT_CHECKPOINT_EVERY", "20"))
+    SETTLEMENT_OUTPUT_DIR: str = os.getenv(
+        "SETTLEMENT_OUTPUT_DIR", os.path.join(os.getcwd(), "src", "backend", "app", "data", "settlement")
+    )
+    # Llaves de idempotencia: respuestas guardadas en memoria y segundos de vigencia
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+
     @property
     def db_config(self) -> dict:
         # Devuelve un diccionario con la configuración de la base de datos
@@ -0,0 +1,63 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from backend.app.logic.idempotency import (
+    IdempotencyInProgress, IdempotencyKeyReused, fingerprint, idempotency_store_for,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 200
+
+
+async def idempotent(
+    controller: Any,
+    route: str,
+    key: Optional[str],
+    current_user: Optional[dict],
+    params: dict,
+    create: Callable[[], Awaitable[Union[Response, dict]]],
+) -> Response:
+    """
+    Ejecuta `create()` una sola vez por encabezado `Idempotency-Key`. Un reintento
+    con la misma llave (del mismo usuario y ruta) recibe la respuesta original con
+    `Idempotent-Replayed: true`; con otros `params` responde 422 y, si la primera
+    petición sigue en curso, 409. Sin llave, `create()` se ejecuta normalmente.
+    """
+    if key is None:
+        return await create()
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres.",
+        )
+
+    async def run():
+        response = await create()
+        if isinstance(response, Response):
+            return response.status_code, json.loads(response.body)
+        return status.HTTP_200_OK, jsonable_encoder(response)
+
+    user = (current_user or {}).get("sub", "")
+    try:
+        status_code, body, replayed = await idempotency_store_for(controller).run(
+            f"{route}:{user}:{key}", fingerprint(params), run
+        )
+    except IdempotencyKeyReused as e:
+        logger.warning(f"[POST {route}] {e} Llave: {key}")
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IdempotencyInProgress as e:
+        logger.warning(f"[POST {route}] {e} Llave: {key}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if replayed:
+        logger.info(f"[POST {route}] Respuesta repetida para la llave de idempotencia {key}")
+    return JSONResponse(
+        status_code=status_code,
+        content=body,
+        headers={"Idempotency-Key": key, "Idempotent-Replayed": "true" if replayed else "false"},
+    )
@@ -1,5 +1,6 @@
 from fastapi import Request, FastAPI
 from fastapi.responses import JSONResponse
+from backend.app.logic.async_controller import DatabaseBusyError
 
 async def catch_exceptions_middleware(request: Request, call_next):
     """
@@ -18,6 +19,20 @@ async def catch_exceptions_middleware(request: Request, call_next):
         return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 
+async def database_busy_handler(request: Request, exc: DatabaseBusyError):
+    """
+    Returns 503 when the database worker pool rejects a call because its queue is full.
+
+    Args:
+        request (Request): The incoming request.
+        exc (DatabaseBusyError): The rejection raised by the database executor.
+
+    Returns:
+        JSONResponse: A JSON response with status code 503 and a Retry-After header.
+    """
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 def add_middlewares(app: FastAPI):
     """
     Adds the global exception handling middleware to the FastAPI app.
@@ -26,3 +41,4 @@ def add_middlewares(app: FastAPI):
         app (FastAPI): The FastAPI application instance.
     """
     app.middleware("http")(catch_exceptions_middleware)
+    app.add_exception_handler(DatabaseBusyError, database_busy_handler)
@@ -0,0 +1,47 @@
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from backend.app.logic.async_controller import AsyncControllerFacade, as_async
+from backend.app.logic.keyset import resolve_columns
+
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 500
+
+
+def parse_columns(cls: Any, columns: Optional[str]) -> Optional[list]:
+    """
+    Convierte el parámetro `columns` ("ID,Monto") en una lista validada contra el
+    modelo. Devuelve None si no se pidió proyección; lanza 400 si alguna no existe.
+    """
+    if not columns:
+        return None
+    try:
+        return resolve_columns(cls, [c for c in columns.split(",") if c.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def ndjson_line(row: dict) -> bytes:
+    return (json.dumps(row, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def ndjson_export(controller: Any, cls: Any, columns: Optional[list] = None,
+                  filters: Optional[dict] = None) -> StreamingResponse:
+    """
+    Exporta la tabla completa como NDJSON (una fila JSON por línea) leyendo del
+    cursor por lotes, sin construir la lista en memoria.
+    """
+    db = as_async(controller)
+    if isinstance(db, AsyncControllerFacade):
+        # Generador síncrono: Starlette lo recorre en su pool de hilos
+        rows = controller.iter_rows(cls, columns=columns, filters=filters, batch_size=EXPORT_BATCH_SIZE)
+        body = (ndjson_line(row) for row in rows)
+    else:
+        async def stream():
+            async for row in db.iter_rows(cls, columns=columns, filters=filters, batch_size=EXPORT_BATCH_SIZE):
+                yield ndjson_line(row)
+        body = stream()
+    return StreamingResponse(body, media_type="application/x-ndjson")
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseBusyError(RuntimeError):
+    """Se lanza cuando la cola de trabajo de la base de datos está llena."""
+
+
+class BlockingCallOnEventLoopError(RuntimeError):
+    """Llamada síncrona a la base de datos hecha desde el hilo del event loop."""
+
+
+def ensure_not_on_event_loop(operation: str) -> None:
+    """
+    Detecta llamadas síncronas a la base de datos desde el event loop.
+
+    Según `DB_EVENT_LOOP_GUARD` registra una advertencia (`warn`), lanza un error
+    (`raise`) o no hace nada (`off`, por defecto).
+    """
+    mode = settings.DB_EVENT_LOOP_GUARD
+    if mode == "off":
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # No hay un loop corriendo en este hilo
+    message = f"Llamada bloqueante a la base de datos desde el event loop: {operation}"
+    if mode == "raise":
+        raise BlockingCallOnEventLoopError(message)
+    logger.warning(message, stack_info=True)
+
+
+class DatabaseExecutor:
+    """
+    Pool de hilos dedicado a la base de datos con contrapresión.
+
+    Como máximo `max_workers + max_queue` llamadas pueden estar en curso o en
+    espera; las demás esperan hasta `queue_timeout` segundos y luego fallan con
+    `DatabaseBusyError`.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, queue_timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        # asyncio.Semaphore queda ligado a un loop, así que se guarda uno por loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_pending)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `fn` en el pool de la base de datos y espera su resultado."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(loop)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._rejected += 1
+            raise DatabaseBusyError(
+                f"La base de datos está ocupada: más de {self.max_pending} operaciones pendientes."
+            )
+        with self._lock:
+            self._pending += 1
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            semaphore.release()
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class AsyncControllerFacade:
+    """
+    Expone los métodos de un controlador síncrono como corutinas que se ejecutan
+    en el `DatabaseExecutor`, por ejemplo `await db.get_by_column(UserOut, "ID", 1)`.
+    """
+
+    def __init__(self, controller: Any, executor: DatabaseExecutor):
+        self._controller = controller
+        self._executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        # El atributo se resuelve en cada llamada para respetar monkeypatches del controlador
+        attr = getattr(self._controller, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self._executor.run(attr, *args, **kwargs)
+
+        return call
+
+
+_executor: Optional[DatabaseExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_database_executor() -> DatabaseExecutor:
+    """Devuelve el pool de hilos de la base de datos del proceso, creándolo si hace falta."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DatabaseExecutor(
+                max_workers=settings.DB_EXECUTOR_WORKERS,
+                max_queue=settings.DB_EXECUTOR_QUEUE,
+                queue_timeout=settings.DB_EXECUTOR_QUEUE_TIMEOUT,
+            )
+        return _executor
+
+
+_native_controllers: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+def register_async_controller(controller: Any, async_controller: Any) -> None:
+    """Asocia a `controller` una implementación asíncrona nativa de su misma API."""
+    _native_controllers[controller] = async_controller
+
+
+def as_async(controller: Any) -> Any:
+    """
+    Versión asíncrona de `controller`: la implementación nativa registrada para él
+    o, si no hay, una fachada que ejecuta sus métodos en el pool de hilos.
+    """
+    native = _native_controllers.get(controller)
+    if native is not None:
+        return native
+    return AsyncControllerFacade(controller, get_database_executor())
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.app.core.config import settings
+from backend.app.logic.timetable import parse_time
+from backend.app.logic.transit_graph import RoutePlanner, normalize_location
+
+logger = logging.getLogger(__name__)
+
+# Grafo deserializado en cada proceso del pool: (archivo del snapshot, grafo)
+_worker_graph: Optional[Tuple[str, Any]] = None
+
+
+def parse_od_pairs(body: bytes, content_type: str = "") -> List[dict]:
+    """
+    Lee los pares origen/destino de un cuerpo JSON (lista, o objeto con `pares`) o
+    NDJSON (un objeto por línea). Cada par trae `ubicacion_entrada`,
+    `ubicacion_final` y opcionalmente `hora_salida`. Lanza ValueError si el
+    cuerpo o algún par no son válidos.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        raise ValueError("El cuerpo de la petición está vacío.")
+    if "ndjson" in content_type or (not text.startswith("[") and "\n" in text):
+        try:
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f"NDJSON inválido: {e}")
+    else:
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if isinstance(items, dict):
+            items = items.get("pares", [items])
+    if not isinstance(items, list) or not items:
+        raise ValueError("Se esperaba una lista de pares origen/destino.")
+    if len(items) > settings.PLANNER_BATCH_MAX_PAIRS:
+        raise ValueError(f"El lote supera el máximo de {settings.PLANNER_BATCH_MAX_PAIRS} pares.")
+    pairs = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("ubicacion_entrada") or not item.get("ubicacion_final"):
+            raise ValueError(f"El par {index} debe tener 'ubicacion_entrada' y 'ubicacion_final'.")
+        hora = item.get("hora_salida")
+        pairs.append({
+            "ubicacion_entrada": normalize_location(item["ubicacion_entrada"]),
+            "ubicacion_final": normalize_location(item["ubicacion_final"]),
+            "hora_salida": parse_time(hora) if hora else None,
+        })
+    return pairs
+
+
+def plan_chunk(snapshot_path: str, pairs: List[Tuple[int, dict]],
+               max_transfers: int, max_itineraries: int) -> List[Tuple[int, dict]]:
+    """
+    Planifica un bloque de pares sobre el snapshot del grafo guardado en
+    `snapshot_path` (uno por versión, ver `GraphSnapshots`). Se ejecuta en un
+    proceso del pool, que lee el archivo solo la primera vez que ve esa versión.
+    """
+    global _worker_graph
+    if _worker_graph is None or _worker_graph[0] != snapshot_path:
+        with open(snapshot_path, "rb") as f:
+            _worker_graph = (snapshot_path, pickle.load(f))
+    graph = _worker_graph[1]
+    planner = RoutePlanner(None, max_transfers=max_transfers, max_itineraries=max_itineraries)
+    results = []
+    for index, pair in pairs:
+        try:
+            if pair["hora_salida"] is None:
+                result = planner.search(graph, pair["ubicacion_entrada"], pair["ubicacion_final"])
+            else:
+                result = planner.search_at(graph, pair["ubicacion_entrada"], pair["ubicacion_final"], pair["hora_salida"])
+        except Exception as e:
+            result = {"error": f"Error al obtener la ruta: {str(e)}"}
+        results.append((index, result))
+    return results
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_planner_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool de procesos del planificador por lotes, o None si `PLANNER_BATCH_WORKERS` es 0."""
+    global _pool
+    if settings.PLANNER_BATCH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el proceso del servidor tiene hilos (pool de la base de datos, refresco de conteos)
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PLANNER_BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+class GraphSnapshots:
+    """
+    Snapshots del grafo en archivos, uno por planificador y versión, para que los
+    bloques lleven solo la ruta del archivo y cada proceso del pool lea el grafo
+    una vez por versión. El archivo se escribe con la primera petición que usa la
+    versión y se borra cuando hay una más nueva y ninguna petición lo usa.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or tempfile.mkdtemp(prefix="planner-graph-")
+        self._lock = threading.Lock()
+        # (planificador, versión) -> [archivo, peticiones que lo usan]
+        self._files: Dict[Tuple[int, int], list] = {}
+        self._latest: Dict[int, int] = {}
+
+    def acquire(self, planner: RoutePlanner) -> Tuple[int, str]:
+        """Versión vigente del grafo de `planner` y su archivo, escribiéndolo si falta."""
+        with self._lock:
+            entry = self._files.get((id(planner), planner.version))
+            if entry is not None:
+                entry[1] += 1
+                return planner.version, entry[0]
+        version, data = planner.snapshot()
+        path = os.path.join(self.directory, f"graph-{id(planner)}-{version}.pkl")
+        with self._lock:
+            entry = self._files.get((id(planner), version))
+            if entry is None:
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                entry = self._files[(id(planner), version)] = [path, 0]
+                self._latest[id(planner)] = max(self._latest.get(id(planner), version), version)
+                logger.info(f"Snapshot del grafo versión {version} guardado ({len(data)} bytes)")
+            entry[1] += 1
+            self._discard_unused()
+            return version, path
+
+    def release(self, planner: RoutePlanner, version: int) -> None:
+        with self._lock:
+            entry = self._files.get((id(planner), version))
+            if entry is not None:
+                entry[1] -= 1
+            self._discard_unused()
+
+    def _discard_unused(self) -> None:
+        for key, (path, users) in list(self._files.items()):
+            if users <= 0 and key[1] < self._latest.get(key[0], key[1]):
+                del self._files[key]
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._latest.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_snapshots: Optional[GraphSnapshots] = None
+
+
+def get_graph_snapshots() -> GraphSnapshots:
+    global _snapshots
+    with _pool_lock:
+        if _snapshots is None:
+            _snapshots = GraphSnapshots()
+        return _snapshots
+
+
+def shutdown_planner_pool() -> None:
+    global _pool, _snapshots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _snapshots is not None:
+            _snapshots.close()
+            _snapshots = None
+
+
+async def plan_batch(planner: RoutePlanner, pairs: List[dict], chunk_size: Optional[int] = None) -> AsyncIterator[dict]:
+    """
+    Planifica todos los pares contra una sola versión del grafo y entrega cada
+    resultado (con su `index` en el lote) a medida que terminan los bloques.
+    """
+    await planner.load()
+    chunk_size = chunk_size or settings.PLANNER_BATCH_CHUNK_SIZE
+    loop = asyncio.get_running_loop()
+    pool = get_planner_pool()
+    snapshots = get_graph_snapshots()
+    # Serializar el grafo no debe frenar el event loop; solo ocurre una vez por versión
+    version, path = await loop.run_in_executor(None, snapshots.acquire, planner)
+    indexed = list(enumerate(pairs))
+    tasks = [
+        loop.run_in_executor(
+            pool, plan_chunk, path, indexed[start:start + chunk_size],
+            planner.max_transfers, planner.max_itineraries,
+        )
+        for start in range(0, len(indexed), chunk_size)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for index, result in await finished:
+                pair = pairs[index]
+                yield {
+                    "index": index,
+                    "ubicacion_entrada": pair["ubicacion_entrada"],
+                    "ubicacion_final": pair["ubicacion_final"],
+                    **result,
+                    "graph_version": version,
+                }
+    finally:
+        for task in tasks:
+            task.cancel()
+        snapshots.release(planner, version)
@@ -0,0 +1,118 @@
+import logging
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=256)
+def insert_sql(table: str, columns: tuple) -> str:
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+
+@lru_cache(maxsize=256)
+def update_sql(table: str, columns: tuple) -> str:
+    assignments = ", ".join(f"{column} = ?" for column in columns if column != "ID")
+    return f"UPDATE {table} SET {assignments} WHERE ID = ?"
+
+
+@lru_cache(maxsize=256)
+def delete_sql(table: str) -> str:
+    return f"DELETE FROM {table} WHERE ID = ?"
+
+
+def _rows(objs: Sequence[Any], table_of: Callable[[Any], str], drop_none_id: bool) -> tuple:
+    """Convierte los objetos del lote en (tabla, columnas, filas de valores, IDs)."""
+    table, columns, params, ids = None, None, [], []
+    for index, obj in enumerate(objs):
+        data = obj.to_dict()
+        if drop_none_id and "ID" in data and data["ID"] is None:
+            del data["ID"]
+        if table is None:
+            table, columns = table_of(obj), tuple(data.keys())
+        elif table_of(obj) != table or tuple(data.keys()) != columns:
+            raise ValueError(f"El registro {index} no pertenece a la misma tabla o tiene columnas distintas al resto del lote.")
+        params.append(data)
+        ids.append(data.get("ID"))
+    return table, columns, params, ids
+
+
+def insert_batch(objs: Sequence[Any], table_of: Callable[[Any], str]) -> tuple:
+    """SQL cacheado y parámetros para insertar `objs` con una sola sentencia preparada."""
+    table, columns, rows, ids = _rows(objs, table_of, drop_none_id=True)
+    return insert_sql(table, columns), [tuple(row[c] for c in columns) for row in rows], ids
+
+
+def update_batch(objs: Sequence[Any], table_of: Callable[[Any], str]) -> tuple:
+    """SQL cacheado y parámetros para actualizar `objs` por ID."""
+    table, columns, rows, ids = _rows(objs, table_of, drop_none_id=False)
+    if any(value is None for value in ids) or "ID" not in columns:
+        raise ValueError("Todos los registros deben tener un campo 'ID' válido para ser actualizados.")
+    values = [c for c in columns if c != "ID"]
+    return update_sql(table, columns), [tuple(row[c] for c in values) + (row["ID"],) for row in rows], ids
+
+
+def execute_in_chunks(
+    sql: str,
+    params: List[tuple],
+    ids: List[Any],
+    chunk_size: int,
+    executemany: Callable[[str, List[tuple]], None],
+    execute: Callable[[str, tuple], None],
+    commit: Callable[[], None],
+    rollback: Callable[[], None],
+    strict: bool = False,
+    missing: Optional[Callable[[List[Any]], Set[Any]]] = None,
+) -> dict:
+    """
+    Ejecuta `sql` para todas las filas de `params` en lotes de `chunk_size`, con un
+    commit por lote. Si un lote falla se revierte y se reintenta fila por fila para
+    identificar qué registros fallaron; el resultado incluye un error por cada uno.
+    Con `strict` (p. ej. dentro de una unidad de trabajo) el primer error se propaga.
+
+    `missing` recibe los IDs de un lote y devuelve los que no existen en la tabla
+    (para UPDATE, que no falla si no encuentra la fila): esos registros no se
+    ejecutan y quedan como errores con `"missing": True`.
+    """
+    result = {"total": len(params), "succeeded": 0, "failed": 0, "errors": []}
+    for start in range(0, len(params), chunk_size):
+        positions = range(start, min(start + chunk_size, len(params)))
+        if missing is not None:
+            absent = missing([ids[i] for i in positions])
+            if absent and strict:
+                raise ValueError(f"No se encontraron registros con ID {', '.join(str(i) for i in absent)}.")
+            for i in positions:
+                if ids[i] in absent:
+                    result["failed"] += 1
+                    result["errors"].append({"index": i, "ID": ids[i], "error": f"No se encontró un registro con ID = {ids[i]}.", "missing": True})
+            positions = [i for i in positions if ids[i] not in absent]
+            if not positions:
+                continue
+        chunk = [params[i] for i in positions]
+        try:
+            executemany(sql, chunk)
+            commit()
+            result["succeeded"] += len(chunk)
+            continue
+        except Exception as e:
+            rollback()
+            if strict:
+                raise ValueError(f"Error en la operación por lotes: {e}")
+            logger.warning(f"Lote {start}-{positions[-1]} falló ({e}); reintentando fila por fila.")
+        for i in positions:
+            try:
+                execute(sql, params[i])
+                commit()
+                result["succeeded"] += 1
+            except Exception as e:
+                rollback()
+                result["failed"] += 1
+                result["errors"].append({"index": i, "ID": ids[i], "error": str(e)})
+    result["errors"].sort(key=lambda error: error["index"])
+    return result
+
+
+def succeeded_items(items: Sequence[Any], result: dict) -> List[Any]:
+    """Elementos de `items` que no aparecen en `result["errors"]`."""
+    failed = {error["index"] for error in result["errors"]}
+    return [item for index, item in enumerate(items) if index not in failed]
@@ -3,9 +3,9 @@ class CardUser(Card):
     def __init__(self, id_card: int, card_type: str, balance: float, user_id: int):
         super().__init__(id_card, card_type, balance)
         self.user_id = user_id
-    def use_card(self):
-        if self.balance >= 3000: 
-            self.balance -= 3000
+    def use_card(self, fare: float = 3000):
+        if self.balance >= fare: 
+            self.balance -= fare
             print(f"Card {self.id_card} used by user {self.user_id}. Remaining balance: {self.balance}")
             return True
         else:
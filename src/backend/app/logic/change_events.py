@@ -0,0 +1,88 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+# La tabla cambió de forma no detallada (vaciado, borrado de la tabla): hay que recargarla
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """
+    Cambio confirmado en una tabla.
+
+    `data` trae la fila nueva (o la borrada, en `delete`) y `previous` la clave
+    anterior cuando una actualización cambia la llave, como en `update_ruta_parada`.
+    """
+
+    table: str
+    action: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    previous: Optional[Dict[str, Any]] = None
+
+
+Listener = Callable[[ChangeEvent], None]
+
+
+class ChangeBus:
+    """
+    Publica los cambios que hacen los controladores a quienes mantienen estado
+    derivado en memoria (grafo de rutas, índices, vistas).
+
+    Los oyentes se llaman de forma síncrona en el hilo que hizo la escritura, así
+    que deben ser rápidos; un error en un oyente se registra y no afecta la escritura.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[Optional[str], List[Listener]] = {}
+        self._lock = threading.Lock()
+        self._published = 0
+
+    @staticmethod
+    def _key(table: Optional[str]) -> Optional[str]:
+        return table.lower() if table else None
+
+    def subscribe(self, listener: Listener, tables: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        Registra `listener` para los cambios de `tables` (todas si es None) y devuelve
+        la función que lo da de baja.
+        """
+        keys = [self._key(t) for t in tables] if tables else [None]
+        with self._lock:
+            for key in keys:
+                self._listeners.setdefault(key, []).append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                for key in keys:
+                    listeners = self._listeners.get(key, [])
+                    if listener in listeners:
+                        listeners.remove(listener)
+
+        return unsubscribe
+
+    def publish(self, event: ChangeEvent) -> None:
+        with self._lock:
+            self._published += 1
+            listeners = list(self._listeners.get(self._key(event.table), ())) + list(self._listeners.get(None, ()))
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Error al procesar el cambio {event.action} en {event.table}: {e}")
+
+    def emit(self, table: str, action: str, data: Optional[dict] = None, previous: Optional[dict] = None) -> None:
+        self.publish(ChangeEvent(table, action, dict(data or {}), previous))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "published": self._published,
+                "listeners": sum(len(listeners) for listeners in self._listeners.values()),
+            }
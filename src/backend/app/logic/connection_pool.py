@@ -0,0 +1,208 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(RuntimeError):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera."""
+
+
+class _PooledConnection:
+    """Conexión física junto con su información de ciclo de vida."""
+
+    __slots__ = ("raw", "created_at", "last_used_at")
+
+    def __init__(self, raw: Any):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones DB-API.
+
+    Cada petición (o unidad de trabajo) toma una conexión con `connection()` y la
+    devuelve al salir. Las conexiones que superan `recycle_seconds` se cierran y se
+    reemplazan, y las que llevan más de `health_check_after` segundos inactivas se
+    validan con `health_check_query` antes de entregarse.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 10,
+        timeout: float = 30.0,
+        recycle_seconds: float = 1800.0,
+        health_check_after: float = 30.0,
+        health_check_query: str = "SELECT 1",
+    ):
+        if size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1.")
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.health_check_after = health_check_after
+        self.health_check_query = health_check_query
+
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._waited_checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recycled = 0
+        self._health_check_failures = 0
+
+    @contextmanager
+    def connection(self):
+        """Entrega una conexión del pool y la devuelve al terminar el bloque."""
+        pooled = self._checkout()
+        try:
+            yield pooled.raw
+        finally:
+            # Rollback en cada devolución: si el bloque no hizo commit (un error o solo
+            # lecturas), la transacción implícita no queda abierta con sus bloqueos
+            # mientras la conexión espera en el pool. Después de un commit no hace nada.
+            self._checkin(pooled, broken=not self._rollback(pooled))
+
+    def _checkout(self) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado.")
+
+        started = time.monotonic()
+        waited = not self._slots.acquire(blocking=False)
+        if waited and not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(
+                f"No hay conexiones disponibles después de {self.timeout} segundos "
+                f"(pool saturado con {self.size} conexiones)."
+            )
+        wait = time.monotonic() - started
+
+        try:
+            pooled = self._acquire_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            if waited:
+                self._waited_checkouts += 1
+        return pooled
+
+    def _acquire_healthy(self) -> _PooledConnection:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            now = time.monotonic()
+            if now - pooled.created_at >= self.recycle_seconds:
+                with self._lock:
+                    self._recycled += 1
+                self._discard(pooled)
+                continue
+            if now - pooled.last_used_at >= self.health_check_after and not self._is_healthy(pooled):
+                with self._lock:
+                    self._health_check_failures += 1
+                self._discard(pooled)
+                continue
+            return pooled
+
+    def _connect(self) -> _PooledConnection:
+        pooled = _PooledConnection(self._factory())
+        with self._lock:
+            self._created += 1
+        return pooled
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        try:
+            cursor = pooled.raw.cursor()
+            try:
+                cursor.execute(self.health_check_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexión descartada por fallo en el health check: {e}")
+            return False
+
+    def _rollback(self, pooled: _PooledConnection) -> bool:
+        try:
+            pooled.raw.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo hacer rollback de la conexión: {e}")
+            return False
+
+    def _checkin(self, pooled: _PooledConnection, broken: bool = False) -> None:
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if broken or self._closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used_at = time.monotonic()
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _discard(pooled: _PooledConnection) -> None:
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Cierra las conexiones inactivas; las que estén en uso se cierran al devolverse."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def metrics(self) -> dict:
+        """Métricas de uso: tiempos de espera, saturación y reciclaje."""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "peak_in_use": self._peak_in_use,
+                "saturation": self._in_use / self.size,
+                "connections_created": self._created,
+                "checkouts": checkouts,
+                "waited_checkouts": self._waited_checkouts,
+                "timeouts": self._timeouts,
+                "total_wait_seconds": self._total_wait,
+                "avg_wait_seconds": self._total_wait / checkouts if checkouts else 0.0,
+                "max_wait_seconds": self._max_wait,
+                "recycled": self._recycled,
+                "health_check_failures": self._health_check_failures,
+            }
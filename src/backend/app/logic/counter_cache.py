@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[str, str]
+
+
+class _Counter:
+    __slots__ = ("value", "loaded_at", "loader", "hits", "misses", "adjustments")
+
+    def __init__(self):
+        self.value: Optional[int] = None
+        self.loaded_at = 0.0
+        self.loader: Optional[Callable[[], int]] = None
+        self.hits = 0
+        self.misses = 0
+        self.adjustments = 0
+
+
+class CounterCache:
+    """
+    Caché de conteos (`SELECT COUNT(*) FROM tabla [condición]`) con TTL.
+
+    Las escrituras del controlador la mantienen al día: `adjust(tabla, delta)`
+    suma al conteo total de la tabla y descarta los conteos con condición, que no
+    se pueden recalcular sin consultar. Un hilo opcional recarga los conteos antes
+    de que venzan para que las lecturas no esperen a la base de datos. Las
+    escrituras hechas por otros procesos solo se ven al vencer el TTL.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._counters: Dict[CounterKey, _Counter] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    @staticmethod
+    def key(table: str, condition: str = "") -> CounterKey:
+        return table.lower(), " ".join(condition.split())
+
+    def _entry(self, key: CounterKey) -> _Counter:
+        entry = self._counters.get(key)
+        if entry is None:
+            entry = self._counters[key] = _Counter()
+        return entry
+
+    def _fresh(self, entry: _Counter, now: float) -> bool:
+        return entry.value is not None and now - entry.loaded_at < self.ttl
+
+    def lookup(self, table: str, condition: str = "") -> Optional[int]:
+        """Conteo en caché si no venció (cuenta un acierto) o None (cuenta un fallo)."""
+        with self._lock:
+            entry = self._entry(self.key(table, condition))
+            if self._fresh(entry, time.monotonic()):
+                entry.hits += 1
+                return entry.value
+            entry.misses += 1
+            return None
+
+    def store(self, table: str, condition: str, value: int, loader: Optional[Callable[[], int]] = None) -> None:
+        """Guarda un conteo recién leído; `loader` permite que el hilo de fondo lo recargue."""
+        with self._lock:
+            entry = self._entry(self.key(table, condition))
+            entry.value = int(value)
+            entry.loaded_at = time.monotonic()
+            if loader is not None:
+                entry.loader = loader
+
+    def get(self, table: str, condition: str, loader: Callable[[], int]) -> int:
+        """Devuelve el conteo desde la caché o lo carga con `loader`."""
+        value = self.lookup(table, condition)
+        if value is None:
+            value = loader()
+            self.store(table, condition, value, loader)
+        return value
+
+    def adjust(self, table: str, delta: int) -> None:
+        """Aplica una escritura: suma `delta` al total de la tabla y descarta sus conteos con condición."""
+        table = table.lower()
+        with self._lock:
+            for (name, condition), entry in self._counters.items():
+                if name != table or entry.value is None:
+                    continue
+                if condition:
+                    entry.value = None
+                else:
+                    entry.value += delta
+                    entry.adjustments += 1
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Descarta los conteos de una tabla (o todos) para que se lean de nuevo."""
+        with self._lock:
+            for (name, _), entry in self._counters.items():
+                if table is None or name == table.lower():
+                    entry.value = None
+
+    def refresh_due(self, margin: float = 0.0) -> int:
+        """Recarga los conteos con loader que vencen dentro de `margin` segundos. Devuelve cuántos."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                (key, entry.loader) for key, entry in self._counters.items()
+                if entry.loader is not None and (entry.value is None or now - entry.loaded_at >= self.ttl - margin)
+            ]
+        refreshed = 0
+        for (table, condition), loader in due:
+            try:
+                self.store(table, condition, loader())
+                refreshed += 1
+            except Exception as e:
+                logger.warning(f"No se pudo recargar el conteo de {table} {condition}: {e}")
+        return refreshed
+
+    def start_refresher(self, interval: float) -> None:
+        """Inicia el hilo que recarga los conteos cada `interval` segundos."""
+        if interval <= 0 or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.refresh_due(margin=interval)
+
+        self._refresher = threading.Thread(target=run, name="counter-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def stats(self) -> dict:
+        """Aciertos, fallos y antigüedad de cada conteo."""
+        now = time.monotonic()
+        with self._lock:
+            counters = {}
+            for (table, condition), entry in self._counters.items():
+                counters[f"{table} {condition}".strip()] = {
+                    "value": entry.value,
+                    "age_seconds": now - entry.loaded_at if entry.value is not None else None,
+                    "hits": entry.hits,
+                    "misses": entry.misses,
+                    "adjustments": entry.adjustments,
+                }
+            hits = sum(c["hits"] for c in counters.values())
+            misses = sum(c["misses"] for c in counters.values())
+            return {
+                "ttl_seconds": self.ttl,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+                "refresher_running": self._refresher is not None and self._refresher.is_alive(),
+                "counters": counters,
+            }
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardProvider:
+    """
+    Obtiene los datos de `/login/dashboard` con dos consultas por lotes en lugar de
+    una por indicador: los contadores globales (iguales para todos los usuarios) y
+    los campos del usuario. Ambas partes se piden en paralelo y se mide el tiempo
+    de cada una.
+    """
+
+    @staticmethod
+    async def _timed(name: str, timings: Dict[str, float], call: Awaitable) -> Any:
+        started = time.perf_counter()
+        try:
+            return await call
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+
+    async def load(self, db: Any, user_id: int) -> Tuple[dict, Dict[str, float]]:
+        """
+        Devuelve los campos del dashboard (con las llaves que espera el frontend) y
+        los milisegundos de cada parte (`globals`, `user`).
+        """
+        timings: Dict[str, float] = {}
+        globales, usuario = await asyncio.gather(
+            self._timed("globals", timings, db.dashboard_globals()),
+            self._timed("user", timings, db.dashboard_user(user_id)),
+        )
+        data = {
+            "total_vehiculos": globales["total_unidades"],
+            "total_passanger": globales["total_pasajeros"],
+            "total_operative": globales["total_operarios"],
+            "total_supervisors": globales["total_supervisores"],
+            "type_card": usuario["type_card"],
+            "buses_mantenimiento": globales["total_unidades"],
+            "registros_mantenimiento": globales["total_mantenimiento"],
+            "proximo_mantenimiento": globales["proximos_mantenimientos"],
+            "ultimo_uso_tarjeta": usuario["last_card_used"],
+            "turno": usuario["turno"],
+            "Saldo": usuario["saldo"],
+        }
+        return data, timings
+
+    @staticmethod
+    def server_timing(timings: Dict[str, float]) -> str:
+        """Valor del encabezado `Server-Timing` para los tiempos medidos."""
+        return ", ".join(f"dashboard-{name};dur={ms:.1f}" for name, ms in timings.items())
+
+
+dashboard_provider = DashboardProvider()
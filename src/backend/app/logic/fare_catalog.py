@@ -0,0 +1,185 @@
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from backend.app.core.config import settings
+from backend.app.logic.change_events import ChangeEvent
+from backend.app.models.price import PriceCreate
+from backend.app.models.type_card import TypeCardCreate
+from backend.app.models.type_transport import TypeTransportCreate
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLES = (
+    PriceCreate.__entity_name__,
+    TypeTransportCreate.__entity_name__,
+    TypeCardCreate.__entity_name__,
+)
+
+
+def lookup(ids: np.ndarray, values: np.ndarray, keys: Any, missing: Any) -> np.ndarray:
+    """`values[i]` de cada llave en `ids` (ordenados), o `missing` si la llave no está."""
+    keys = np.asarray(keys, dtype=np.int64)
+    out = np.full(keys.shape, missing, dtype=values.dtype)
+    if len(ids) == 0:
+        return out
+    pos = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    found = ids[pos] == keys
+    out[found] = values[pos[found]]
+    return out
+
+
+def _column(taps: Any, name: str) -> Optional[np.ndarray]:
+    names = taps.dtype.names if isinstance(taps, np.ndarray) else taps.keys()
+    return np.asarray(taps[name]) if name in (names or ()) else None
+
+
+class FareTables:
+    """
+    Tablas de tarifas armadas desde `Precio`, `TipoTransporte` y `TipoTarjeta`.
+
+    Los IDs de cada tabla quedan ordenados en arreglos de NumPy para buscarlos con
+    `searchsorted`, y `fares` es la matriz (tipo de transporte × tipo de tarjeta)
+    con el precio vigente de cada tipo de transporte (la fila de `Precio` con mayor
+    ID) por el factor del tipo de tarjeta. `TipoTarjeta` no guarda descuentos: el
+    factor de cada tipo sale de `FARE_CARD_TYPE_FACTORS` y vale 1 si no está.
+    """
+
+    def __init__(self, version: int, precios: list, tipos_transporte: list, tipos_tarjeta: list,
+                 factors: Mapping[int, float]):
+        self.version = version
+        precios = sorted(precios, key=lambda precio: precio["ID"])
+        self.price_ids = np.array([precio["ID"] for precio in precios], dtype=np.int64)
+        self.price_amounts = np.array([precio["Monto"] for precio in precios], dtype=np.float64)
+        self.price_transport = np.array([precio["IDTipoTransporte"] for precio in precios], dtype=np.int64)
+
+        self.transport_ids = np.union1d(
+            np.array([tipo["ID"] for tipo in tipos_transporte], dtype=np.int64), self.price_transport
+        )
+        # Precio vigente por tipo de transporte: la primera aparición al recorrer de mayor a menor ID
+        types, latest = np.unique(self.price_transport[::-1], return_index=True)
+        self.base = np.full(len(self.transport_ids), np.nan)
+        self.base[np.searchsorted(self.transport_ids, types)] = self.price_amounts[::-1][latest]
+
+        self.card_type_ids = np.unique(np.array([tipo["ID"] for tipo in tipos_tarjeta], dtype=np.int64))
+        self.card_factors = np.array([factors.get(int(t), 1.0) for t in self.card_type_ids], dtype=np.float64)
+        self.fares = np.outer(self.base, self.card_factors)
+
+    def compute_fares(self, taps: Any) -> np.ndarray:
+        """
+        Tarifa de cada tap. `taps` es un mapeo de columnas (o un arreglo estructurado)
+        con `IDPrecio` o `IDTipoTransporte` y, opcionalmente, `IDTipoTarjeta`. Devuelve
+        un arreglo de float con NaN donde el precio, el tipo de transporte o el tipo
+        de tarjeta no existen.
+        """
+        price_ids = _column(taps, "IDPrecio")
+        card_types = _column(taps, "IDTipoTarjeta")
+        if price_ids is not None:
+            fares = lookup(self.price_ids, self.price_amounts, price_ids, np.nan)
+            if card_types is not None:
+                fares *= lookup(self.card_type_ids, self.card_factors, card_types, np.nan)
+            return fares
+        transport_types = _column(taps, "IDTipoTransporte")
+        if transport_types is None:
+            raise ValueError("Los taps deben traer IDPrecio o IDTipoTransporte.")
+        rows = lookup(self.transport_ids, np.arange(len(self.transport_ids)), transport_types, -1)
+        if card_types is None:
+            return np.where(rows >= 0, self.base[rows], np.nan)
+        cols = lookup(self.card_type_ids, np.arange(len(self.card_type_ids)), card_types, -1)
+        known = (rows >= 0) & (cols >= 0)
+        fares = np.full(rows.shape, np.nan)
+        fares[known] = self.fares[rows[known], cols[known]]
+        return fares
+
+    def __len__(self) -> int:
+        return len(self.price_ids)
+
+
+class FareCatalog:
+    """
+    Catálogo de tarifas en memoria para cobros masivos, liquidación y simulaciones.
+
+    Las tablas se arman en la primera consulta y cualquier cambio en `Precio`,
+    `TipoTransporte` o `TipoTarjeta` publicado por el controlador (por ejemplo desde
+    `price_cud_service`) sube `version` y las descarta; la siguiente consulta las
+    vuelve a armar. `compute_fares` tarifa millones de taps sin llamadas por fila.
+    """
+
+    def __init__(self, controller: Any, factors: Optional[Mapping[int, float]] = None):
+        self.controller = controller
+        self.factors: Dict[int, float] = dict(settings.FARE_CARD_TYPE_FACTORS if factors is None else factors)
+        self.version = 0
+        self._tables: Optional[FareTables] = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._builds = 0
+        self._taps = 0
+        events = getattr(controller, "events", None)
+        if events is not None:
+            events.subscribe(self.on_change, tables=CATALOG_TABLES)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        with self._lock:
+            self.version += 1
+            self._tables = None
+
+    def tables(self) -> FareTables:
+        """Tablas vigentes, armándolas si algún cambio las descartó."""
+        tables = self._tables
+        if tables is not None:
+            return tables
+        with self._build_lock:
+            tables = self._tables
+            if tables is not None:
+                return tables
+            version = self.version
+            tables = FareTables(
+                version,
+                self.controller.read_all(PriceCreate),
+                self.controller.read_all(TypeTransportCreate),
+                self.controller.read_all(TypeCardCreate),
+                self.factors,
+            )
+            with self._lock:
+                self._builds += 1
+                # Si algo cambió durante la lectura, estas tablas se usan una vez y no se guardan
+                if self.version == version:
+                    self._tables = tables
+            logger.info(f"Catálogo de tarifas armado (versión {version}): {len(tables)} precios")
+            return tables
+
+    def compute_fares(self, taps: Any) -> np.ndarray:
+        """Tarifa de cada tap con las tablas vigentes (ver `FareTables.compute_fares`)."""
+        fares = self.tables().compute_fares(taps)
+        with self._lock:
+            self._taps += len(fares)
+        return fares
+
+    def stats(self) -> dict:
+        with self._lock:
+            tables = self._tables
+            return {
+                "version": self.version,
+                "loaded": tables is not None,
+                "prices": len(tables.price_ids) if tables is not None else None,
+                "transport_types": len(tables.transport_ids) if tables is not None else None,
+                "card_types": len(tables.card_type_ids) if tables is not None else None,
+                "builds": self._builds,
+                "taps_priced": self._taps,
+            }
+
+
+_catalogs: "weakref.WeakKeyDictionary[Any, FareCatalog]" = weakref.WeakKeyDictionary()
+_catalogs_lock = threading.Lock()
+
+
+def fare_catalog_for(controller: Any) -> FareCatalog:
+    """Devuelve el catálogo de tarifas del proceso para `controller`."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(controller)
+        if catalog is None:
+            catalog = _catalogs[controller] = FareCatalog(controller)
+        return catalog
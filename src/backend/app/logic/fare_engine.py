@@ -0,0 +1,133 @@
+import logging
+import threading
+import weakref
+from typing import Any, Iterable, List, Optional, Tuple
+
+from backend.app.core.config import settings
+from backend.app.logic.id_allocator import id_allocator_for
+from backend.app.logic.vehicle_positions import parse_unit_id
+from backend.app.models.movement import MovementCreate
+from backend.app.models.payments import Payment
+
+logger = logging.getLogger(__name__)
+
+CHARGED = "charged"
+INSUFFICIENT_FUNDS = "insufficient_funds"
+CARD_NOT_FOUND = "card_not_found"
+PRICE_NOT_FOUND = "price_not_found"
+INVALID = "invalid"
+DUPLICATE = "duplicate"
+ERROR = "error"
+
+# Taps ya procesados (IDTap -> resultado en JSON), para no cobrar dos veces un reintento
+TAP_TABLE = "TapProcesado"
+
+
+def parse_tap(item: Any) -> Tuple[int, int, str, Optional[str]]:
+    """
+    Valida un tap `{"IDTarjeta", "IDPrecio", "IDUnidad"?, "IDTap"?}` y devuelve
+    (IDTarjeta, IDPrecio, IDUnidad, IDTap). Lanza ValueError si no es válido.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Cada tap debe ser un objeto.")
+    try:
+        card_id, price_id = int(item["IDTarjeta"]), int(item["IDPrecio"])
+    except KeyError as e:
+        raise ValueError(f"Falta el campo {e.args[0]!r}.")
+    # Un IDUnidad inválido se rechaza: reescribirlo cobraría el pasaje a otra unidad
+    unit_id = parse_unit_id(item.get("IDUnidad") or "EMPTY")
+    tap_id = item.get("IDTap")
+    if tap_id is not None:
+        tap_id = str(tap_id)
+        if not 0 < len(tap_id) <= 64:
+            raise ValueError("IDTap debe tener entre 1 y 64 caracteres.")
+    return card_id, price_id, unit_id, tap_id
+
+
+def summarize(results: List[dict]) -> dict:
+    """Resumen de un lote: `total`, `charged`, `duplicate`, `rejected`, `failed` y los resultados."""
+    summary = {"total": len(results), "charged": 0, "duplicate": 0, "rejected": 0, "failed": 0, "results": results}
+    for result in results:
+        if result.get(DUPLICATE):
+            summary["duplicate"] += 1
+        elif result["status"] == CHARGED:
+            summary["charged"] += 1
+        elif result["status"] in (INVALID, ERROR):
+            summary["failed"] += 1
+        else:
+            summary["rejected"] += 1
+    return summary
+
+
+class FareEngine:
+    """
+    Cobro atómico de pasajes.
+
+    Cada tap lee el monto de `Precio`, descuenta el saldo de la tarjeta solo si
+    alcanza (`UPDATE ... WHERE Saldo >= ?`, sin leer y escribir por separado) e
+    inserta su `Movimiento` y su `Pago`; todo el lote va en una transacción del
+    controlador (`charge_fares`). Los IDs de Movimiento y Pago salen del
+    `IdAllocator`, así que no hace falta consultarlos antes de insertar.
+
+    Un tap con `IDTap` se cobra una sola vez: el controlador guarda su resultado
+    en `TAP_TABLE` dentro de la misma transacción y un reintento recibe ese
+    resultado con `duplicate: true`.
+    """
+
+    def __init__(self, controller: Any, allocator: Any = None, movement_type: Optional[int] = None):
+        self.controller = controller
+        self.allocator = allocator or id_allocator_for(controller)
+        self.movement_type = settings.FARE_MOVEMENT_TYPE if movement_type is None else movement_type
+        self._lock = threading.Lock()
+        self._counts = {
+            CHARGED: 0, INSUFFICIENT_FUNDS: 0, CARD_NOT_FOUND: 0, PRICE_NOT_FOUND: 0, INVALID: 0, DUPLICATE: 0,
+        }
+
+    def charge_many(self, taps: Iterable[Any]) -> dict:
+        """
+        Cobra un lote de taps (ver `parse_tap`); uno inválido o rechazado no frena el
+        resto. Devuelve el resumen del lote (ver `summarize`).
+        """
+        results, charges, indexes = [], [], []
+        for index, item in enumerate(taps):
+            try:
+                card_id, price_id, unit_id, tap_id = parse_tap(item)
+            except (TypeError, ValueError) as e:
+                results.append({"index": index, "status": INVALID, "error": str(e)})
+                continue
+            movement_id = self.allocator.next_id(MovementCreate)
+            payment_id = self.allocator.next_id(Payment)
+            charges.append((card_id, price_id, unit_id, movement_id, payment_id, tap_id))
+            indexes.append(index)
+            results.append(None)
+        outcomes = self.controller.charge_fares(charges, self.movement_type)
+        for index, charge, outcome in zip(indexes, charges, outcomes):
+            result = {"index": index, "IDTarjeta": charge[0], **outcome}
+            if charge[5] is not None:
+                result["IDTap"] = charge[5]
+            results[index] = result
+        with self._lock:
+            for result in results:
+                self._counts[DUPLICATE if result.get(DUPLICATE) else result["status"]] += 1
+        return summarize(results)
+
+    def charge(self, card_id: int, price_id: int, unit_id: str = "EMPTY") -> dict:
+        """Cobra un tap y devuelve su resultado."""
+        return self.charge_many([{"IDTarjeta": card_id, "IDPrecio": price_id, "IDUnidad": unit_id}])["results"][0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+_engines: "weakref.WeakKeyDictionary[Any, FareEngine]" = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def fare_engine_for(controller: Any) -> FareEngine:
+    """Devuelve el motor de cobro del proceso para `controller`."""
+    with _engines_lock:
+        engine = _engines.get(controller)
+        if engine is None:
+            engine = _engines[controller] = FareEngine(controller)
+        return engine
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import as_async
+from backend.app.logic.change_events import DELETE, RESET, ChangeEvent
+from backend.app.logic.vehicle_positions import position_store_for
+from backend.app.models.routes import Ruta
+from backend.app.models.transport import UnidadTransporte
+from backend.app.models.type_transport import TypeTransportCreate
+
+logger = logging.getLogger(__name__)
+
+FLEET_TABLES = (UnidadTransporte.__entity_name__, Ruta.__entity_name__, TypeTransportCreate.__entity_name__)
+
+
+class FleetBroadcaster:
+    """
+    Estado de la flota en vivo compartido por todos los clientes del proceso.
+
+    Las unidades (con los nombres de su ruta y tipo de transporte y su última
+    posición) se leen una sola vez y luego se mantienen con los cambios del
+    controlador y los reportes de `VehiclePositionStore`. Cada cambio marca la
+    unidad con una versión nueva; cada cliente recuerda la última versión que
+    recibió y, como mucho una vez cada `FLEET_FEED_INTERVAL` segundos, recibe las
+    unidades que cambiaron desde entonces (una entrada por unidad). Un cliente
+    lento no acumula mensajes: en el siguiente envío recibe el estado más
+    reciente, así que lo pendiente por cliente nunca supera el tamaño de la flota.
+    Los clientes que se quedan atrás de lo que se puede armar como delta reciben
+    un snapshot completo.
+    """
+
+    def __init__(self, controller: Any, positions: Any = None, interval: Optional[float] = None,
+                 heartbeat: Optional[float] = None):
+        self.controller = controller
+        self.positions = positions if positions is not None else position_store_for(controller)
+        self.interval = settings.FLEET_FEED_INTERVAL if interval is None else interval
+        self.heartbeat = heartbeat or settings.FLEET_FEED_HEARTBEAT
+        self.units: Optional[Dict[Any, dict]] = None
+        self.routes: Dict[Any, str] = {}
+        self.types: Dict[Any, str] = {}
+        self.version = 0
+        # Versión más vieja desde la que se puede armar un delta; antes de ella hay que mandar snapshot
+        self.horizon = 0
+        # Unidad -> versión de su último cambio, de la más vieja a la más nueva (incluye las eliminadas)
+        self._changes: "OrderedDict[Any, int]" = OrderedDict()
+        # Mensajes ya armados para la versión actual, por versión de origen
+        self._messages: Dict[Optional[int], dict] = {}
+        self._messages_version = 0
+        self._pending: Optional[List[ChangeEvent]] = None
+        self._lock = threading.Lock()
+        self._load_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        # Evento que despierta a los clientes de cada loop, y loops con un despertar ya programado
+        self._ticks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Event]" = weakref.WeakKeyDictionary()
+        self._scheduled: Set[asyncio.AbstractEventLoop] = set()
+        self._clients = 0
+        self._loads = 0
+        self._sent = 0
+        events = getattr(controller, "events", None)
+        if events is not None:
+            events.subscribe(self.on_change, tables=FLEET_TABLES)
+        self.positions.subscribe(self.on_position)
+
+    def _load_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._load_locks.get(loop)
+            if lock is None:
+                lock = self._load_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def load(self) -> None:
+        """Lee las unidades y los nombres de rutas y tipos, una sola vez para todos los clientes."""
+        if self.units is not None:
+            return
+        async with self._load_lock():
+            if self.units is not None:
+                return
+            with self._lock:
+                self._pending = []
+            db = as_async(self.controller)
+            try:
+                # Lecturas en serie: el controlador SQLite síncrono comparte un solo cursor
+                unidades = await db.read_all(UnidadTransporte)
+                rutas = await db.read_all(Ruta)
+                tipos = await db.read_all(TypeTransportCreate)
+            finally:
+                with self._lock:
+                    pending, self._pending = self._pending, None
+            with self._lock:
+                self.routes = {ruta["ID"]: ruta["Nombre"] for ruta in rutas}
+                self.types = {tipo["ID"]: tipo["TipoTransporte"] for tipo in tipos}
+                self.units = {}
+                for unidad in unidades:
+                    self.units[unidad["ID"]] = self._row(unidad)
+                self._loads += 1
+                self._reset_changes()
+                for event in pending:
+                    if self.units is None:
+                        break
+                    self._apply(event)
+            logger.info(f"Flota en vivo cargada: {len(unidades)} unidades")
+
+    def _row(self, data: dict) -> dict:
+        row = {
+            **data,
+            "NombreRuta": self.routes.get(data.get("IDRuta")),
+            "NombreTipoTransporte": self.types.get(data.get("IDTipo")),
+        }
+        position = self.positions.latest(data["ID"])
+        if position is not None:
+            row.update({key: position[key] for key in ("Ubicacion", "lat", "lon", "timestamp")})
+        return row
+
+    def _reset_changes(self) -> None:
+        self.version += 1
+        self.horizon = self.version
+        self._changes.clear()
+        self._schedule()
+
+    def _touch(self, unit_id: Any) -> None:
+        self.version += 1
+        self._changes[unit_id] = self.version
+        self._changes.move_to_end(unit_id)
+        if len(self._changes) - len(self.units) > settings.FLEET_MAX_TOMBSTONES:
+            # Demasiadas unidades eliminadas en el registro: se olvidan y los clientes atrasados reciben snapshot
+            for key in [key for key in self._changes if key not in self.units]:
+                del self._changes[key]
+            self.horizon = self.version
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Programa un despertar de los clientes de cada loop, si no hay uno pendiente."""
+        for loop in list(self._ticks):
+            if loop in self._scheduled:
+                continue
+            try:
+                loop.call_soon_threadsafe(loop.call_later, self.interval, self._fire, loop)
+                self._scheduled.add(loop)
+            except RuntimeError:
+                # Loop cerrado
+                self._ticks.pop(loop, None)
+
+    def _fire(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._lock:
+            self._scheduled.discard(loop)
+            event = self._ticks.get(loop)
+            self._ticks[loop] = asyncio.Event()
+        if event is not None:
+            event.set()
+
+    def on_change(self, event: ChangeEvent) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            if self.units is not None:
+                self._apply(event)
+
+    def _apply(self, event: ChangeEvent) -> None:
+        table, data = event.table.lower(), event.data
+        if event.action == RESET:
+            self.units = None
+            self._reset_changes()
+            return
+        key = data.get("ID")
+        if key is None:
+            return
+        if table == UnidadTransporte.__entity_name__.lower():
+            if event.action == DELETE:
+                if self.units.pop(key, None) is not None:
+                    self._touch(key)
+                return
+            self.units[key] = self._row({**self.units.get(key, {}), **data})
+            self._touch(key)
+            return
+        if table == Ruta.__entity_name__.lower():
+            names, field, column = self.routes, "IDRuta", "Nombre"
+        else:
+            names, field, column = self.types, "IDTipo", "TipoTransporte"
+        if event.action == DELETE:
+            names.pop(key, None)
+        elif column in data:
+            names[key] = data[column]
+        for unit_id, row in list(self.units.items()):
+            if row.get(field) == key:
+                self.units[unit_id] = self._row(row)
+                self._touch(unit_id)
+
+    def on_position(self, position: dict) -> None:
+        with self._lock:
+            if self.units is None or position["ID"] not in self.units:
+                return
+            self.units[position["ID"]] = {**self.units[position["ID"]], **position}
+            self._touch(position["ID"])
+
+    def _message_since(self, seen: Optional[int]) -> Optional[dict]:
+        """Snapshot o delta para un cliente que ya recibió la versión `seen` (None si está al día)."""
+        if seen == self.version:
+            return None
+        if seen is not None and seen < self.horizon:
+            seen = None
+        if self._messages_version != self.version:
+            self._messages, self._messages_version = {}, self.version
+        message = self._messages.get(seen)
+        if message is not None:
+            return message
+        if seen is None:
+            message = {"type": "snapshot", "version": self.version, "data": list(self.units.values())}
+        else:
+            updated, removed = [], []
+            for unit_id, version in reversed(self._changes.items()):
+                if version <= seen:
+                    break
+                if unit_id in self.units:
+                    updated.append(self.units[unit_id])
+                else:
+                    removed.append(unit_id)
+            message = {"type": "delta", "version": self.version, "updated": updated, "removed": removed}
+        self._messages[seen] = message
+        return message
+
+    async def feed(self) -> AsyncIterator[dict]:
+        """
+        Mensajes para un cliente: primero un snapshot, luego deltas. Si no hay cambios
+        en `FLEET_FEED_HEARTBEAT` segundos entrega `{"type": "heartbeat"}`.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._clients += 1
+        seen: Optional[int] = None
+        try:
+            while True:
+                if self.units is None:
+                    await self.load()
+                with self._lock:
+                    tick = self._ticks.get(loop)
+                    if tick is None:
+                        tick = self._ticks[loop] = asyncio.Event()
+                    message = self._message_since(seen) if self.units is not None else None
+                    if message is not None:
+                        self._sent += 1
+                if message is not None:
+                    seen = message["version"]
+                    yield message
+                try:
+                    await asyncio.wait_for(tick.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"type": "heartbeat", "version": seen}
+        finally:
+            with self._lock:
+                self._clients -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": self._clients,
+                "units": len(self.units) if self.units is not None else None,
+                "version": self.version,
+                "loads": self._loads,
+                "messages_sent": self._sent,
+            }
+
+
+_broadcasters: "weakref.WeakKeyDictionary[Any, FleetBroadcaster]" = weakref.WeakKeyDictionary()
+_broadcasters_lock = threading.Lock()
+
+
+def fleet_broadcaster_for(controller: Any) -> FleetBroadcaster:
+    """Devuelve el difusor de la flota del proceso para `controller`."""
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.get(controller)
+        if broadcaster is None:
+            broadcaster = _broadcasters[controller] = FleetBroadcaster(controller)
+        return broadcaster
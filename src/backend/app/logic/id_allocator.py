@@ -0,0 +1,114 @@
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import get_database_executor
+from backend.app.logic.change_events import INSERT, ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_TABLE = "SecuenciaID"
+
+
+class IdAllocator:
+    """
+    Asigna IDs nuevos a partir de la tabla de secuencias de la base de datos.
+
+    Cada proceso reserva bloques de `block_size` IDs con una sola actualización
+    atómica (`controller.reserve_ids`) y los entrega desde memoria, así que pedir
+    un ID cuesta O(1) y dos peticiones concurrentes nunca reciben el mismo valor.
+    Los IDs reservados que no se usen quedan como huecos en la secuencia.
+
+    Cada reserva arranca después de MAX(ID), así que los IDs elegidos por un
+    cliente antes de ella no chocan con el bloque. Los que llegan mientras el
+    bloque está en uso se siguen con los INSERT del controlador, solo en las
+    tablas para las que este proceso reservó, y sin tocar la base de datos: el
+    bloque sigue después del ID, o se descarta si el ID cae más allá de él.
+    """
+
+    def __init__(self, controller: Any, block_size: Optional[int] = None):
+        self.controller = controller
+        self.block_size = block_size or settings.DB_ID_BLOCK_SIZE
+        # tabla -> [siguiente, fin) del bloque reservado por este proceso
+        self._blocks: Dict[str, list] = {}
+        # tabla -> función para dejar de seguir sus INSERT
+        self._followed: Dict[str, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _table(obj: Any) -> str:
+        return obj if isinstance(obj, str) else obj.__entity_name__
+
+    def _follow(self, table: str) -> None:
+        events = getattr(self.controller, "events", None)
+        if events is not None and table not in self._followed:
+            self._followed[table] = events.subscribe(self.on_change, tables=[table])
+
+    def next_id(self, obj: Any) -> int:
+        """Devuelve un ID sin usar para la tabla del modelo (o nombre de tabla) `obj`."""
+        table = self._table(obj)
+        with self._lock:
+            block = self._blocks.get(table)
+            if block is None or block[0] >= block[1]:
+                start = self.controller.reserve_ids(obj, self.block_size)
+                block = [start, start + self.block_size]
+                self._blocks[table] = block
+                self._follow(table)
+                logger.debug(f"Bloque de IDs reservado para {table}: {block[0]}..{block[1] - 1}")
+            next_id = block[0]
+            block[0] += 1
+            return next_id
+
+    async def allocate(self, obj: Any) -> int:
+        """`next_id` desde código asíncrono: la reserva de un bloque corre en el ejecutor de la base de datos."""
+        return await get_database_executor().run(self.next_id, obj)
+
+    def peek_id(self, obj: Any) -> int:
+        """El ID que entregaría `next_id`, sin reservarlo (solo para mostrarlo en un formulario)."""
+        table = self._table(obj)
+        with self._lock:
+            block = self._blocks.get(table)
+            if block is not None and block[0] < block[1]:
+                return block[0]
+        return self.controller.peek_ids(obj)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        value = event.data.get("ID") if event.action == INSERT else None
+        if not isinstance(value, int) or isinstance(value, bool):
+            return
+        with self._lock:
+            block = self._blocks.get(event.table)
+            # Entregado por este bloque (o anterior a él): no choca con nada pendiente
+            if block is None or value < block[0]:
+                return
+            if value < block[1]:
+                block[0] = value + 1
+            else:
+                # Más allá del bloque: la próxima reserva arranca después de MAX(ID)
+                del self._blocks[event.table]
+
+    def reset(self, obj: Any = None) -> None:
+        """Descarta los bloques reservados (de una tabla o de todas)."""
+        with self._lock:
+            tables = list(self._followed) if obj is None else [self._table(obj)]
+            for table in tables:
+                self._blocks.pop(table, None)
+                unsubscribe = self._followed.pop(table, None)
+                if unsubscribe is not None:
+                    unsubscribe()
+
+
+_allocators: "weakref.WeakKeyDictionary[Any, IdAllocator]" = weakref.WeakKeyDictionary()
+_allocators_lock = threading.Lock()
+
+
+def id_allocator_for(controller: Any) -> IdAllocator:
+    """Devuelve el asignador de IDs del proceso para `controller`."""
+    with _allocators_lock:
+        allocator = _allocators.get(controller)
+        if allocator is None:
+            allocator = IdAllocator(controller)
+            _allocators[controller] = allocator
+        return allocator
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Set, Tuple
+
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import as_async
+
+logger = logging.getLogger(__name__)
+
+# Respuestas guardadas por llave de idempotencia (ver `IdempotencyStore`)
+IDEMPOTENCY_TABLE = "ClaveIdempotencia"
+
+# (huella de la petición, código de estado, cuerpo, creado en epoch)
+StoredResponse = Tuple[str, int, Any, float]
+
+
+class IdempotencyKeyReused(ValueError):
+    """La llave ya se usó con otros datos."""
+
+
+class IdempotencyInProgress(RuntimeError):
+    """Hay una petición con la misma llave en curso."""
+
+
+def fingerprint(params: Any) -> str:
+    """Huella de los datos de una petición, para detectar una llave reutilizada con otros datos."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Respuestas de creaciones por llave de idempotencia (`Idempotency-Key`).
+
+    La primera petición con una llave se ejecuta y, si responde 2xx, su respuesta
+    se guarda en `IDEMPOTENCY_TABLE` y en una LRU en memoria de `max_entries`
+    llaves. Un reintento con la misma llave recibe esa respuesta sin volver a
+    escribir: desde memoria o, tras un reinicio o en otro proceso, con una sola
+    lectura de la tabla. Las respuestas de error no se guardan, así que un
+    reintento después de un error se vuelve a ejecutar. Las llaves vencen a los
+    `ttl` segundos; las filas vencidas se borran cada `purge_every` guardados.
+    """
+
+    def __init__(self, controller: Any, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 purge_every: int = 1000):
+        self.controller = controller
+        self.max_entries = max_entries or settings.IDEMPOTENCY_CACHE_SIZE
+        self.ttl = ttl or settings.IDEMPOTENCY_TTL
+        self.purge_every = purge_every
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._inflight: Set[str] = set()
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._hits = 0
+        self._db_hits = 0
+        self._misses = 0
+        self._conflicts = 0
+
+    def _cached(self, key: str, now: float) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            if now - stored[3] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return stored
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def lookup(self, key: str) -> Optional[StoredResponse]:
+        """Respuesta guardada para `key` (de memoria o de la base de datos) o None."""
+        now = time.time()
+        stored = self._cached(key, now)
+        if stored is not None:
+            with self._lock:
+                self._hits += 1
+            return stored
+        row = await as_async(self.controller).idempotency_get(key)
+        if row is None or now - row["Creado"] >= self.ttl:
+            with self._lock:
+                self._misses += 1
+            return None
+        stored = (row["Huella"], row["Estado"], json.loads(row["Respuesta"]), row["Creado"])
+        self._remember(key, stored)
+        with self._lock:
+            self._db_hits += 1
+        return stored
+
+    async def run(self, key: str, request_fingerprint: str,
+                  create: Callable[[], Awaitable[Tuple[int, Any]]]) -> Tuple[int, Any, bool]:
+        """
+        Devuelve (código, cuerpo, repetida): la respuesta guardada de `key` o la de
+        `create()`, que se guarda si es 2xx. Lanza `IdempotencyKeyReused` si la llave
+        se usó con otros datos e `IdempotencyInProgress` si ya se está ejecutando.
+        """
+        stored = await self.lookup(key)
+        if stored is not None:
+            if stored[0] != request_fingerprint:
+                with self._lock:
+                    self._conflicts += 1
+                raise IdempotencyKeyReused("La llave de idempotencia ya se usó con otros datos.")
+            return stored[1], stored[2], True
+        with self._lock:
+            if key in self._inflight:
+                self._conflicts += 1
+                raise IdempotencyInProgress("Hay una petición con la misma llave de idempotencia en curso.")
+            self._inflight.add(key)
+        try:
+            status_code, body = await create()
+            if 200 <= status_code < 300:
+                await self._save(key, (request_fingerprint, status_code, body, time.time()))
+            return status_code, body, False
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    async def _save(self, key: str, stored: StoredResponse) -> None:
+        self._remember(key, stored)
+        db = as_async(self.controller)
+        try:
+            await db.idempotency_put(key, stored[0], stored[1], json.dumps(stored[2], default=str), stored[3])
+            with self._lock:
+                self._saves += 1
+                purge = self._saves % self.purge_every == 0
+            if purge:
+                removed = await db.idempotency_purge(time.time() - self.ttl)
+                logger.info(f"Llaves de idempotencia vencidas eliminadas: {removed}")
+        except Exception as e:
+            # La operación ya se hizo: queda protegida al menos en memoria
+            logger.error(f"No se pudo guardar la llave de idempotencia {key}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "db_hits": self._db_hits,
+                "misses": self._misses,
+                "saved": self._saves,
+                "conflicts": self._conflicts,
+                "in_flight": len(self._inflight),
+            }
+
+
+_stores: "weakref.WeakKeyDictionary[Any, IdempotencyStore]" = weakref.WeakKeyDictionary()
+_stores_lock = threading.Lock()
+
+
+def idempotency_store_for(controller: Any) -> IdempotencyStore:
+    """Devuelve el almacén de llaves de idempotencia del proceso para `controller`."""
+    with _stores_lock:
+        store = _stores.get(controller)
+        if store is None:
+            store = _stores[controller] = IdempotencyStore(controller)
+        return store
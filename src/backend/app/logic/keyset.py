@@ -0,0 +1,56 @@
+from typing import Any, Iterable, Optional
+
+KEY_COLUMN = "ID"
+
+
+def column_name(cls: Any, column: str) -> str:
+    """Nombre canónico de `column` según `cls.get_fields()`; ValueError si no existe."""
+    for name in cls.get_fields():
+        if name.lower() == column.strip().lower():
+            return name
+    raise ValueError(f"La columna '{column}' no existe en '{cls.__entity_name__}'.")
+
+
+def resolve_columns(cls: Any, columns: Optional[Iterable[str]]) -> list:
+    """
+    Valida las columnas pedidas y devuelve sus nombres canónicos. `ID` se incluye
+    siempre porque es la llave del cursor.
+    """
+    if not columns:
+        return list(cls.get_fields())
+    resolved = []
+    for column in columns:
+        name = column_name(cls, column)
+        if name not in resolved:
+            resolved.append(name)
+    if KEY_COLUMN not in resolved:
+        resolved.insert(0, KEY_COLUMN)
+    return resolved
+
+
+def build_keyset_query(cls: Any, table: str, columns: Optional[Iterable[str]] = None,
+                       filters: Optional[dict] = None, after: Any = None) -> tuple:
+    """
+    Arma las partes de un SELECT paginado por `ID` (seek): lista de columnas,
+    cláusula WHERE con sus parámetros y orden. El límite lo agrega cada dialecto.
+    """
+    selected = resolve_columns(cls, columns)
+    conditions, params = [], []
+    for column, value in (filters or {}).items():
+        conditions.append(f"{column_name(cls, column)} = ?")
+        params.append(value)
+    if after is not None:
+        conditions.append(f"{KEY_COLUMN} > ?")
+        params.append(after)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return selected, f"{', '.join(selected)} FROM {table}{where} ORDER BY {KEY_COLUMN}", params
+
+
+def page_result(rows: list, limit: int) -> dict:
+    """Empaqueta una página: si hay una fila de más, existe página siguiente."""
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next_cursor": items[-1][KEY_COLUMN] if has_more and items else None,
+    }
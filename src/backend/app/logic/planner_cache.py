@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerCache:
+    """
+    Caché LRU con TTL para las respuestas del planificador.
+
+    La llave incluye la versión del grafo, así que un cambio de rutas nunca sirve
+    un resultado viejo; además `invalidate()` vacía la caché cuando el grafo
+    cambia. Las peticiones idénticas simultáneas se agrupan: solo la primera
+    calcula el resultado y las demás esperan ese mismo cálculo.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        # Cálculos en curso: llave -> futuro del loop que los inició
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Valor vigente de `key` o None (no cuenta aciertos ni fallos)."""
+        with self._lock:
+            return self._lookup(key, time.monotonic())
+
+    def _lookup(self, key: Hashable, now: float) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if now >= expires_at:
+            del self._entries[key]
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool] = lambda _: True
+    ) -> Any:
+        """
+        Devuelve el valor en caché de `key` o lo calcula con `compute()`. Si ya hay
+        un cálculo de la misma llave en curso en este loop, espera su resultado;
+        para eso `compute()` debe ceder el loop mientras calcula (por ejemplo,
+        corriendo en un hilo). Solo se guardan los resultados para los que
+        `cacheable` devuelve True.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is not None:
+                self._hits += 1
+                return value
+            future = self._inflight.get(key)
+            leader = future is None or future.get_loop() is not loop
+            if leader:
+                self._misses += 1
+                future = self._inflight[key] = loop.create_future()
+            else:
+                self._coalesced += 1
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            value = await compute()
+            if cacheable(value):
+                self.put(key, value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita el aviso de excepción no recuperada si nadie más esperaba
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_ratio": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+                "in_flight": len(self._inflight),
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
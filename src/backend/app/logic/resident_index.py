@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, TypeVar
+
+from backend.app.logic.async_controller import as_async
+from backend.app.logic.change_events import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ResidentIndex:
+    """
+    Índice en memoria sobre las filas de una tabla: se carga en la primera consulta
+    y sigue los cambios de esa tabla publicados por el controlador.
+
+    Las subclases definen `model` y `build(rows)`; el índice construido debe tener
+    `apply(event)`, que devuelve None cuando el cambio no se puede aplicar en el
+    lugar (por ejemplo un RESET) y el índice debe recargarse.
+    """
+
+    model: Any = None
+
+    def __init__(self, controller: Any):
+        self.controller = controller
+        self.index: Optional[Any] = None
+        self._pending: Optional[List[ChangeEvent]] = None
+        self._lock = threading.Lock()
+        # asyncio.Lock queda ligado a un loop, así que se guarda uno por loop
+        self._load_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        events = getattr(controller, "events", None)
+        if events is not None:
+            events.subscribe(self.on_change, tables=[self.model.__entity_name__])
+
+    def build(self, rows: Iterable[dict]) -> Any:
+        raise NotImplementedError
+
+    def _load_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._load_locks.get(loop)
+            if lock is None:
+                lock = self._load_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def load(self) -> Any:
+        index = self.index
+        if index is not None:
+            return index
+        # Las consultas que llegan durante la carga esperan esa misma carga
+        async with self._load_lock():
+            index = self.index
+            if index is not None:
+                return index
+            with self._lock:
+                self._pending = []
+            try:
+                index = self.build(await as_async(self.controller).read_all(self.model))
+            finally:
+                with self._lock:
+                    pending, self._pending = self._pending, None
+            with self._lock:
+                # Si hubo un cambio masivo durante la carga, se responde con este índice
+                # y la siguiente consulta lo vuelve a cargar
+                stale = any(index.apply(event) is None for event in pending)
+                self.index = None if stale else index
+            logger.info(f"Índice de {self.model.__entity_name__} cargado: {len(index)} filas")
+            return index
+
+    def on_change(self, event: ChangeEvent) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            if self.index is not None and self.index.apply(event) is None:
+                self.index = None
+
+    async def query(self, read: Callable[[Any], T]) -> T:
+        """Ejecuta `read(index)` sobre el índice cargado, sin cambios concurrentes."""
+        index = await self.load()
+        with self._lock:
+            return read(index)
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, Dict[type, ResidentIndex]]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def resident_index_for(controller: Any, cls: Type[ResidentIndex]) -> ResidentIndex:
+    """Devuelve la instancia de `cls` del proceso para `controller`."""
+    with _indexes_lock:
+        by_class = _indexes.setdefault(controller, {})
+        index = by_class.get(cls)
+        if index is None:
+            index = by_class[cls] = cls(controller)
+        return index
@@ -0,0 +1,52 @@
+import threading
+from typing import Callable, Optional
+
+
+class SchemaRegistry:
+    """
+    Registro de las tablas cuya existencia ya se comprobó (y que se crearon si
+    faltaban) en una base de datos. Evita repetir el DDL de verificación en
+    cada lectura o escritura.
+    """
+
+    def __init__(self):
+        self._known: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(table: str) -> str:
+        # SQL Server y SQLite no distinguen mayúsculas en los nombres de tabla
+        return table.lower()
+
+    def is_known(self, table: str) -> bool:
+        return self._key(table) in self._known
+
+    def mark(self, table: str) -> None:
+        with self._lock:
+            self._known.add(self._key(table))
+
+    def ensure(self, table: str, create: Callable[[], None]) -> bool:
+        """
+        Ejecuta `create` la primera vez que se pide `table`. Devuelve True si se
+        ejecutó en esta llamada.
+        """
+        if self.is_known(table):
+            return False
+        with self._lock:
+            if self._key(table) in self._known:
+                return False
+            create()
+            self._known.add(self._key(table))
+            return True
+
+    def refresh(self, table: Optional[str] = None) -> None:
+        """Olvida una tabla (o todas) para que se vuelva a verificar en el próximo uso."""
+        with self._lock:
+            if table is None:
+                self._known.clear()
+            else:
+                self._known.discard(self._key(table))
+
+    def known_tables(self) -> list:
+        with self._lock:
+            return sorted(self._known)
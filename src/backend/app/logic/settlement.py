@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import glob
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core.config import settings
+from backend.app.logic.fare_catalog import FareCatalog, FareTables, fare_catalog_for
+
+logger = logging.getLogger(__name__)
+
+# Llave de agrupación de la liquidación
+KEY_DTYPE = np.dtype([("day", "datetime64[D]"), ("unit", "U20"), ("route", "i8"), ("card_type", "i8")])
+# Totales por grupo: pagos, monto cobrado, tarifa según el catálogo, pagos sin
+# Movimiento, sin tarifa y con cobro distinto de la tarifa
+MEASURES = ("payments", "charged", "expected", "unmatched", "unpriced", "mismatched")
+# Diferencia entre cobro y tarifa que se considera un descuadre
+MISMATCH_TOLERANCE = 0.005
+# Índice sobre Pago(ID) que usan los controladores para recorrer los pagos por bloques
+PAYMENT_ID_INDEX = "IX_Pago_ID"
+
+_OUTPUT_NAME = re.compile(r"settlement-(\d{4}-\d{2}-\d{2})\.npz$")
+
+
+def iter_settlement_chunks(controller: Any, after: int = 0, chunk_size: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Recorre los pagos con ID mayor que `after` unidos con su Movimiento, Tarjeta y
+    UnidadTransporte (`controller.settlement_page`), de a `chunk_size` filas, y
+    entrega cada bloque como columnas de NumPy. Los datos faltantes quedan en NaN
+    (`Cobrado`) o -1 (`IDTipoTarjeta`, `IDRuta`).
+    """
+    chunk_size = chunk_size or settings.SETTLEMENT_CHUNK_SIZE
+    while True:
+        rows = controller.settlement_page(after, chunk_size)
+        if not rows:
+            return
+        ids, units, prices, cards, charged, card_types, routes = zip(*rows)
+        columns = {
+            "ID": np.array(ids, dtype=np.int64),
+            "IDUnidad": np.array(units, dtype="U20"),
+            "IDPrecio": np.array(prices, dtype=np.int64),
+            "IDTarjeta": np.array(cards, dtype=np.int64),
+            "Cobrado": np.array(charged, dtype=np.float64),
+            "IDTipoTarjeta": np.nan_to_num(np.array(card_types, dtype=np.float64), nan=-1).astype(np.int64),
+            "IDRuta": np.nan_to_num(np.array(routes, dtype=np.float64), nan=-1).astype(np.int64),
+        }
+        yield columns
+        if len(rows) < chunk_size:
+            return
+        after = int(columns["ID"][-1])
+
+
+def group_sum(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Llaves distintas de `keys` (ordenadas) y la suma de las filas de `values` de cada una."""
+    groups, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    sums = np.column_stack([
+        np.bincount(inverse, weights=values[:, i], minlength=len(groups)) for i in range(values.shape[1])
+    ]) if len(groups) else np.zeros((0, values.shape[1]))
+    return groups, sums
+
+
+def aggregate_chunk(columns: Dict[str, np.ndarray], day: np.datetime64, tables: FareTables) -> Tuple[np.ndarray, np.ndarray]:
+    """Totales (`MEASURES`) del bloque por día, unidad, ruta y tipo de tarjeta."""
+    keys = np.empty(len(columns["ID"]), dtype=KEY_DTYPE)
+    keys["day"] = day
+    keys["unit"] = columns["IDUnidad"]
+    keys["route"] = columns["IDRuta"]
+    keys["card_type"] = columns["IDTipoTarjeta"]
+    charged = columns["Cobrado"]
+    expected = tables.compute_fares({"IDPrecio": columns["IDPrecio"], "IDTipoTarjeta": columns["IDTipoTarjeta"]})
+    unmatched = np.isnan(charged)
+    unpriced = np.isnan(expected)
+    mismatched = ~unmatched & ~unpriced & (np.abs(charged - expected) > MISMATCH_TOLERANCE)
+    values = np.column_stack([
+        np.ones(len(keys)), np.nan_to_num(charged), np.nan_to_num(expected), unmatched, unpriced, mismatched,
+    ])
+    return group_sum(keys, values)
+
+
+def _write_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+class SettlementRun:
+    """
+    Liquidación de un día: agrupa los pagos por unidad, ruta y tipo de tarjeta y
+    compara lo cobrado (Movimiento) con la tarifa del catálogo (Precio y factor del
+    tipo de tarjeta). Los pagos se leen por bloques de `chunk_size` y los totales se
+    combinan después de cada bloque, así que la memoria depende de la cantidad de
+    grupos y no de la de pagos.
+
+    `Pago` no guarda fecha: la corrida de un día liquida los pagos registrados
+    desde la corrida anterior (los de ID mayor que el último liquidado en el
+    archivo de un día previo en `output_dir`). Cada `checkpoint_every` bloques
+    guarda los totales parciales y el último ID; si la corrida se corta, la
+    siguiente del mismo día sigue desde ahí. El resultado es
+    `settlement-AAAA-MM-DD.npz` con una columna por campo de `KEY_DTYPE` y de
+    `MEASURES`, más `first_id`, `last_id` y `rows`.
+    """
+
+    def __init__(self, controller: Any, output_dir: Optional[str] = None, day: Optional[datetime.date] = None,
+                 chunk_size: Optional[int] = None, checkpoint_every: Optional[int] = None,
+                 after: Optional[int] = None, catalog: Optional[FareCatalog] = None):
+        self.controller = controller
+        self.catalog = catalog or fare_catalog_for(controller)
+        self.output_dir = output_dir or settings.SETTLEMENT_OUTPUT_DIR
+        self.day = np.datetime64(day or datetime.date.today(), "D")
+        self.chunk_size = chunk_size or settings.SETTLEMENT_CHUNK_SIZE
+        self.checkpoint_every = checkpoint_every or settings.SETTLEMENT_CHECKPOINT_EVERY
+        self.after = after
+        self.output_path = os.path.join(self.output_dir, f"settlement-{self.day}.npz")
+        self.checkpoint_path = os.path.join(self.output_dir, f"settlement-{self.day}.checkpoint.npz")
+
+    def _previous_last_id(self) -> int:
+        """Último ID liquidado por la corrida más reciente de un día anterior (0 si no hay)."""
+        previous = []
+        for path in glob.glob(os.path.join(self.output_dir, "settlement-*.npz")):
+            match = _OUTPUT_NAME.search(os.path.basename(path))
+            if match and np.datetime64(match.group(1)) < self.day:
+                previous.append((match.group(1), path))
+        if not previous:
+            return 0
+        with np.load(max(previous)[1]) as data:
+            return int(data["last_id"])
+
+    def _arrays(self, keys: np.ndarray, sums: np.ndarray, first_id: int, last_id: int, rows: int) -> Dict[str, np.ndarray]:
+        arrays = {name: keys[name] for name in KEY_DTYPE.names}
+        arrays.update({name: sums[:, i] for i, name in enumerate(MEASURES)})
+        arrays.update(first_id=np.int64(first_id), last_id=np.int64(last_id), rows=np.int64(rows))
+        return arrays
+
+    def run(self) -> dict:
+        """Ejecuta (o retoma) la liquidación y devuelve el resumen de la corrida."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        keys, sums = np.empty(0, dtype=KEY_DTYPE), np.zeros((0, len(MEASURES)))
+        rows, resumed = 0, False
+        if os.path.exists(self.checkpoint_path):
+            with np.load(self.checkpoint_path) as data:
+                keys = np.empty(len(data["payments"]), dtype=KEY_DTYPE)
+                for name in KEY_DTYPE.names:
+                    keys[name] = data[name]
+                sums = np.column_stack([data[name] for name in MEASURES]) if len(keys) else sums
+                first_id, last_id, rows = int(data["first_id"]), int(data["last_id"]), int(data["rows"])
+            resumed = True
+            logger.info(f"Liquidación {self.day} retomada desde el pago {last_id} ({rows} pagos ya procesados)")
+        else:
+            first_id = last_id = self.after if self.after is not None else self._previous_last_id()
+
+        # Una sola versión del catálogo para toda la corrida
+        tables = self.catalog.tables()
+        chunks = 0
+        for columns in iter_settlement_chunks(self.controller, last_id, self.chunk_size):
+            chunk_keys, chunk_sums = aggregate_chunk(columns, self.day, tables)
+            keys, sums = group_sum(np.concatenate([keys, chunk_keys]), np.vstack([sums, chunk_sums]))
+            last_id = int(columns["ID"][-1])
+            rows += len(columns["ID"])
+            chunks += 1
+            if chunks % self.checkpoint_every == 0:
+                _write_npz(self.checkpoint_path, self._arrays(keys, sums, first_id, last_id, rows))
+                logger.info(f"Liquidación {self.day}: {rows} pagos procesados, último ID {last_id}")
+
+        _write_npz(self.output_path, self._arrays(keys, sums, first_id, last_id, rows))
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        totals = sums.sum(axis=0)
+        totals = {
+            name: float(total) if name in ("charged", "expected") else int(total)
+            for name, total in zip(MEASURES, totals)
+        }
+        summary = {
+            "day": str(self.day),
+            "output": self.output_path,
+            "resumed": resumed,
+            "first_id": first_id,
+            "last_id": last_id,
+            "rows": rows,
+            "groups": len(keys),
+            **totals,
+        }
+        logger.info(f"Liquidación {self.day} terminada: {rows} pagos en {len(keys)} grupos")
+        return summary
+
+
+def load_settlement(path: str) -> Dict[str, np.ndarray]:
+    """Columnas de un archivo de liquidación."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.app.logic.settlement",
+        description="Liquida los pagos por día, unidad, ruta y tipo de tarjeta.",
+    )
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=None,
+                        help="día de la liquidación (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument("--output", default=None, help="directorio de salida (SETTLEMENT_OUTPUT_DIR)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="pagos por bloque (SETTLEMENT_CHUNK_SIZE)")
+    parser.add_argument("--after", type=int, default=None,
+                        help="liquidar desde el pago siguiente a este ID en vez de desde la corrida anterior")
+    args = parser.parse_args(argv)
+
+    from backend.app.logic.universal_controller_instance import universal_controller as controller
+
+    summary = SettlementRun(controller, args.output, args.date, args.chunk_size, after=args.after).run()
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.app.core.config import settings
+from backend.app.logic.change_events import DELETE, RESET, ChangeEvent
+from backend.app.logic.resident_index import ResidentIndex, resident_index_for
+from backend.app.models.stops import Parada
+from backend.app.models.transport import UnidadTransporte
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# "lat, lon" con decimales en ambos valores, para no confundir direcciones como "Calle 5, 10"
+_COORDINATES = re.compile(r"(?<![\w.])(-?\d{1,2}\.\d+)\s*[,;]\s*(-?\d{1,3}\.\d+)(?![\w.])")
+
+
+def parse_coordinates(value: Any) -> Optional[Tuple[float, float]]:
+    """(lat, lon) contenidos en una `Ubicacion` de texto libre, o None si no tiene coordenadas válidas."""
+    match = _COORDINATES.search(str(value or ""))
+    if match is None:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def haversine(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distancias en metros de (lat, lon) a cada punto de `lats`/`lons`."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """
+    Índice espacial de puntos en una grilla uniforme de celdas de `cell_meters`.
+
+    Las coordenadas viven en arreglos de NumPy (con huecos reutilizables tras
+    borrar) y cada celda guarda los huecos de sus puntos. Una consulta junta los
+    puntos de las celdas que cubren el radio y filtra las distancias de una vez.
+    """
+
+    def __init__(self, cell_meters: Optional[float] = None):
+        self.cell_deg = (cell_meters or settings.SPATIAL_CELL_METERS) / METERS_PER_DEGREE
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._keys: List[Any] = []
+        self._slots: Dict[Any, int] = {}
+        self._free: List[int] = []
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._slots
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def upsert(self, key: Any, lat: float, lon: float) -> None:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._unindex(slot)
+        elif self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            if slot >= len(self._lats):
+                grow = max(16, len(self._lats))
+                self._lats = np.concatenate([self._lats, np.empty(grow)])
+                self._lons = np.concatenate([self._lons, np.empty(grow)])
+        self._slots[key] = slot
+        self._lats[slot], self._lons[slot] = lat, lon
+        self._cells.setdefault(self._cell(lat, lon), set()).add(slot)
+
+    def remove(self, key: Any) -> bool:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        self._unindex(slot)
+        self._keys[slot] = None
+        self._free.append(slot)
+        return True
+
+    def _unindex(self, slot: int) -> None:
+        cell = self._cell(self._lats[slot], self._lons[slot])
+        slots = self._cells[cell]
+        slots.discard(slot)
+        if not slots:
+            del self._cells[cell]
+
+    def position(self, key: Any) -> Optional[Tuple[float, float]]:
+        slot = self._slots.get(key)
+        return None if slot is None else (float(self._lats[slot]), float(self._lons[slot]))
+
+    def nearby(self, lat: float, lon: float, radius: float, limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Llaves a menos de `radius` metros de (lat, lon) con su distancia, de la más cercana a la más lejana."""
+        dlat = radius / METERS_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        i0, j0 = self._cell(lat - dlat, lon - dlon)
+        i1, j1 = self._cell(lat + dlat, lon + dlon)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            # Radio más grande que la zona ocupada: es más barato recorrer las celdas con puntos
+            groups = [s for (i, j), s in self._cells.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            groups = [self._cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self._cells]
+        if not groups:
+            return []
+        slots = np.fromiter((slot for group in groups for slot in group), dtype=np.intp)
+        distances = haversine(lat, lon, self._lats[slots], self._lons[slots])
+        inside = distances <= radius
+        slots, distances = slots[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [(self._keys[slots[i]], float(distances[i])) for i in order]
+
+
+class SpatialIndex:
+    """Filas de una tabla; las que tienen coordenadas en su `Ubicacion` van a una `GridIndex`."""
+
+    def __init__(self, cell_meters: Optional[float] = None):
+        self.grid = GridIndex(cell_meters)
+        self.rows: Dict[Any, dict] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "SpatialIndex":
+        index = cls()
+        for row in rows:
+            index.upsert(row)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, row: dict) -> bool:
+        """Guarda la fila; solo entra en la grilla si su `Ubicacion` tiene coordenadas."""
+        self.rows[row["ID"]] = dict(row)
+        coordinates = parse_coordinates(row.get("Ubicacion"))
+        if coordinates is None:
+            return self.grid.remove(row["ID"])
+        self.grid.upsert(row["ID"], *coordinates)
+        return True
+
+    def remove(self, key: Any) -> bool:
+        self.grid.remove(key)
+        return self.rows.pop(key, None) is not None
+
+    def apply(self, event: ChangeEvent) -> Optional[bool]:
+        if event.action == RESET or event.data.get("ID") is None:
+            return None
+        if event.action == DELETE:
+            return self.remove(event.data["ID"])
+        if "Ubicacion" not in event.data:
+            return None
+        previous = self.rows.get(event.data["ID"], {})
+        return self.upsert({**previous, **event.data})
+
+    def nearby(self, lat: float, lon: float, radius: float, limit: Optional[int] = None) -> List[dict]:
+        return [
+            {**self.rows[key], "distancia_m": round(distance, 1)}
+            for key, distance in self.grid.nearby(lat, lon, radius, limit)
+        ]
+
+
+class StopLocations(ResidentIndex):
+    model = Parada
+
+    def build(self, rows: Iterable[dict]) -> SpatialIndex:
+        return SpatialIndex.from_rows(rows)
+
+
+class TransportUnitLocations(ResidentIndex):
+    model = UnidadTransporte
+
+    def build(self, rows: Iterable[dict]) -> SpatialIndex:
+        return SpatialIndex.from_rows(rows)
+
+
+async def nearby(controller: Any, model: Any, lat: float, lon: float,
+                 radius: Optional[float] = None, limit: Optional[int] = None) -> List[dict]:
+    """Paradas o unidades de transporte (según `model`) cercanas a (lat, lon)."""
+    cls = StopLocations if model is Parada else TransportUnitLocations
+    radius = radius or settings.NEARBY_RADIUS_METERS
+    return await resident_index_for(controller, cls).query(lambda index: index.nearby(lat, lon, radius, limit))
@@ -0,0 +1,195 @@
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from backend.app.logic.change_events import DELETE, RESET, ChangeEvent
+from backend.app.logic.resident_index import ResidentIndex, resident_index_for
+from backend.app.models.stops import Parada
+
+# Llaves de cada nodo del trie: IDs de las paradas con una palabra bajo ese
+# prefijo, e IDs de las paradas con una palabra que termina en ese nodo
+_IDS = "$"
+_END = "#"
+
+
+def fold(text: Any) -> str:
+    """Texto en minúsculas, sin tildes ni signos y con un solo espacio entre palabras."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in plain).split())
+
+
+def trigrams(folded: str) -> Set[str]:
+    """Trigramas de cada palabra, con relleno para que pesen los inicios de palabra."""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StopSearchIndex:
+    """
+    Índice de búsqueda de paradas por `Nombre` y `Ubicacion`.
+
+    Las palabras (sin tildes ni mayúsculas) se guardan en un trie cuyos nodos
+    conocen las paradas bajo cada prefijo; autocompletar recorre el subárbol de
+    la última palabra de la consulta en orden alfabético y se detiene al juntar
+    `limit` paradas. Si los prefijos no alcanzan, se completa con
+    coincidencias aproximadas por trigramas: el puntaje es la fracción de los
+    trigramas de la consulta que aparecen en la parada.
+    """
+
+    def __init__(self, min_similarity: float = 0.5):
+        self.min_similarity = min_similarity
+        self._docs: Dict[Any, dict] = {}
+        self._folded: Dict[Any, str] = {}
+        self._grams: Dict[Any, Set[str]] = {}
+        self._trie: dict = {_IDS: set()}
+        self._trigram_index: Dict[str, Set[Any]] = {}
+
+    @classmethod
+    def from_rows(cls, paradas: Iterable[dict]) -> "StopSearchIndex":
+        index = cls()
+        for parada in paradas:
+            index.add(parada)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, parada: dict) -> None:
+        """Agrega o reemplaza la parada `parada` (con `ID`, `Nombre` y `Ubicacion`)."""
+        stop_id = parada["ID"]
+        if stop_id in self._docs:
+            self.remove(stop_id)
+        doc = {"ID": stop_id, "Nombre": parada.get("Nombre"), "Ubicacion": parada.get("Ubicacion")}
+        folded = fold(f"{doc['Nombre'] or ''} {doc['Ubicacion'] or ''}")
+        self._docs[stop_id] = doc
+        self._folded[stop_id] = folded
+        for word in set(folded.split()):
+            node = self._trie
+            for char in word:
+                node = node.setdefault(char, {_IDS: set()})
+                node[_IDS].add(stop_id)
+            node.setdefault(_END, set()).add(stop_id)
+        grams = trigrams(folded)
+        self._grams[stop_id] = grams
+        for gram in grams:
+            self._trigram_index.setdefault(gram, set()).add(stop_id)
+
+    def remove(self, stop_id: Any) -> bool:
+        folded = self._folded.pop(stop_id, None)
+        if folded is None:
+            return False
+        del self._docs[stop_id]
+        for word in set(folded.split()):
+            path = [self._trie]
+            for char in word:
+                path.append(path[-1][char])
+            ends = path[-1][_END]
+            ends.discard(stop_id)
+            if not ends:
+                del path[-1][_END]
+            for parent, char, node in zip(reversed(path[:-1]), reversed(word), reversed(path[1:])):
+                node[_IDS].discard(stop_id)
+                if not node[_IDS]:
+                    del parent[char]
+        for gram in self._grams.pop(stop_id):
+            ids = self._trigram_index[gram]
+            ids.discard(stop_id)
+            if not ids:
+                del self._trigram_index[gram]
+        return True
+
+    def _node(self, word: str) -> Optional[dict]:
+        node = self._trie
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _completions(node: dict) -> Iterator[Any]:
+        """IDs bajo `node` en el orden alfabético de la palabra completada (puede repetir IDs)."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.get(_END, ())
+            stack.extend(node[char] for char in sorted((k for k in node if k not in (_IDS, _END)), reverse=True))
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Paradas que coinciden con `query`: primero las que tienen todas sus palabras
+        como prefijo de alguna palabra de la parada (por orden alfabético de la
+        palabra que completa la última), luego las aproximadas.
+        """
+        folded = fold(query)
+        if not folded or limit <= 0:
+            return []
+        *others, last = folded.split()
+        nodes = [self._node(word) for word in {*others, last}]
+        last_node = self._node(last)
+        matches: Set[Any] = set()
+        ranked: List[Any] = []
+        if all(node is not None for node in nodes):
+            # Las demás palabras solo filtran; si alguna es más selectiva que la última,
+            # se parte de su conjunto en vez de recorrer el subárbol
+            filters = sorted((node[_IDS] for node in nodes if node is not last_node), key=len)
+            if filters and len(filters[0]) < len(last_node[_IDS]):
+                matches = {i for i in filters[0] if i in last_node[_IDS] and all(i in f for f in filters[1:])}
+                ranked = sorted(matches, key=self._folded.__getitem__)[:limit]
+            else:
+                for stop_id in self._completions(last_node):
+                    if stop_id not in matches and all(stop_id in f for f in filters):
+                        matches.add(stop_id)
+                        ranked.append(stop_id)
+                        if len(ranked) == limit:
+                            break
+        results = [{**self._docs[i], "score": 1.0} for i in ranked]
+        if len(results) < limit:
+            results.extend(self._fuzzy(folded, limit - len(results), exclude=matches))
+        return results
+
+    def _fuzzy(self, folded: str, limit: int, exclude: Set[Any]) -> List[dict]:
+        grams = trigrams(folded)
+        shared: Dict[Any, int] = {}
+        for gram in grams:
+            for stop_id in self._trigram_index.get(gram, ()):
+                if stop_id not in exclude:
+                    shared[stop_id] = shared.get(stop_id, 0) + 1
+        scored = []
+        for stop_id, count in shared.items():
+            score = count / len(grams)
+            if score >= self.min_similarity:
+                scored.append((-score, self._folded[stop_id], stop_id))
+        scored.sort()
+        return [{**self._docs[stop_id], "score": round(-score, 3)} for score, _, stop_id in scored[:limit]]
+
+    def apply(self, event: ChangeEvent) -> Optional[bool]:
+        """Aplica un cambio de `Parada`; devuelve None si hay que reconstruir el índice."""
+        if event.action == RESET or event.data.get("ID") is None:
+            return None
+        if event.action == DELETE:
+            return self.remove(event.data["ID"])
+        if "Nombre" not in event.data or "Ubicacion" not in event.data:
+            return None
+        self.add(event.data)
+        return True
+
+
+class StopSearchService(ResidentIndex):
+    """Índice de búsqueda de paradas residente por controlador (ver `ResidentIndex`)."""
+
+    model = Parada
+
+    def build(self, rows: Iterable[dict]) -> StopSearchIndex:
+        return StopSearchIndex.from_rows(rows)
+
+    async def search(self, query: str, limit: int = 10) -> List[dict]:
+        return await self.query(lambda index: index.search(query, limit))
+
+
+def stop_search_for(controller: Any) -> StopSearchService:
+    """Devuelve el índice de búsqueda de paradas del proceso para `controller`."""
+    return resident_index_for(controller, StopSearchService)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, List, Optional
+
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import get_database_executor
+from backend.app.logic.fare_engine import ERROR, fare_engine_for, summarize
+
+logger = logging.getLogger(__name__)
+
+
+class TapIngestor:
+    """
+    Ingesta de taps de los validadores con commit agrupado.
+
+    Los taps de todas las peticiones entran a una cola (una por loop) y un solo
+    escritor los cobra en lotes de hasta `batch_size` con `FareEngine.charge_many`,
+    una transacción por lote. Si la cola se vacía antes de llenar el lote, el
+    escritor espera hasta `max_wait` segundos por más taps; así muchos taps
+    sueltos comparten un commit y una carga grande se cobra sin esperas.
+    Cada petición recibe el resultado de sus propios taps.
+    """
+
+    def __init__(self, controller: Any, engine: Any = None, batch_size: Optional[int] = None,
+                 max_wait: Optional[float] = None):
+        self.engine = engine or fare_engine_for(controller)
+        self.batch_size = batch_size or settings.TAP_GROUP_COMMIT_SIZE
+        self.max_wait = settings.TAP_GROUP_COMMIT_MS / 1000 if max_wait is None else max_wait
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Queue]" = weakref.WeakKeyDictionary()
+        self._writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._taps = 0
+        self._largest = 0
+        self._errors = 0
+
+    def _queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue = self._queues.get(loop)
+            if queue is None:
+                queue = self._queues[loop] = asyncio.Queue()
+            writer = self._writers.get(loop)
+            if writer is None or writer.done():
+                self._writers[loop] = loop.create_task(self._write(queue))
+            return queue
+
+    async def submit(self, taps: List[Any]) -> dict:
+        """Encola los taps, espera a que se cobren y devuelve el resumen (ver `summarize`)."""
+        loop = asyncio.get_running_loop()
+        queue = self._queue()
+        futures = []
+        for tap in taps:
+            future = loop.create_future()
+            queue.put_nowait((tap, future))
+            futures.append(future)
+        results = await asyncio.gather(*futures)
+        return summarize([{**result, "index": index} for index, result in enumerate(results)])
+
+    async def _write(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._commit(batch)
+
+    async def _commit(self, batch: list) -> None:
+        try:
+            summary = await get_database_executor().run(self.engine.charge_many, [tap for tap, _ in batch])
+            results = summary["results"]
+        except Exception as e:
+            # La transacción del lote se revirtió: ningún tap quedó cobrado y se pueden reenviar
+            logger.error(f"No se pudo cobrar un lote de {len(batch)} taps: {e}")
+            results = [{"status": ERROR, "error": str(e)} for _ in batch]
+            with self._lock:
+                self._errors += 1
+        with self._lock:
+            self._batches += 1
+            self._taps += len(batch)
+            self._largest = max(self._largest, len(batch))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "taps": self._taps,
+                "average_batch": round(self._taps / self._batches, 1) if self._batches else None,
+                "largest_batch": self._largest,
+                "failed_batches": self._errors,
+                "queued": sum(queue.qsize() for queue in self._queues.values()),
+            }
+
+
+_ingestors: "weakref.WeakKeyDictionary[Any, TapIngestor]" = weakref.WeakKeyDictionary()
+_ingestors_lock = threading.Lock()
+
+
+def tap_ingestor_for(controller: Any) -> TapIngestor:
+    """Devuelve el ingestor de taps del proceso para `controller`."""
+    with _ingestors_lock:
+        ingestor = _ingestors.get(controller)
+        if ingestor is None:
+            ingestor = _ingestors[controller] = TapIngestor(controller)
+        return ingestor
@@ -0,0 +1,155 @@
+import datetime
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+DAY_SECONDS = 24 * 3600
+_INF = 2 ** 31 - 1
+
+
+def parse_time(value: Any) -> int:
+    """
+    Segundos desde la medianoche de un valor `TIME` (`"08:30"`, `"08:30:15"`,
+    `"08:30:15.0000000"` o `datetime.time`). Lanza ValueError si no es una hora válida.
+    """
+    if isinstance(value, datetime.time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    if isinstance(value, datetime.datetime):
+        return parse_time(value.time())
+    parts = str(value).strip().split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Hora inválida: {value!r}")
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(float(parts[2])) if len(parts) == 3 else 0
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"Hora inválida: {value!r}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_time(seconds: int) -> str:
+    seconds %= DAY_SECONDS
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class Timetable:
+    """
+    Horarios del grafo en arreglos compactos indexados por ruta.
+
+    En `horario` cada ruta tiene un único viaje (`Salida` → `Llegada`) y
+    `RutaParada` no guarda el orden ni la hora de paso por cada parada, así que el
+    viaje se modela como: se aborda en cualquiera de sus paradas a la hora de
+    `Salida` y se baja en cualquiera a la hora de `Llegada`. Si la llegada es
+    anterior a la salida, el viaje termina al día siguiente.
+    """
+
+    def __init__(self, departures: array, arrivals: array):
+        self.departures = departures
+        self.arrivals = arrivals
+
+    @classmethod
+    def from_graph(cls, graph: Any) -> "Timetable":
+        departures = array("i", [-1] * len(graph.route_ids))
+        arrivals = array("i", [-1] * len(graph.route_ids))
+        for route, schedule_id in enumerate(graph.route_schedules):
+            times = graph.schedules.get(schedule_id)
+            if times is None:
+                continue
+            salida, llegada = times
+            departures[route] = salida
+            arrivals[route] = llegada if llegada >= salida else llegada + DAY_SECONDS
+        return cls(departures, arrivals)
+
+    def earliest_arrival(
+        self, graph: Any, origen: str, destino: str, departure: int, max_transfers: int
+    ) -> List[dict]:
+        """
+        Búsqueda por rondas al estilo RAPTOR: en la ronda k se recorren las rutas
+        que pasan por paradas mejoradas en la ronda k-1 y se propaga la hora de
+        llegada a sus paradas. Devuelve el frente de Pareto (hora de llegada vs.
+        transbordos), ordenado por hora de llegada.
+        """
+        origins = set(graph.stops_at(origen))
+        # Una parada de destino que también es de origen no tiene viaje que planificar
+        targets = [stop for stop in graph.stops_at(destino) if stop not in origins]
+        if not origins or not targets:
+            return []
+
+        stops = len(graph.stop_ids)
+        best = array("i", [_INF]) * stops
+        labels = [array("i", [_INF]) * stops]
+        # Por ronda: parada -> (ruta, parada donde se abordó)
+        parents: List[Dict[int, Tuple[int, int]]] = [{}]
+        for stop in origins:
+            best[stop] = labels[0][stop] = departure
+        marked = set(origins)
+        target_best = _INF
+        found = []
+
+        for k in range(1, max_transfers + 2):
+            previous = labels[k - 1]
+            current = array("i", previous)
+            improved: Dict[int, Tuple[int, int]] = {}
+            routes = {route for stop in marked for route in graph.stop_routes[stop]}
+            marked = set()
+            for route in sorted(routes):
+                salida = self.departures[route]
+                if salida < 0:
+                    continue
+                board = next((s for s in graph.route_stops[route] if previous[s] <= salida), None)
+                if board is None:
+                    continue
+                llegada = self.arrivals[route]
+                # Poda: no sirve llegar más tarde que la mejor llegada conocida al destino
+                if llegada >= target_best:
+                    continue
+                for stop in graph.route_stops[route]:
+                    if stop != board and llegada < best[stop]:
+                        best[stop] = current[stop] = llegada
+                        improved[stop] = (route, board)
+                        marked.add(stop)
+            labels.append(current)
+            parents.append(improved)
+            arrival, target = min((current[s], s) for s in targets)
+            if arrival < target_best:
+                itinerary = self._itinerary(graph, parents, k, target, origen, destino)
+                if itinerary is not None:
+                    target_best = arrival
+                    found.append((arrival, itinerary))
+            if not marked:
+                break
+        found.sort(key=lambda item: (item[0], item[1]["transbordos"]))
+        return [itinerary for _, itinerary in found]
+
+    def _itinerary(self, graph: Any, parents: list, k: int, stop: int, origen: str, destino: str) -> Optional[dict]:
+        legs = []
+        while k > 0:
+            # La parada pudo mejorar en una ronda anterior a k
+            while k > 0 and stop not in parents[k]:
+                k -= 1
+            if k == 0:
+                break
+            route, board = parents[k][stop]
+            legs.append((route, board, stop))
+            stop, k = board, k - 1
+        if not legs:
+            return None
+        legs.reverse()
+        tramos = [
+            {
+                "ruta": graph.route_names[route],
+                "desde": graph.stop_locations[board],
+                "hasta": graph.stop_locations[alight],
+                "salida": format_time(self.departures[route]),
+                "llegada": format_time(self.arrivals[route]),
+            }
+            for route, board, alight in legs
+        ]
+        tramos[0]["desde"], tramos[-1]["hasta"] = origen, destino
+        return {
+            "ruta_inicio": tramos[0]["ruta"],
+            "ruta_final": tramos[-1]["ruta"],
+            "interconexion": tramos[1]["desde"] if len(tramos) > 1 else None,
+            "transbordos": len(tramos) - 1,
+            "hora_salida": tramos[0]["salida"],
+            "hora_llegada": tramos[-1]["llegada"],
+            "tramos": tramos,
+        }
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Encabezado del snapshot: firma, versión del formato, hash de los enlaces y cantidad de tripletas
+_HEADER = struct.Struct("<4sHQI")
+_MAGIC = b"PTTT"
+_FORMAT_VERSION = 1
+_EDGE = struct.Struct("<qq")
+
+
+def edge_hash(edges: Iterable[Tuple[int, int]]) -> int:
+    """Hash de 64 bits del conjunto de enlaces (IDRuta, IDParada), sin importar el orden."""
+    digest = hashlib.blake2b(digest_size=8)
+    for route, stop in sorted(set(edges)):
+        digest.update(_EDGE.pack(route, stop))
+    return int.from_bytes(digest.digest(), "little")
+
+
+class TransferTable:
+    """
+    Tabla precalculada de transbordos: para cada par de rutas, los IDs de las
+    paradas que comparten.
+
+    Es un diccionario disperso `(ruta_menor, ruta_mayor) -> array` de paradas
+    ordenadas, así que consultar la interconexión de dos rutas es una lectura en
+    memoria. Se mantiene al día con `add_edge` / `remove_edge` en O(grado de la
+    parada) y se puede guardar en un snapshot binario para arrancar sin recalcularla.
+    """
+
+    def __init__(self):
+        self._pairs: Dict[Tuple[int, int], array] = {}
+        self._stop_routes: Dict[int, Set[int]] = {}
+        self._route_links: Dict[int, Set[int]] = {}
+
+    @staticmethod
+    def _key(first: int, second: int) -> Tuple[int, int]:
+        return (first, second) if first <= second else (second, first)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[int, int]]) -> "TransferTable":
+        table = cls()
+        for route, stop in edges:
+            table._stop_routes.setdefault(stop, set()).add(route)
+        for stop, routes in table._stop_routes.items():
+            ordered = sorted(routes)
+            for i, first in enumerate(ordered):
+                for second in ordered[i + 1:]:
+                    table._pairs.setdefault((first, second), array("q")).append(stop)
+        for pair, stops in table._pairs.items():
+            table._pairs[pair] = array("q", sorted(stops))
+            table._link(*pair)
+        return table
+
+    def _link(self, first: int, second: int) -> None:
+        self._route_links.setdefault(first, set()).add(second)
+        self._route_links.setdefault(second, set()).add(first)
+
+    def _unlink(self, first: int, second: int) -> None:
+        self._route_links.get(first, set()).discard(second)
+        self._route_links.get(second, set()).discard(first)
+
+    def add_edge(self, route: int, stop: int) -> bool:
+        routes = self._stop_routes.setdefault(stop, set())
+        if route in routes:
+            return False
+        for other in routes:
+            stops = self._pairs.setdefault(self._key(route, other), array("q"))
+            stops.append(stop)
+            if len(stops) > 1 and stops[-2] > stop:
+                self._pairs[self._key(route, other)] = array("q", sorted(stops))
+            self._link(route, other)
+        routes.add(route)
+        return True
+
+    def remove_edge(self, route: int, stop: int) -> bool:
+        routes = self._stop_routes.get(stop)
+        if not routes or route not in routes:
+            return False
+        routes.discard(route)
+        for other in routes:
+            key = self._key(route, other)
+            stops = self._pairs.get(key)
+            if stops is None:
+                continue
+            stops.remove(stop)
+            if not stops:
+                del self._pairs[key]
+                self._unlink(route, other)
+        if not routes:
+            del self._stop_routes[stop]
+        return True
+
+    def shared_stops(self, first: int, second: int) -> List[int]:
+        """Paradas compartidas por dos rutas, ordenadas por ID."""
+        return list(self._pairs.get(self._key(first, second), ()))
+
+    def connected_routes(self, route: int) -> List[int]:
+        """Rutas con al menos una parada en común con `route`."""
+        return sorted(self._route_links.get(route, ()))
+
+    def transfers_from(self, route: int) -> Dict[int, List[int]]:
+        """Para cada ruta conectada con `route`, las paradas donde se puede transbordar."""
+        return {other: self.shared_stops(route, other) for other in self.connected_routes(route)}
+
+    def edges(self) -> List[Tuple[int, int]]:
+        return [(route, stop) for stop, routes in self._stop_routes.items() for route in routes]
+
+    def stats(self) -> dict:
+        return {
+            "pares": len(self._pairs),
+            "transbordos": sum(len(stops) for stops in self._pairs.values()),
+        }
+
+    def save(self, path: str, edges_hash: int) -> None:
+        """Guarda la tabla en `path` como tripletas (ruta, ruta, parada) de 64 bits."""
+        data = array("q")
+        for (first, second), stops in self._pairs.items():
+            for stop in stops:
+                data.extend((first, second, stop))
+        if sys.byteorder != "little":
+            data.byteswap()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, edges_hash, len(data) // 3))
+            data.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, edges: List[Tuple[int, int]], edges_hash: int) -> Optional["TransferTable"]:
+        """
+        Lee el snapshot de `path` si corresponde a `edges_hash`; si no existe, está
+        dañado o es de otra versión de los enlaces devuelve None.
+        """
+        try:
+            with open(path, "rb") as f:
+                magic, version, stored_hash, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _FORMAT_VERSION or stored_hash != edges_hash:
+                    return None
+                data = array("q")
+                data.fromfile(f, count * 3)
+        except (OSError, EOFError, struct.error) as e:
+            logger.info(f"Snapshot de transbordos no utilizable ({path}): {e}")
+            return None
+        if sys.byteorder != "little":
+            data.byteswap()
+        table = cls()
+        for route, stop in edges:
+            table._stop_routes.setdefault(stop, set()).add(route)
+        for i in range(0, len(data), 3):
+            pair = (data[i], data[i + 1])
+            table._pairs.setdefault(pair, array("q")).append(data[i + 2])
+        for pair in table._pairs:
+            table._link(*pair)
+        return table
+
+    @classmethod
+    def load_or_build(cls, edges: Iterable[Tuple[int, int]], path: Optional[str] = None) -> "TransferTable":
+        """Usa el snapshot de `path` si sigue vigente; si no, calcula la tabla y lo reescribe."""
+        edges = [(int(route), int(stop)) for route, stop in edges]
+        if not path:
+            return cls.from_edges(edges)
+        edges_hash = edge_hash(edges)
+        table = cls.load(path, edges, edges_hash)
+        if table is not None:
+            logger.info(f"Tabla de transbordos cargada desde {path}: {table.stats()}")
+            return table
+        table = cls.from_edges(edges)
+        try:
+            table.save(path, edges_hash)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el snapshot de transbordos en {path}: {e}")
+        return table
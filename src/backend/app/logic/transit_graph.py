@@ -0,0 +1,559 @@
+import asyncio
+import logging
+import pickle
+import threading
+import weakref
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import as_async
+from backend.app.logic.change_events import DELETE, INSERT, RESET, UPDATE, ChangeEvent
+from backend.app.logic.transfer_table import TransferTable
+from backend.app.logic.planner_cache import PlannerCache
+from backend.app.logic.spatial_index import GridIndex, parse_coordinates
+from backend.app.logic.timetable import Timetable, format_time, parse_time
+from backend.app.models.routes import Ruta
+from backend.app.models.rutaparada import RutaParada
+from backend.app.models.schedule import Schedule
+from backend.app.models.stops import Parada
+
+logger = logging.getLogger(__name__)
+
+SIN_INTERCONEXION = "Sin interconexión directa"
+GRAPH_TABLES = ("Rutas", "Parada", "RutaParada", "horario")
+
+
+def normalize_location(value: str) -> str:
+    """Ubicación sin espacios al inicio, al final ni repetidos."""
+    return " ".join(str(value).split())
+
+
+class TransitGraph:
+    """
+    Grafo de incidencia parada↔ruta en memoria.
+
+    Las rutas y las paradas se numeran con índices enteros consecutivos; cada ruta
+    guarda un `array` con los índices de sus paradas y cada parada uno con los de
+    sus rutas, así que recorrer la red no toca la base de datos.
+
+    Las paradas compartidas entre rutas salen de la `TransferTable` precalculada y
+    las que tienen coordenadas en su `Ubicacion` se indexan en una `GridIndex`.
+    Los cambios se aplican en el lugar con `apply`: agregar o quitar un enlace
+    cuesta O(grado). Las rutas y paradas eliminadas dejan su índice sin enlaces.
+    """
+
+    def __init__(self):
+        self.route_ids: List[Any] = []
+        self.route_names: List[str] = []
+        self.route_index: Dict[Any, int] = {}
+        # IDHorario de cada ruta y horarios como (salida, llegada) en segundos
+        self.route_schedules: List[Any] = []
+        self.schedules: Dict[Any, tuple] = {}
+        self._timetable: Optional[Timetable] = None
+        self.stop_ids: List[Any] = []
+        self.stop_locations: List[str] = []
+        self.stop_index: Dict[Any, int] = {}
+        # Ubicacion normalizada -> índices de las paradas con esa ubicación
+        self.stops_by_location: Dict[str, List[int]] = {}
+        # Índice de parada -> coordenadas de su Ubicacion, si las tiene
+        self.stop_grid = GridIndex()
+        self.route_stops: List[array] = []
+        self.stop_routes: List[array] = []
+        self.transfers = TransferTable()
+
+    @classmethod
+    def from_rows(
+        cls,
+        rutas: Iterable[dict],
+        paradas: Iterable[dict],
+        ruta_paradas: Iterable[dict],
+        horarios: Iterable[dict] = (),
+        snapshot_path: Optional[str] = None,
+    ) -> "TransitGraph":
+        """
+        Construye el grafo a partir de las filas de `Rutas`, `Parada`, `RutaParada` y
+        `horario`. Con `snapshot_path` la tabla de transbordos se lee del snapshot si
+        sigue vigente.
+        """
+        graph = cls()
+        for horario in horarios:
+            try:
+                graph.set_schedule(horario["ID"], horario["Salida"], horario["Llegada"])
+            except ValueError as e:
+                logger.warning(f"Horario {horario.get('ID')} ignorado: {e}")
+        for ruta in rutas:
+            graph.add_route(ruta["ID"], ruta["Nombre"], ruta.get("IDHorario"))
+        for parada in paradas:
+            graph.add_stop(parada["ID"], parada["Ubicacion"])
+        edges = []
+        for enlace in ruta_paradas:
+            if graph._link(enlace["IDRuta"], enlace["IDParada"]):
+                edges.append((enlace["IDRuta"], enlace["IDParada"]))
+        graph.transfers = TransferTable.load_or_build(edges, snapshot_path)
+        return graph
+
+    def add_route(self, route_id: Any, name: str, schedule_id: Any = None) -> int:
+        self._timetable = None
+        index = self.route_index.get(route_id)
+        if index is not None:
+            self.route_names[index] = name
+            if schedule_id is not None:
+                self.route_schedules[index] = schedule_id
+            return index
+        index = len(self.route_ids)
+        self.route_ids.append(route_id)
+        self.route_names.append(name)
+        self.route_schedules.append(schedule_id)
+        self.route_index[route_id] = index
+        self.route_stops.append(array("i"))
+        return index
+
+    def set_schedule(self, schedule_id: Any, salida: Any, llegada: Any) -> None:
+        self.schedules[schedule_id] = (parse_time(salida), parse_time(llegada))
+        self._timetable = None
+
+    def remove_schedule(self, schedule_id: Any) -> bool:
+        self._timetable = None
+        return self.schedules.pop(schedule_id, None) is not None
+
+    def timetable(self) -> Timetable:
+        """Arreglos de horarios por ruta; se reconstruyen tras cambios de rutas u horarios."""
+        timetable = self._timetable
+        if timetable is None:
+            timetable = self._timetable = Timetable.from_graph(self)
+        return timetable
+
+    def add_stop(self, stop_id: Any, location: str) -> int:
+        index = self.stop_index.get(stop_id)
+        if index is not None:
+            return index
+        index = len(self.stop_ids)
+        self.stop_ids.append(stop_id)
+        self.stop_locations.append(location)
+        self.stop_index[stop_id] = index
+        self._index_location(index)
+        self.stop_routes.append(array("i"))
+        return index
+
+    def link(self, route_id: Any, stop_id: Any) -> bool:
+        """Agrega la parada a la ruta; ignora enlaces a rutas o paradas desconocidas."""
+        if not self._link(route_id, stop_id):
+            return False
+        self.transfers.add_edge(route_id, stop_id)
+        return True
+
+    def _link(self, route_id: Any, stop_id: Any) -> bool:
+        route = self.route_index.get(route_id)
+        stop = self.stop_index.get(stop_id)
+        if route is None or stop is None:
+            logger.warning(f"RutaParada ignorada: ruta {route_id} o parada {stop_id} no existe")
+            return False
+        if stop in self.route_stops[route]:
+            return False
+        self.route_stops[route].append(stop)
+        self.stop_routes[stop].append(route)
+        return True
+
+    def unlink(self, route_id: Any, stop_id: Any) -> bool:
+        """Quita la parada de la ruta; devuelve False si el enlace no existía."""
+        route = self.route_index.get(route_id)
+        stop = self.stop_index.get(stop_id)
+        if route is None or stop is None or stop not in self.route_stops[route]:
+            return False
+        self.route_stops[route].remove(stop)
+        self.stop_routes[stop].remove(route)
+        self.transfers.remove_edge(route_id, stop_id)
+        return True
+
+    def remove_route(self, route_id: Any) -> bool:
+        route = self.route_index.pop(route_id, None)
+        if route is None:
+            return False
+        for stop in self.route_stops[route]:
+            self.stop_routes[stop].remove(route)
+            self.transfers.remove_edge(route_id, self.stop_ids[stop])
+        del self.route_stops[route][:]
+        return True
+
+    def remove_stop(self, stop_id: Any) -> bool:
+        stop = self.stop_index.pop(stop_id, None)
+        if stop is None:
+            return False
+        for route in self.stop_routes[stop]:
+            self.route_stops[route].remove(stop)
+            self.transfers.remove_edge(self.route_ids[route], stop_id)
+        del self.stop_routes[stop][:]
+        self._unindex_location(stop)
+        return True
+
+    def move_stop(self, stop_id: Any, location: str) -> bool:
+        """Cambia la ubicación de una parada (o la agrega si no existe)."""
+        stop = self.stop_index.get(stop_id)
+        if stop is None:
+            self.add_stop(stop_id, location)
+            return True
+        if self.stop_locations[stop] == location:
+            return False
+        self._unindex_location(stop)
+        self.stop_locations[stop] = location
+        self._index_location(stop)
+        return True
+
+    def _index_location(self, stop: int) -> None:
+        location = self.stop_locations[stop]
+        self.stops_by_location.setdefault(normalize_location(location), []).append(stop)
+        coordinates = parse_coordinates(location)
+        if coordinates is not None:
+            self.stop_grid.upsert(stop, *coordinates)
+
+    def _unindex_location(self, stop: int) -> None:
+        self.stop_grid.remove(stop)
+        location = normalize_location(self.stop_locations[stop])
+        stops = self.stops_by_location.get(location, [])
+        if stop in stops:
+            stops.remove(stop)
+        if not stops:
+            self.stops_by_location.pop(location, None)
+
+    def apply(self, event: ChangeEvent) -> Optional[bool]:
+        """
+        Aplica un cambio de `Rutas`, `Parada` o `RutaParada`. Devuelve si el grafo
+        cambió, o None si el evento no trae datos suficientes y hay que recargarlo.
+        """
+        table, action, data = event.table.lower(), event.action, event.data
+        if action == RESET:
+            return None
+        if table == "rutaparada":
+            if "IDRuta" not in data or "IDParada" not in data:
+                return None
+            if action == INSERT:
+                return self.link(data["IDRuta"], data["IDParada"])
+            if action == DELETE:
+                return self.unlink(data["IDRuta"], data["IDParada"])
+            previous = event.previous or data
+            removed = self.unlink(previous["IDRuta"], previous["IDParada"])
+            return self.link(data["IDRuta"], data["IDParada"]) or removed
+        if data.get("ID") is None:
+            return None
+        if table == "rutas":
+            if action == DELETE:
+                return self.remove_route(data["ID"])
+            if "Nombre" not in data:
+                return None
+            self.add_route(data["ID"], data["Nombre"], data.get("IDHorario"))
+            return True
+        if table == "horario":
+            if action == DELETE:
+                return self.remove_schedule(data["ID"])
+            if "Salida" not in data or "Llegada" not in data:
+                return None
+            self.set_schedule(data["ID"], data["Salida"], data["Llegada"])
+            return True
+        if table == "parada":
+            if action == DELETE:
+                return self.remove_stop(data["ID"])
+            if "Ubicacion" not in data:
+                return None
+            if action == INSERT and data["ID"] not in self.stop_index:
+                self.add_stop(data["ID"], data["Ubicacion"])
+                return True
+            return self.move_stop(data["ID"], data["Ubicacion"])
+        return False
+
+    def stops_at(self, location: str) -> List[int]:
+        """
+        Índices de las paradas con la ubicación dada (sin distinguir espacios
+        sobrantes). Si ninguna coincide y `location` es una coordenada `"lat, lon"`,
+        las paradas a menos de `PLANNER_WALK_RADIUS_METERS`, de la más cercana a la más lejana.
+        """
+        stops = self.stops_by_location.get(normalize_location(location))
+        if stops:
+            return stops
+        coordinates = parse_coordinates(location)
+        if coordinates is None:
+            return []
+        return [stop for stop, _ in self.stop_grid.nearby(*coordinates, settings.PLANNER_WALK_RADIUS_METERS)]
+
+    def routes_at(self, location: str) -> List[int]:
+        """Índices de las rutas que pasan por alguna parada con la ubicación dada."""
+        routes = set()
+        for stop in self.stops_at(location):
+            routes.update(self.stop_routes[stop])
+        return sorted(routes)
+
+    def shared_stops(self, first: int, second: int) -> List[int]:
+        """Índices de las paradas comunes a dos rutas, según la tabla de transbordos."""
+        shared = self.transfers.shared_stops(self.route_ids[first], self.route_ids[second])
+        return [self.stop_index[stop] for stop in shared if stop in self.stop_index]
+
+    def neighbours(self, route: int) -> List[int]:
+        """Rutas con las que `route` comparte al menos una parada."""
+        connected = self.transfers.connected_routes(self.route_ids[route])
+        return sorted(self.route_index[other] for other in connected if other in self.route_index)
+
+    def stats(self) -> dict:
+        return {
+            "rutas": len(self.route_index),
+            "paradas": len(self.stop_index),
+            "enlaces": sum(len(stops) for stops in self.route_stops),
+            **self.transfers.stats(),
+        }
+
+
+class RoutePlanner:
+    """
+    Planificador de viajes sobre un `TransitGraph`.
+
+    Hace una búsqueda en anchura sobre las rutas (cada nivel es un transbordo más)
+    partiendo de todas las rutas que pasan por el origen, y arma los itinerarios
+    hacia las rutas del destino ordenados por número de transbordos.
+
+    Con hora de salida (`plan_at`) usa los horarios de las rutas para buscar los
+    itinerarios de llegada más temprana (ver `Timetable`).
+
+    El grafo queda residente: se suscribe al bus de cambios del controlador y
+    aplica cada escritura de `Rutas`, `Parada`, `RutaParada` y `horario` sin recargarlo.
+    `version` aumenta con cada cambio aplicado y se devuelve como `graph_version`.
+
+    Las respuestas se guardan en una `PlannerCache` con llave
+    `(modo, entrada, final[, hora], versión)`, que se vacía cuando el grafo cambia.
+    """
+
+    def __init__(
+        self,
+        controller: Any,
+        max_transfers: Optional[int] = None,
+        max_itineraries: Optional[int] = None,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.controller = controller
+        self.snapshot_path = snapshot_path
+        self.max_transfers = settings.PLANNER_MAX_TRANSFERS if max_transfers is None else max_transfers
+        self.max_itineraries = max_itineraries or settings.PLANNER_MAX_ITINERARIES
+        self.graph: Optional[TransitGraph] = None
+        self.version = 0
+        self.cache = PlannerCache(settings.PLANNER_CACHE_SIZE, settings.PLANNER_CACHE_TTL)
+        # Cambios recibidos mientras se carga el grafo; se aplican al terminar la carga
+        self._pending: Optional[List[ChangeEvent]] = None
+        # asyncio.Lock queda ligado a un loop, así que se guarda uno por loop
+        self._load_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        events = getattr(controller, "events", None)
+        if events is not None:
+            events.subscribe(self.on_change, tables=GRAPH_TABLES)
+
+    def _load_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._load_locks.get(loop)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._load_locks[loop] = lock
+            return lock
+
+    async def load(self) -> TransitGraph:
+        """Devuelve el grafo, cargándolo de la base de datos la primera vez."""
+        if self.graph is not None:
+            return self.graph
+        async with self._load_lock():
+            if self.graph is None:
+                with self._lock:
+                    self._pending = []
+                db = as_async(self.controller)
+                try:
+                    # Lecturas en serie: el controlador SQLite síncrono comparte un solo cursor
+                    rutas = await db.read_all(Ruta)
+                    paradas = await db.read_all(Parada)
+                    ruta_paradas = await db.read_all(RutaParada)
+                    graph = TransitGraph.from_rows(
+                        rutas, paradas, ruta_paradas, await db.read_all(Schedule), snapshot_path=self.snapshot_path
+                    )
+                finally:
+                    with self._lock:
+                        pending, self._pending = self._pending, None
+                with self._lock:
+                    # Los cambios concurrentes con la lectura pueden estar ya reflejados;
+                    # volver a aplicarlos no tiene efecto
+                    for event in pending:
+                        graph.apply(event)
+                    self.graph = graph
+                    self.version += 1
+                self.cache.invalidate()
+                logger.info(f"Grafo de transporte cargado (versión {self.version}): {graph.stats()}")
+        return self.graph
+
+    def reset(self) -> None:
+        """Descarta el grafo para que se recargue en la próxima consulta."""
+        with self._lock:
+            self.graph = None
+            self.version += 1
+        self.cache.invalidate()
+
+    def snapshot(self) -> Tuple[int, bytes]:
+        """Versión y copia serializada del grafo cargado, para planificar en otros procesos."""
+        with self._lock:
+            if self.graph is None:
+                raise RuntimeError("El grafo de rutas no está cargado.")
+            return self.version, pickle.dumps(self.graph, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def on_change(self, event: ChangeEvent) -> None:
+        """Aplica al grafo residente un cambio publicado por el controlador."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            if self.graph is None:
+                return
+            changed = self.graph.apply(event)
+            if changed is None:
+                logger.info(f"Grafo de transporte descartado por {event.action} en {event.table}")
+                self.graph = None
+                self.version += 1
+            elif changed:
+                self.version += 1
+        if changed is not False:
+            self.cache.invalidate()
+
+    async def plan(self, ubicacion_llegada: str, ubicacion_final: str) -> dict:
+        """Itinerarios por mínimo de transbordos (ver `search`), servidos desde la caché."""
+        entrada, final = normalize_location(ubicacion_llegada), normalize_location(ubicacion_final)
+        return await self._cached(("rutas", entrada, final), lambda graph: self.search(graph, entrada, final))
+
+    async def plan_at(self, ubicacion_llegada: str, ubicacion_final: str, hora_salida: str) -> dict:
+        """Como `plan`, pero con itinerarios de llegada más temprana saliendo a `hora_salida`."""
+        departure = parse_time(hora_salida)
+        entrada, final = normalize_location(ubicacion_llegada), normalize_location(ubicacion_final)
+        return await self._cached(
+            ("horario", entrada, final, departure),
+            lambda graph: self.search_at(graph, entrada, final, departure),
+        )
+
+    async def _cached(self, key: tuple, search) -> dict:
+        try:
+            graph = await self.load()
+
+            def run_search() -> dict:
+                with self._lock:
+                    response = search(self.graph or graph)
+                    response["graph_version"] = self.version
+                return response
+
+            async def compute() -> dict:
+                # En un hilo: la búsqueda no bloquea el loop y las peticiones
+                # idénticas que llegan mientras tanto esperan este mismo cálculo
+                return await asyncio.get_running_loop().run_in_executor(None, run_search)
+
+            return await self.cache.get_or_compute(
+                (*key, self.version), compute, cacheable=lambda response: "error" not in response
+            )
+        except Exception as e:
+            response = {"error": f"Error al obtener la ruta: {str(e)}"}
+            logger.error(response["error"])
+            return response
+
+    def search_at(self, graph: TransitGraph, ubicacion_llegada: str, ubicacion_final: str, departure: int) -> dict:
+        """
+        Itinerarios que salen de `ubicacion_llegada` a partir de `departure` (segundos
+        desde la medianoche), ordenados por hora de llegada a `ubicacion_final`.
+        """
+        if not graph.routes_at(ubicacion_llegada):
+            return {"mensaje": "No se encontraron rutas desde la ubicación de llegada."}
+        if not graph.routes_at(ubicacion_final):
+            return {"mensaje": "No se encontraron rutas hacia la ubicación final."}
+        itineraries = graph.timetable().earliest_arrival(
+            graph, ubicacion_llegada, ubicacion_final, departure, self.max_transfers
+        )
+        if not itineraries:
+            return {"mensaje": "No se encontraron viajes después de la hora de salida."}
+        for itinerary in itineraries:
+            itinerary["interconexion"] = itinerary["interconexion"] or SIN_INTERCONEXION
+        return {"hora_salida": format_time(departure), "interconexiones": itineraries[:self.max_itineraries]}
+
+    def search(self, graph: TransitGraph, ubicacion_llegada: str, ubicacion_final: str) -> dict:
+        """
+        Itinerarios de `ubicacion_llegada` a `ubicacion_final` con la forma de
+        respuesta de `ruta_interconexion`, más `transbordos` y `tramos` por itinerario.
+        """
+        origins = graph.routes_at(ubicacion_llegada)
+        if not origins:
+            return {"mensaje": "No se encontraron rutas desde la ubicación de llegada."}
+        targets = set(graph.routes_at(ubicacion_final))
+        if not targets:
+            return {"mensaje": "No se encontraron rutas hacia la ubicación final."}
+
+        depth, parents = self._explore(graph, origins, targets)
+        itineraries = []
+        for target in sorted(targets, key=lambda route: (depth.get(route, -1), graph.route_names[route])):
+            if target not in depth:
+                continue
+            for path in self._paths(parents, target, targets):
+                itineraries.append(self._itinerary(graph, path, ubicacion_llegada, ubicacion_final))
+                if len(itineraries) >= self.max_itineraries:
+                    break
+            if len(itineraries) >= self.max_itineraries:
+                break
+        if not itineraries:
+            return {"mensaje": "No se encontraron rutas con interconexión."}
+        return {"interconexiones": itineraries}
+
+    def _explore(self, graph: TransitGraph, origins: List[int], targets: set):
+        """BFS multiorigen: profundidad (transbordos) y predecesores de cada ruta alcanzada."""
+        depth = {route: 0 for route in origins}
+        parents: Dict[int, List[int]] = {route: [] for route in origins}
+        frontier = deque(origins)
+        while frontier:
+            route = frontier.popleft()
+            # Desde una ruta del destino no hace falta seguir transbordando
+            if route in targets or depth[route] >= self.max_transfers:
+                continue
+            for neighbour in graph.neighbours(route):
+                if neighbour not in depth:
+                    depth[neighbour] = depth[route] + 1
+                    parents[neighbour] = [route]
+                    frontier.append(neighbour)
+                elif depth[neighbour] == depth[route] + 1:
+                    parents[neighbour].append(route)
+        return depth, parents
+
+    def _paths(self, parents: Dict[int, List[int]], target: int, targets: set):
+        """Genera las secuencias de rutas de mínimo transbordo que terminan en `target`."""
+        stack = [[target]]
+        while stack:
+            path = stack.pop()
+            previous = parents[path[-1]]
+            if not previous:
+                yield path[::-1]
+                continue
+            for route in sorted(previous, reverse=True):
+                if route not in targets:
+                    stack.append(path + [route])
+
+    @staticmethod
+    def _itinerary(graph: TransitGraph, path: List[int], origen: str, destino: str) -> dict:
+        transfers = [graph.stop_locations[graph.shared_stops(a, b)[0]] for a, b in zip(path, path[1:])]
+        stops = [origen, *transfers, destino]
+        return {
+            "ruta_inicio": graph.route_names[path[0]],
+            "ruta_final": graph.route_names[path[-1]],
+            "interconexion": transfers[0] if transfers else SIN_INTERCONEXION,
+            "transbordos": len(transfers),
+            "tramos": [
+                {"ruta": graph.route_names[route], "desde": stops[i], "hasta": stops[i + 1]}
+                for i, route in enumerate(path)
+            ],
+        }
+
+
+_planners: "weakref.WeakKeyDictionary[Any, RoutePlanner]" = weakref.WeakKeyDictionary()
+_planners_lock = threading.Lock()
+
+
+def route_planner_for(controller: Any) -> RoutePlanner:
+    """Devuelve el planificador del proceso para `controller`."""
+    with _planners_lock:
+        planner = _planners.get(controller)
+        if planner is None:
+            planner = RoutePlanner(controller, snapshot_path=settings.PLANNER_TRANSFER_SNAPSHOT)
+            _planners[controller] = planner
+        return planner
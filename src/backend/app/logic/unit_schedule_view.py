@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import weakref
+from typing import Any, Optional, Tuple
+
+from backend.app.logic.async_controller import as_async
+from backend.app.logic.change_events import ChangeEvent
+from backend.app.models.routes import Ruta
+from backend.app.models.schedule import Schedule
+from backend.app.models.transport import UnidadTransporte
+from backend.app.models.type_transport import TypeTransportCreate
+
+logger = logging.getLogger(__name__)
+
+VIEW_TABLES = (
+    UnidadTransporte.__entity_name__,
+    Ruta.__entity_name__,
+    Schedule.__entity_name__,
+    TypeTransportCreate.__entity_name__,
+)
+
+
+def join_units(unidades: list, rutas: list, horarios: list, tipos: list) -> list:
+    """Unidades con el nombre de su ruta y tipo de transporte y el horario de la ruta (`horarios`)."""
+    rutas_by_id = {ruta["ID"]: ruta for ruta in rutas}
+    horarios_by_id = {horario["ID"]: horario for horario in horarios}
+    tipos_by_id = {tipo["ID"]: tipo["TipoTransporte"] for tipo in tipos}
+    resultado = []
+    for unidad in unidades:
+        ruta = rutas_by_id.get(unidad.get("IDRuta"))
+        horario = horarios_by_id.get(ruta.get("IDHorario")) if ruta else None
+        resultado.append({
+            **unidad,
+            "NombreRuta": ruta["Nombre"] if ruta else None,
+            "NombreTipoTransporte": tipos_by_id.get(unidad.get("IDTipo")),
+            "horarios": [horario] if horario else [],
+        })
+    return resultado
+
+
+class UnitScheduleView:
+    """
+    Vista materializada de `/transport_units/with_schedules`.
+
+    El cruce de unidades, rutas, tipos de transporte y horarios se arma una vez y
+    se guarda ya serializado junto con su ETag (hash del cuerpo). Cualquier cambio
+    en esas tablas publicado por el controlador sube `version` y descarta la vista;
+    la siguiente consulta la vuelve a armar. Como el ETag depende solo del
+    contenido, sigue siendo válido entre reinicios y entre procesos.
+    """
+
+    def __init__(self, controller: Any):
+        self.controller = controller
+        self.version = 0
+        # (versión, cuerpo JSON, ETag) de la vista armada, o None si hay que armarla
+        self._view: Optional[Tuple[int, bytes, str]] = None
+        self._lock = threading.Lock()
+        self._load_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._builds = 0
+        self._hits = 0
+        events = getattr(controller, "events", None)
+        if events is not None:
+            events.subscribe(self.on_change, tables=VIEW_TABLES)
+
+    def _load_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._load_locks.get(loop)
+            if lock is None:
+                lock = self._load_locks[loop] = asyncio.Lock()
+            return lock
+
+    def on_change(self, event: ChangeEvent) -> None:
+        with self._lock:
+            self.version += 1
+            self._view = None
+
+    async def get(self) -> Tuple[bytes, str]:
+        """Cuerpo JSON y ETag de la vista, armándola si algún cambio la descartó."""
+        view = self._view
+        if view is not None:
+            with self._lock:
+                self._hits += 1
+            return view[1], view[2]
+        async with self._load_lock():
+            view = self._view
+            if view is not None:
+                return view[1], view[2]
+            version = self.version
+            db = as_async(self.controller)
+            # Lecturas en serie: el controlador SQLite síncrono comparte un solo cursor
+            unidades = await db.read_all(UnidadTransporte)
+            rutas = await db.read_all(Ruta)
+            horarios = await db.read_all(Schedule)
+            tipos = await db.read_all(TypeTransportCreate)
+            body = json.dumps(join_units(unidades, rutas, horarios, tipos), default=str).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            with self._lock:
+                self._builds += 1
+                # Si algo cambió durante la lectura, esta respuesta se entrega pero no se guarda
+                if self.version == version:
+                    self._view = (version, body, etag)
+            logger.info(f"Vista de unidades con horarios armada (versión {version}): {len(unidades)} unidades")
+            return body, etag
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "materialized": self._view is not None,
+                "bytes": len(self._view[1]) if self._view is not None else None,
+                "builds": self._builds,
+                "hits": self._hits,
+            }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True si el encabezado `If-None-Match` incluye `etag` (o es `*`)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+_views: "weakref.WeakKeyDictionary[Any, UnitScheduleView]" = weakref.WeakKeyDictionary()
+_views_lock = threading.Lock()
+
+
+def unit_schedule_view_for(controller: Any) -> UnitScheduleView:
+    """Devuelve la vista de unidades con horarios del proceso para `controller`."""
+    with _views_lock:
+        view = _views.get(controller)
+        if view is None:
+            view = _views[controller] = UnitScheduleView(controller)
+        return view
@@ -0,0 +1,419 @@
+import asyncio
+import functools
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional
+
+import aiosqlite
+from backend.app.logic.schema_registry import SchemaRegistry
+from backend.app.logic.keyset import build_keyset_query, page_result
+from backend.app.logic.counter_cache import CounterCache
+from backend.app.logic.change_events import DELETE, INSERT, UPDATE, ChangeBus
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSQLiteBackend:
+    """
+    Backend asíncrono sobre SQLite (aiosqlite) usado como sustituto local de SQL Server.
+
+    Mantiene un pequeño pool de conexiones en modo WAL para que las lecturas
+    concurrentes no se bloqueen entre sí.
+    """
+
+    now_sql = "datetime('now')"
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle: Optional[asyncio.Queue] = None
+        self._opened = 0
+        self._all: List[aiosqlite.Connection] = []
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        self._all.append(conn)
+        return conn
+
+    @asynccontextmanager
+    async def connection(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._idle.empty() and self._opened < self.pool_size:
+            self._opened += 1
+            try:
+                conn = await self._open()
+            except Exception:
+                self._opened -= 1
+                raise
+        else:
+            conn = await self._idle.get()
+        try:
+            yield conn
+        except BaseException:
+            # También si la tarea se cancela: la conexión no vuelve al pool con una transacción abierta
+            await asyncio.shield(conn.rollback())
+            raise
+        finally:
+            self._idle.put_nowait(conn)
+
+    def limit(self, sql: str, count: int) -> str:
+        return f"{sql} LIMIT {int(count)}"
+
+    async def close(self) -> None:
+        for conn in self._all:
+            await conn.close()
+        self._all.clear()
+        self._idle = None
+        self._opened = 0
+
+
+class AsyncUniversalController:
+    """
+    Implementación nativa en asyncio de la API de `UniversalController`.
+
+    Cada método es una corutina; ninguna consulta ocupa un hilo del servidor
+    mientras espera a la base de datos.
+    """
+
+    def __init__(self, backend: AsyncSQLiteBackend, counters: Optional[CounterCache] = None, events: Optional[ChangeBus] = None):
+        self.backend = backend
+        self.schema = SchemaRegistry()
+        # Se pueden compartir con el controlador síncrono de la misma base de datos
+        self.counters = counters or CounterCache()
+        self.events = events or ChangeBus()
+
+    def _get_table_name(self, obj: Any) -> str:
+        if hasattr(obj, "__entity_name__"):
+            return obj.__entity_name__
+        elif hasattr(obj.__class__, "__entity_name__"):
+            return obj.__class__.__entity_name__
+        else:
+            raise ValueError("El objeto o su clase no tienen definido '__entity_name__'.")
+
+    @staticmethod
+    def _build(cls: Any, row: dict) -> Any:
+        return cls.from_dict(row) if hasattr(cls, "from_dict") else cls(**row)
+
+    async def _fetchall(self, sql: str, params: tuple = ()) -> List[dict]:
+        async with self.backend.connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def _fetchone(self, sql: str, params: tuple = ()) -> Optional[dict]:
+        async with self.backend.connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+
+    async def _scalar(self, sql: str, params: tuple = (), default: Any = None) -> Any:
+        async with self.backend.connection() as conn:
+            async with conn.execute(sql, params) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row and row[0] is not None else default
+
+    async def _write(self, sql: str, params: tuple = ()) -> int:
+        async with self.backend.connection() as conn:
+            cursor = await conn.execute(sql, params)
+            await conn.commit()
+            return cursor.rowcount
+
+    async def _emit(self, table: str, action: str, data: dict) -> None:
+        """
+        Publica el cambio desde un hilo del pool: los oyentes son síncronos y pueden
+        tomar locks o escribir en la base de datos, lo que bloquearía el event loop.
+        El cambio ya está confirmado, así que se publica aunque la tarea se cancele.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.shield(loop.run_in_executor(None, functools.partial(self.events.emit, table, action, data)))
+
+    async def _ensure_table_exists(self, obj: Any) -> None:
+        """Crea la tabla si no existe (una sola vez por tabla en este controlador)."""
+        table = self._get_table_name(obj)
+        if self.schema.is_known(table):
+            return
+        fields = obj.get_fields()
+        columns = ", ".join(f"{k} {v}" for k, v in fields.items())
+        await self._write(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        self.schema.mark(table)
+
+    def refresh_schema(self, table: str = None) -> None:
+        """Olvida las tablas verificadas para que se comprueben de nuevo en el próximo uso."""
+        self.schema.refresh(table)
+
+    async def read_all(self, obj: Any) -> list[dict]:
+        await self._ensure_table_exists(obj)
+        table = self._get_table_name(obj)
+        return await self._fetchall(f"SELECT * FROM {table}")
+
+    async def read_page(self, cls: Any, limit: int, after: Any = None, columns: List[str] = None, filters: dict = None) -> dict:
+        """Hasta `limit` registros con ID mayor que `after`, ordenados por ID."""
+        await self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters, after)
+        rows = await self._fetchall(self.backend.limit(f"SELECT {query}", int(limit) + 1), tuple(params))
+        return page_result(rows, limit)
+
+    async def iter_rows(self, cls: Any, columns: List[str] = None, filters: dict = None, batch_size: int = 500):
+        """Recorre la tabla en orden de ID leyendo de a `batch_size` filas."""
+        await self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters)
+        async with self.backend.connection() as conn:
+            async with conn.execute(f"SELECT {query}", tuple(params)) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+
+    async def get_by_id(self, cls: Any, id_value: Any) -> Any | None:
+        return await self.get_by_column(cls, "ID", id_value)
+
+    async def get_by_column(self, cls: Any, column_name: str, value: Any) -> Any | None:
+        if column_name not in cls.get_fields():
+            raise ValueError(f"La columna '{column_name}' no existe en '{self._get_table_name(cls)}'.")
+        await self._ensure_table_exists(cls)
+        table = self._get_table_name(cls)
+        row = await self._fetchone(f"SELECT * FROM {table} WHERE {column_name} = ?", (value,))
+        return self._build(cls, row) if row else None
+
+    async def add(self, obj: Any) -> Any:
+        """Agrega un nuevo registro a la tabla correspondiente al objeto proporcionado."""
+        await self._ensure_table_exists(obj)
+        table = self._get_table_name(obj)
+        data = obj.to_dict()
+        if "ID" in data and data["ID"] is None:
+            del data["ID"]
+        columns = ", ".join(data.keys())
+        placeholders = ", ".join("?" for _ in data)
+        try:
+            await self._write(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", tuple(data.values()))
+        except aiosqlite.IntegrityError as e:
+            raise ValueError(f"Error al agregar el registro: {e}")
+        self.counters.adjust(table, 1)
+        await self._emit(table, INSERT, obj.to_dict())
+        return obj
+
+    async def update(self, obj: Any) -> Any:
+        """Actualiza un registro en la tabla correspondiente al objeto proporcionado."""
+        await self._ensure_table_exists(obj)
+        table = self._get_table_name(obj)
+        data = obj.to_dict()
+        if "ID" not in data or data["ID"] is None:
+            raise ValueError("El objeto debe tener un campo 'ID' válido para ser actualizado.")
+        columns = [f"{key} = ?" for key in data if key != "ID"]
+        values = [data[key] for key in data if key != "ID"] + [data["ID"]]
+        updated = await self._write(f"UPDATE {table} SET {', '.join(columns)} WHERE ID = ?", tuple(values))
+        if updated == 0:
+            raise ValueError(f"No se encontró un registro con ID = {data['ID']} en la tabla '{table}'.")
+        self.counters.adjust(table, 0)
+        await self._emit(table, UPDATE, data)
+        return obj
+
+    async def delete(self, obj: Any) -> bool:
+        """Elimina un registro de la tabla correspondiente al objeto proporcionado."""
+        await self._ensure_table_exists(obj)
+        table = self._get_table_name(obj)
+        data = obj.to_dict()
+        if "ID" not in data or data["ID"] is None:
+            raise ValueError("El objeto debe tener un campo 'ID' válido para ser eliminado.")
+        deleted = await self._write(f"DELETE FROM {table} WHERE ID = ?", (data["ID"],))
+        if deleted > 0:
+            self.counters.adjust(table, -deleted)
+            await self._emit(table, DELETE, data)
+        return deleted > 0
+
+    async def get_by_unit(self, cls: Any, unit_id: int) -> Any | None:
+        table = self._get_table_name(cls)
+        row = await self._fetchone(f"SELECT * FROM {table} WHERE idunidad = ?", (unit_id,))
+        return self._build(cls, row) if row else None
+
+    # Reportes
+    async def total_registros(self, table: str, condition: str = "") -> int:
+        """Generar la consulta total por tabla (servida desde la caché de conteos si está vigente)"""
+        value = self.counters.lookup(table, condition)
+        if value is None:
+            value = await self._scalar(f"SELECT COUNT(*) FROM {table} {condition}", default=0)
+            self.counters.store(table, condition, value)
+        return value
+
+    async def total_movimientos(self) -> int:
+        return await self.total_registros('movimiento')
+
+    async def total_unidades(self) -> int:
+        return await self.total_registros('unidadtransporte')
+
+    async def total_pasajeros(self) -> int:
+        return await self.total_registros('Usuario', "WHERE IDRolUsuario = 1")
+
+    async def total_operarios(self) -> int:
+        return await self.total_registros('usuario', "WHERE IDRolUsuario = 2")
+
+    async def total_supervisores(self) -> int:
+        return await self.total_registros('usuario', "WHERE IDRolUsuario = 3")
+
+    async def total_mantenimiento(self) -> int:
+        return await self.total_registros('mantenimientoins')
+
+    async def proximos_mantenimientos(self) -> int:
+        return await self.total_registros('mantenimientoins', f"WHERE fecha < {self.backend.now_sql}")
+
+    async def alerta_mantenimiento_atrasados(self) -> list:
+        return await self._fetchall(f"SELECT * FROM mantenimientoins WHERE fecha < {self.backend.now_sql}")
+
+    async def alerta_mantenimiento_proximos(self) -> list:
+        now = self.backend.now_sql
+        return await self._fetchall(
+            f"SELECT * FROM mantenimientoins WHERE fecha BETWEEN {now} AND datetime({now}, '+7 days')"
+        )
+
+    async def total_usuarios(self) -> int:
+        return await self.total_registros('usuario')
+
+    async def promedio_horas_trabajadas(self) -> float:
+        return await self._scalar("SELECT AVG(horastrabajadas) FROM rendimiento", default=0.0)
+
+    async def last_card_used(self, user_id: int) -> dict:
+        """Retorna el último uso de tarjeta del usuario como un dict con 'tipo' y 'monto'."""
+        query = self.backend.limit("""
+            SELECT tm.TipoMovimiento, m.Monto
+            FROM Pago p
+            INNER JOIN Movimiento m ON p.IDMovimiento = m.ID
+            INNER JOIN TipoMovimiento tm ON m.IDTipoMovimiento = tm.ID
+            INNER JOIN Tarjeta t ON p.IDTarjeta = t.ID
+            WHERE t.IDUsuario = ?
+            ORDER BY m.ID DESC""", 1)
+        row = await self._fetchone(query, (user_id,))
+        if row:
+            return {"tipo": row["TipoMovimiento"], "monto": row["Monto"]}
+        return {"tipo": "N/A", "monto": "N/A"}
+
+    async def get_turno_usuario(self, user_id: int) -> Any:
+        """Obtiene el turno de un usuario según su ID."""
+        query = """
+            SELECT t.TipoTurno
+            FROM Usuario u
+            JOIN Turno t ON u.IDTurno = t.ID
+            WHERE u.ID = ?
+        """
+        return await self._scalar(query, (user_id,), default=0.0)
+
+    async def get_saldo_usuario(self, user_id: int) -> float:
+        """Obtiene el saldo de un usuario según su ID desde la tabla Tarjeta."""
+        return await self._scalar("SELECT Saldo FROM Tarjeta WHERE IDUsuario = ?", (user_id,), default=0.0)
+
+    def _dashboard_counters(self) -> dict:
+        return {
+            "total_unidades": ("unidadtransporte", ""),
+            "total_pasajeros": ("Usuario", "WHERE IDRolUsuario = 1"),
+            "total_operarios": ("usuario", "WHERE IDRolUsuario = 2"),
+            "total_supervisores": ("usuario", "WHERE IDRolUsuario = 3"),
+            "total_mantenimiento": ("mantenimientoins", ""),
+            "proximos_mantenimientos": ("mantenimientoins", f"WHERE fecha < {self.backend.now_sql}"),
+        }
+
+    async def dashboard_globals(self) -> dict:
+        """
+        Contadores globales del dashboard, desde la caché de conteos o, si alguno
+        venció, todos en una sola consulta.
+        """
+        specs = self._dashboard_counters()
+        cached = {name: self.counters.lookup(*spec) for name, spec in specs.items()}
+        if all(value is not None for value in cached.values()):
+            return cached
+        query = "SELECT " + ", ".join(
+            f"(SELECT COUNT(*) FROM {table} {condition}) AS {name}" for name, (table, condition) in specs.items()
+        )
+        values = await self._fetchone(query)
+        for name, (table, condition) in specs.items():
+            self.counters.store(table, condition, values[name])
+        return values
+
+    async def dashboard_user(self, user_id: int) -> dict:
+        """
+        Campos del dashboard de un usuario: tipo de tarjeta, turno y saldo en una
+        consulta y el último uso de la tarjeta en otra, sobre la misma conexión.
+        """
+        fields_query = """
+            SELECT
+                (SELECT tt.Tipo FROM Tarjeta t JOIN TipoTarjeta tt ON t.IDTipoTarjeta = tt.ID WHERE t.IDUsuario = ? LIMIT 1) AS type_card,
+                (SELECT tu.TipoTurno FROM Usuario u JOIN Turno tu ON u.IDTurno = tu.ID WHERE u.ID = ? LIMIT 1) AS turno,
+                (SELECT Saldo FROM Tarjeta WHERE IDUsuario = ? LIMIT 1) AS saldo
+        """
+        last_query = self.backend.limit("""
+            SELECT tm.TipoMovimiento, m.Monto
+            FROM Pago p
+            INNER JOIN Movimiento m ON p.IDMovimiento = m.ID
+            INNER JOIN TipoMovimiento tm ON m.IDTipoMovimiento = tm.ID
+            INNER JOIN Tarjeta t ON p.IDTarjeta = t.ID
+            WHERE t.IDUsuario = ?
+            ORDER BY m.ID DESC""", 1)
+        async with self.backend.connection() as conn:
+            async with conn.execute(fields_query, (user_id, user_id, user_id)) as cursor:
+                fields = await cursor.fetchone()
+            async with conn.execute(last_query, (user_id,)) as cursor:
+                last = await cursor.fetchone()
+        return {
+            "type_card": fields["type_card"] if fields["type_card"] is not None else "",
+            "turno": fields["turno"] if fields["turno"] is not None else 0.0,
+            "saldo": fields["saldo"] if fields["saldo"] is not None else 0.0,
+            "last_card_used": {"tipo": last["TipoMovimiento"], "monto": last["Monto"]} if last else {"tipo": "N/A", "monto": "N/A"},
+        }
+
+    async def get_type_card(self, user_id: int) -> str:
+        """Obtiene el tipo de tarjeta de un usuario según su ID."""
+        query = """
+            SELECT tt.Tipo
+            FROM Tarjeta t
+            JOIN TipoTarjeta tt ON t.IDTipoTarjeta = tt.ID
+            WHERE t.IDUsuario = ?
+        """
+        return await self._scalar(query, (user_id,), default="")
+
+    async def ruta_interconexion(self, ubicacion_llegada: str, ubicacion_final: str) -> dict:
+        query_rutas = """
+            SELECT r.ID, r.Nombre
+            FROM Rutas r
+            JOIN RutaParada rp ON r.ID = rp.IDRuta
+            JOIN Parada p ON rp.IDParada = p.ID
+            WHERE p.Ubicacion = ?
+        """
+        query_interconexion = """
+            SELECT p.Ubicacion
+            FROM Parada p
+            JOIN RutaParada rp1 ON p.ID = rp1.IDParada
+            JOIN RutaParada rp2 ON p.ID = rp2.IDParada
+            WHERE rp1.IDRuta = ? AND rp2.IDRuta = ?
+        """
+        response = {"interconexiones": []}
+        try:
+            rutas_llegada, rutas_final = await asyncio.gather(
+                self._fetchall(query_rutas, (ubicacion_llegada,)),
+                self._fetchall(query_rutas, (ubicacion_final,)),
+            )
+            if not rutas_llegada:
+                return {"mensaje": "No se encontraron rutas desde la ubicación de llegada."}
+            if not rutas_final:
+                return {"mensaje": "No se encontraron rutas hacia la ubicación final."}
+            pares = [(inicio, final) for inicio in rutas_llegada for final in rutas_final]
+            resultados = await asyncio.gather(*(
+                self._fetchall(query_interconexion, (inicio["ID"], final["ID"])) for inicio, final in pares
+            ))
+            for (inicio, final), interconexiones in zip(pares, resultados):
+                for ubicacion in [i["Ubicacion"] for i in interconexiones] or ["Sin interconexión directa"]:
+                    response["interconexiones"].append({
+                        "ruta_inicio": inicio["Nombre"],
+                        "ruta_final": final["Nombre"],
+                        "interconexion": ubicacion
+                    })
+        except Exception as e:
+            response = {"error": f"Error al obtener la ruta: {str(e)}"}
+            logger.error(response["error"])
+        return response
+
+    async def close(self) -> None:
+        self.counters.stop_refresher()
+        await self.backend.close()
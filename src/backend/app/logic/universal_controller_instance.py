@@ -1,4 +1,23 @@
-from backend.app.logic.universal_controller_sqlserver import UniversalController
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import register_async_controller
 
 # Instancia única y global del controlador para toda la app
-universal_controller = UniversalController()
+if settings.DB_BACKEND == "sqlite":
+    from backend.app.logic.universal_controller_sql import UniversalController, DB_FILE
+    from backend.app.logic.universal_controller_async import AsyncUniversalController, AsyncSQLiteBackend
+
+    universal_controller = UniversalController()
+    # Los endpoints async usan el controlador nativo sobre el mismo archivo SQLite
+    # y comparten la caché de conteos y el bus de cambios para que las escrituras de
+    # ambos mantengan al día el estado en memoria
+    async_universal_controller = AsyncUniversalController(
+        AsyncSQLiteBackend(DB_FILE, pool_size=settings.DB_SQLITE_POOL_SIZE),
+        counters=universal_controller.counters,
+        events=universal_controller.events,
+    )
+    register_async_controller(universal_controller, async_universal_controller)
+else:
+    from backend.app.logic.universal_controller_sqlserver import UniversalController
+
+    universal_controller = UniversalController()
+    async_universal_controller = None
@@ -1,6 +1,19 @@
+import json
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from typing import Any
+from backend.app.logic.schema_registry import SchemaRegistry
+from backend.app.logic.keyset import build_keyset_query, page_result
+from backend.app.logic.id_allocator import SEQUENCE_TABLE
+from backend.app.logic.fare_engine import TAP_TABLE
+from backend.app.logic.idempotency import IDEMPOTENCY_TABLE
+from backend.app.logic.bulk import delete_sql, execute_in_chunks, insert_batch, succeeded_items, update_batch, update_sql
+from backend.app.logic.counter_cache import CounterCache
+from backend.app.logic.change_events import DELETE, INSERT, RESET, UPDATE, ChangeBus
+from backend.app.logic.async_controller import ensure_not_on_event_loop
+from backend.app.core.config import settings
 
 # Definir la ruta a la base de datos
 PATH = os.getcwd()
@@ -10,11 +23,67 @@ DB_FILE = os.path.join(DIR_DATA, 'data.db')
 class UniversalController:
     """Universal controller for CRUD operations using SQLite."""
 
-    def __init__(self):
-        """Initialize the database connection and cursor."""
-        self.conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        self.cursor = self.conn.cursor()
+    def __init__(self, db_file: str = None):
+        """
+        Open the database (defaults to `DB_FILE`). Each thread that uses the
+        controller gets its own connection and cursor (`conn`, `cursor`), so request
+        threads, the database executor and background writers never share one.
+        """
+        self.db_file = db_file or DB_FILE
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.schema = SchemaRegistry()
+        self.counters = CounterCache(ttl=settings.DB_COUNTER_TTL)
+        self.events = ChangeBus()
+        # Open the creating thread's connection now, so a bad path fails here
+        self.conn
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False only so that close() can close every thread's connection
+        conn = sqlite3.connect(self.db_file, timeout=settings.DB_SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # WAL lets readers of other connections proceed while one of them writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the calling thread, opened on first use."""
+        ensure_not_on_event_loop("UniversalController")
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn, self._local.cursor = conn, conn.cursor()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """Shared cursor of the calling thread's connection."""
+        self.conn
+        return self._local.cursor
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Cursor inside `BEGIN IMMEDIATE` on the calling thread's connection; commits
+        at the end of the block or rolls back on error. The write lock is taken up
+        front, and no other thread can commit or roll back this connection.
+        """
+        conn = self.conn
+        conn.commit()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
 
     def _get_table_name(self, obj: Any) -> str:
         """Retrieve the table name based on the object's class."""
@@ -26,14 +95,24 @@ class UniversalController:
             raise ValueError("El objeto o su clase no tienen definido '__entity_name__'.")
 
     def _ensure_table_exists(self, obj: Any):
-        """Ensure that the table exists in the database; create it if it doesn't."""
+        """Ensure that the table exists in the database; create it if it doesn't (once per table)."""
         table = self._get_table_name(obj)
+        if self.schema.is_known(table):
+            return
         fields = obj.get_fields()
         columns = ", ".join(f"{k} {v}" for k, v in fields.items())
         sql = f"CREATE TABLE IF NOT EXISTS {table} ({columns})"
-        self.cursor.execute(sql)
-        self.conn.commit()
-        
+
+        def create():
+            self.cursor.execute(sql)
+            self.conn.commit()
+
+        self.schema.ensure(table, create)
+
+    def refresh_schema(self, table: str = None) -> None:
+        """Forget verified tables so they are checked again on next use."""
+        self.schema.refresh(table)
+
     def add(self, obj: Any) -> Any:
         """Add a new object to the database."""
         self._ensure_table_exists(obj)
@@ -51,7 +130,8 @@ class UniversalController:
             raise ValueError(
                 f"An object with the same primary key already exists in '{table}'."
             )
-
+        self.counters.adjust(table, 1)
+        self.events.emit(table, INSERT, data)
         return obj
 
     def read_all(self, obj: Any) -> list[dict]:
@@ -62,6 +142,37 @@ class UniversalController:
         rows = self.cursor.fetchall()
         return [dict(row) for row in rows]
 
+    def read_page(self, cls: Any, limit: int, after: Any = None, columns: list = None, filters: dict = None) -> dict:
+        """Retrieve up to `limit` rows with ID greater than `after`, ordered by ID."""
+        self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters, after)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"SELECT {query} LIMIT ?", [*params, int(limit) + 1])
+            rows = [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        return page_result(rows, limit)
+
+    def iter_rows(self, cls: Any, columns: list = None, filters: dict = None, batch_size: int = 500):
+        """
+        Yield rows ordered by ID, fetching `batch_size` at a time. The generator reads
+        from a connection of its own, since it may be resumed from different threads.
+        """
+        self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {query}", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+
     def get_by_id(self, model, id):
         """Retrieve a single record by ID."""
         self._ensure_table_exists(model)
@@ -99,7 +210,8 @@ class UniversalController:
 
         if self.cursor.rowcount == 0:
             raise ValueError(f"No se encontró un registro con {id_field} = {data[id_field]} en la tabla '{table}'.")
-
+        self.counters.adjust(table, 0)
+        self.events.emit(table, UPDATE, data)
         return obj
 
     def delete(self, obj: Any) -> bool:
@@ -115,8 +227,331 @@ class UniversalController:
 
         if self.cursor.rowcount == 0:
             raise ValueError(f"No se encontró un registro con {id_field} = {data[id_field]} en la tabla '{table}'.")
+        self.counters.adjust(table, -1)
+        self.events.emit(table, DELETE, data)
         return True
 
+    def _run_bulk(self, sql: str, params: list, ids: list, chunk_size: int = None, must_exist: str = None) -> dict:
+        """Run `sql` in chunks (see `execute_in_chunks`); with `must_exist`, IDs missing from that table fail."""
+        cursor = self.cursor
+
+        def missing(chunk_ids: list) -> set:
+            found = {row[0] for row in self._select_in(cursor, f"SELECT ID FROM {must_exist} WHERE ID IN", set(chunk_ids))}
+            return {id_ for id_ in chunk_ids if id_ not in found}
+
+        return execute_in_chunks(
+            sql, params, ids, chunk_size or settings.DB_BULK_CHUNK_SIZE,
+            executemany=cursor.executemany,
+            execute=cursor.execute,
+            commit=self.conn.commit,
+            rollback=self.conn.rollback,
+            missing=missing if must_exist else None,
+        )
+
+    def add_many(self, objs: list, chunk_size: int = None) -> dict:
+        """
+        Insert many rows of the same table with executemany, committing every
+        `chunk_size` rows. Returns total/succeeded/failed and per-row errors.
+        """
+        if not objs:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        self._ensure_table_exists(objs[0])
+        sql, params, ids = insert_batch(objs, self._get_table_name)
+        result = self._run_bulk(sql, params, ids, chunk_size)
+        table = self._get_table_name(objs[0])
+        self.counters.adjust(table, result["succeeded"])
+        for obj in succeeded_items(objs, result):
+            self.events.emit(table, INSERT, obj.to_dict())
+        return result
+
+    def update_many(self, objs: list, chunk_size: int = None) -> dict:
+        """Update many rows of the same table by ID. See `add_many`."""
+        if not objs:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        self._ensure_table_exists(objs[0])
+        sql, params, ids = update_batch(objs, self._get_table_name)
+        table = self._get_table_name(objs[0])
+        result = self._run_bulk(sql, params, ids, chunk_size, must_exist=table)
+        self.counters.adjust(table, 0)
+        for obj in succeeded_items(objs, result):
+            self.events.emit(table, UPDATE, obj.to_dict())
+        return result
+
+    def update_field_many(self, cls: Any, field: str, values: list, chunk_size: int = None) -> dict:
+        """Update one column of many rows of `cls` from (ID, value) pairs. See `add_many`."""
+        if not values:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        if field == "ID" or field not in cls.get_fields():
+            raise ValueError(f"'{field}' no es una columna actualizable de {cls.__entity_name__}.")
+        self._ensure_table_exists(cls)
+        table = self._get_table_name(cls)
+        ids = [id_ for id_, _ in values]
+        result = self._run_bulk(
+            update_sql(table, (field, "ID")), [(value, id_) for id_, value in values], ids, chunk_size, must_exist=table
+        )
+        for id_, value in succeeded_items(values, result):
+            self.events.emit(table, UPDATE, {"ID": id_, field: value})
+        return result
+
+    def delete_many(self, cls: Any, ids: list, chunk_size: int = None) -> dict:
+        """Delete the rows of `cls` with the given IDs. See `add_many`."""
+        if not ids:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        self._ensure_table_exists(cls)
+        table = self._get_table_name(cls)
+        result = self._run_bulk(delete_sql(table), [(i,) for i in ids], list(ids), chunk_size)
+        # Deleting a missing ID is not an error, so the number of removed rows is unknown
+        self.counters.invalidate(table)
+        for id_ in succeeded_items(ids, result):
+            self.events.emit(table, DELETE, {"ID": id_})
+        return result
+
+    def _sequence_of(self, obj: Any) -> str:
+        """Table name of `obj` (model or table name), creating the sequence table if needed."""
+        if isinstance(obj, str):
+            table = obj
+        else:
+            table = self._get_table_name(obj)
+            self._ensure_table_exists(obj)
+
+        def create():
+            self.cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEQUENCE_TABLE} (Tabla TEXT PRIMARY KEY, Siguiente INTEGER NOT NULL)"
+            )
+            self.conn.commit()
+
+        self.schema.ensure(SEQUENCE_TABLE, create)
+        return table
+
+    def peek_ids(self, obj: Any) -> int:
+        """
+        Return the next free ID for the table of `obj` without reserving it: the
+        sequence's next value, or MAX(ID) + 1 if that is higher.
+        """
+        table = self._sequence_of(obj)
+        self.cursor.execute(
+            f"SELECT MAX(IFNULL((SELECT Siguiente FROM {SEQUENCE_TABLE} WHERE Tabla = ?), 0), IFNULL(MAX(ID), 0) + 1) "
+            f"FROM {table}",
+            (table,),
+        )
+        return int(self.cursor.fetchone()[0])
+
+    def reserve_ids(self, obj: Any, count: int = 1) -> int:
+        """
+        Reserve `count` consecutive IDs for the table of `obj` (model or table name)
+        and return the first one. The reservation starts after MAX(ID), so IDs
+        inserted outside the sequence are never handed out again.
+        """
+        table = self._sequence_of(obj)
+        # The write lock is taken up front, so concurrent reservations serialize
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {SEQUENCE_TABLE} (Tabla, Siguiente) VALUES (?, 1)", (table,)
+            )
+            cursor.execute(
+                f"UPDATE {SEQUENCE_TABLE} SET Siguiente = MAX(Siguiente, (SELECT IFNULL(MAX(ID), 0) + 1 FROM {table})) "
+                f"WHERE Tabla = ?",
+                (table,),
+            )
+            cursor.execute(f"SELECT Siguiente FROM {SEQUENCE_TABLE} WHERE Tabla = ?", (table,))
+            first = cursor.fetchone()[0]
+            cursor.execute(f"UPDATE {SEQUENCE_TABLE} SET Siguiente = Siguiente + ? WHERE Tabla = ?", (count, table))
+        return int(first)
+
+    def charge_fares(self, charges: list, movement_type: int) -> list:
+        """
+        Charge fares in one transaction. `charges` are (IDTarjeta, IDPrecio, IDUnidad,
+        IDMovimiento, IDPago, IDTap) tuples; the amount is read from Precio and the
+        balance is only decremented if it covers it (`UPDATE ... WHERE Saldo >= ?`).
+        Charged taps insert their Movimiento and Pago rows. Returns one result per
+        charge with `status` (see `fare_engine`), `Monto` and the new `Saldo`.
+
+        The outcome of each charge with an IDTap is stored in `TAP_TABLE` in the same
+        transaction; a tap seen before returns its stored outcome with `duplicate`.
+        """
+        from backend.app.models.card import CardCreate
+        from backend.app.models.movement import MovementCreate
+        from backend.app.models.payments import Payment
+        from backend.app.models.price import PriceCreate
+
+        for model in (CardCreate, PriceCreate, MovementCreate, Payment):
+            self._ensure_table_exists(model)
+
+        def create():
+            self.cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {TAP_TABLE} (IDTap VARCHAR(64) PRIMARY KEY, Resultado TEXT NOT NULL)"
+            )
+            self.conn.commit()
+
+        self.schema.ensure(TAP_TABLE, create)
+        if not charges:
+            return []
+        results, movements, payments, processed = [], [], [], {}
+        # The write lock is taken up front, so balances cannot change between checks
+        with self._transaction() as cursor:
+            prices = dict(self._select_in(cursor, "SELECT ID, Monto FROM Precio WHERE ID IN", {c[1] for c in charges}))
+            seen = {
+                tap_id: json.loads(outcome)
+                for tap_id, outcome in self._select_in(
+                    cursor, f"SELECT IDTap, Resultado FROM {TAP_TABLE} WHERE IDTap IN", {c[5] for c in charges} - {None}
+                )
+            }
+            for card_id, price_id, unit_id, movement_id, payment_id, tap_id in charges:
+                if tap_id is not None and tap_id in seen:
+                    results.append({**seen[tap_id], "duplicate": True})
+                    continue
+                amount = prices.get(price_id)
+                if amount is None:
+                    result = {"status": "price_not_found", "Monto": None, "Saldo": None}
+                else:
+                    cursor.execute(
+                        "UPDATE Tarjeta SET Saldo = Saldo - ? WHERE ID = ? AND Saldo >= ? RETURNING Saldo",
+                        (amount, card_id, amount),
+                    )
+                    row = cursor.fetchone()
+                    if row is None:
+                        cursor.execute("SELECT Saldo FROM Tarjeta WHERE ID = ?", (card_id,))
+                        card = cursor.fetchone()
+                        status = "card_not_found" if card is None else "insufficient_funds"
+                        result = {"status": status, "Monto": amount, "Saldo": card[0] if card else None}
+                    else:
+                        movements.append((movement_id, movement_type, amount, card_id))
+                        payments.append((movement_id, price_id, card_id, unit_id, payment_id))
+                        result = {
+                            "status": "charged", "Monto": amount, "Saldo": row[0],
+                            "IDMovimiento": movement_id, "IDPago": payment_id,
+                        }
+                if tap_id is not None:
+                    seen[tap_id] = processed[tap_id] = result
+                results.append(result)
+            cursor.executemany(
+                "INSERT INTO Movimiento (ID, IDTipoMovimiento, Monto, IDTarjeta) VALUES (?, ?, ?, ?)", movements
+            )
+            cursor.executemany(
+                "INSERT INTO Pago (IDMovimiento, IDPrecio, IDTarjeta, IDUnidad, ID) VALUES (?, ?, ?, ?, ?)", payments
+            )
+            cursor.executemany(
+                f"INSERT INTO {TAP_TABLE} (IDTap, Resultado) VALUES (?, ?)",
+                [(tap_id, json.dumps(result)) for tap_id, result in processed.items()],
+            )
+        self.counters.adjust("Movimiento", len(movements))
+        self.counters.adjust("Pago", len(payments))
+        for (card_id, *_), result in zip(charges, results):
+            if result["status"] == "charged" and not result.get("duplicate"):
+                self.events.emit("Tarjeta", UPDATE, {"ID": card_id, "Saldo": result["Saldo"]})
+        for movement in movements:
+            self.events.emit("Movimiento", INSERT, dict(zip(("ID", "IDTipoMovimiento", "Monto", "IDTarjeta"), movement)))
+        for payment in payments:
+            self.events.emit("Pago", INSERT, dict(zip(("IDMovimiento", "IDPrecio", "IDTarjeta", "IDUnidad", "ID"), payment)))
+        return results
+
+    def _ensure_idempotency_table(self) -> None:
+        def create():
+            self.cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {IDEMPOTENCY_TABLE} (Clave VARCHAR(255) PRIMARY KEY, "
+                "Huella VARCHAR(64) NOT NULL, Estado INTEGER NOT NULL, Respuesta TEXT NOT NULL, Creado FLOAT NOT NULL)"
+            )
+            self.conn.commit()
+
+        self.schema.ensure(IDEMPOTENCY_TABLE, create)
+
+    def idempotency_get(self, key: str):
+        """Stored response for an idempotency key, as a dict, or None."""
+        self._ensure_idempotency_table()
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT Huella, Estado, Respuesta, Creado FROM {IDEMPOTENCY_TABLE} WHERE Clave = ?", (key,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return dict(row) if row else None
+
+    def idempotency_put(self, key: str, fingerprint: str, status: int, response: str, created: float) -> bool:
+        """Store the response for an idempotency key; False if the key was already stored."""
+        self._ensure_idempotency_table()
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {IDEMPOTENCY_TABLE} (Clave, Huella, Estado, Respuesta, Creado) VALUES (?, ?, ?, ?, ?)",
+                (key, fingerprint, status, response, created),
+            )
+            self.conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            cursor.close()
+
+    def idempotency_purge(self, before: float) -> int:
+        """Delete idempotency keys created before `before` (epoch seconds)."""
+        self._ensure_idempotency_table()
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"DELETE FROM {IDEMPOTENCY_TABLE} WHERE Creado < ?", (before,))
+            self.conn.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def settlement_page(self, after: int, limit: int) -> list:
+        """
+        Return up to `limit` payments with ID greater than `after`, ordered by ID, as
+        (ID, IDUnidad, IDPrecio, IDTarjeta, Cobrado, IDTipoTarjeta, IDRuta) tuples.
+        `Cobrado` is the amount of the payment's Movimiento; it and the columns of
+        Tarjeta and UnidadTransporte are None when the referenced row is missing.
+        """
+        from backend.app.models.card import CardCreate
+        from backend.app.models.movement import MovementCreate
+        from backend.app.models.payments import Payment
+        from backend.app.models.transport import UnidadTransporte
+        from backend.app.logic.settlement import PAYMENT_ID_INDEX
+
+        for model in (Payment, MovementCreate, CardCreate, UnidadTransporte):
+            self._ensure_table_exists(model)
+
+        # Pago.ID is not a key: without this index every page scans and sorts the table
+        def create():
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {PAYMENT_ID_INDEX} ON Pago (ID)")
+            self.conn.commit()
+
+        self.schema.ensure(PAYMENT_ID_INDEX, create)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT p.ID, p.IDUnidad, p.IDPrecio, p.IDTarjeta, m.Monto, t.IDTipoTarjeta, u.IDRuta
+                FROM Pago p
+                LEFT JOIN Movimiento m ON m.ID = p.IDMovimiento
+                LEFT JOIN Tarjeta t ON t.ID = p.IDTarjeta
+                LEFT JOIN UnidadTransporte u ON u.ID = p.IDUnidad
+                WHERE p.ID > ?
+                ORDER BY p.ID
+                LIMIT ?
+                """,
+                (after, limit),
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _select_in(cursor, query: str, values: set, chunk_size: int = 500) -> list:
+        """Run `query IN (...)` for `values` in chunks and return all rows as tuples."""
+        values, rows = list(values), []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            cursor.execute(f"{query} ({', '.join('?' for _ in chunk)})", chunk)
+            rows.extend(tuple(row) for row in cursor.fetchall())
+        return rows
+
+    def close(self):
+        """Close the connections of every thread."""
+        self.counters.stop_refresher()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
     def clear_tables(self):
         """Delete all data from all tables in the database without dropping them."""
         self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -125,6 +560,10 @@ class UniversalController:
             table_name = table["name"]
             self.cursor.execute(f"DELETE FROM {table_name}")
         self.conn.commit()
+        self.counters.invalidate()
+        for table in tables:
+            self.events.emit(table["name"], RESET)
+
     def get_by_unit(self,cls: Any, unit_id: int) -> list[dict]:
         table= table = cls.__entity_name__
         sql = f"SELECT * FROM {table} WHERE idunidad = ?"
@@ -134,3 +573,37 @@ class UniversalController:
             return cls.from_dict(dict(zip([column[0] for column in self.cursor.description], row))) if row else None
         except Exception as e:
             raise RuntimeError(f"Error al obtener registros de la unidad {unit_id}: {e}")
+
+    def get_ruta_parada(self, id_ruta: int, id_parada: int):
+        """Retrieve a Ruta-Parada relation by its composite key."""
+        from backend.app.models.rutaparada import RutaParada
+        self._ensure_table_exists(RutaParada)
+        self.cursor.execute("SELECT * FROM RutaParada WHERE IDRuta = ? AND IDParada = ?", (id_ruta, id_parada))
+        row = self.cursor.fetchone()
+        return RutaParada.model_validate(dict(row)) if row else None
+
+    def delete_ruta_parada(self, id_ruta: int, id_parada: int) -> bool:
+        """Delete a Ruta-Parada relation by its composite key. Return False if it does not exist."""
+        self.cursor.execute("DELETE FROM RutaParada WHERE IDRuta = ? AND IDParada = ?", (id_ruta, id_parada))
+        self.conn.commit()
+        if self.cursor.rowcount == 0:
+            return False
+        self.counters.invalidate("RutaParada")
+        self.events.emit("RutaParada", DELETE, {"IDRuta": id_ruta, "IDParada": id_parada})
+        return True
+
+    def update_ruta_parada(self, id_ruta: int, id_parada: int, nuevo_id_ruta: int, nuevo_id_parada: int) -> bool:
+        """Move a Ruta-Parada relation to a new composite key. Return False if it does not exist."""
+        self.cursor.execute(
+            "UPDATE RutaParada SET IDRuta = ?, IDParada = ? WHERE IDRuta = ? AND IDParada = ?",
+            (nuevo_id_ruta, nuevo_id_parada, id_ruta, id_parada),
+        )
+        self.conn.commit()
+        if self.cursor.rowcount == 0:
+            return False
+        self.events.emit(
+            "RutaParada", UPDATE,
+            {"IDRuta": nuevo_id_ruta, "IDParada": nuevo_id_parada},
+            previous={"IDRuta": id_ruta, "IDParada": id_parada},
+        )
+        return True
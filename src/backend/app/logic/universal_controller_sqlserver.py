@@ -1,10 +1,23 @@
 import pyodbc
 from backend.app.core.config import Settings
+from backend.app.logic.connection_pool import ConnectionPool
+from backend.app.logic.schema_registry import SchemaRegistry
+from backend.app.logic.keyset import build_keyset_query, page_result
+from backend.app.logic.id_allocator import SEQUENCE_TABLE
+from backend.app.logic.fare_engine import TAP_TABLE
+from backend.app.logic.idempotency import IDEMPOTENCY_TABLE
+from backend.app.logic.bulk import delete_sql, execute_in_chunks, insert_batch, succeeded_items, update_batch, update_sql
+from backend.app.logic.counter_cache import CounterCache
+from backend.app.logic.change_events import DELETE, INSERT, RESET, UPDATE, ChangeBus, ChangeEvent
+from backend.app.logic.async_controller import ensure_not_on_event_loop
+from contextlib import contextmanager
 from typing import Any
+import json
 import os
 import logging
 import platform
-from typing import List
+import threading
+from typing import List, Optional
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 class UniversalController:
@@ -22,15 +35,109 @@ class UniversalController:
             db_password = os.getenv('PASSWORD')
             if db_password is None:
                 raise ValueError("La variable de entorno DB_PASSWORD no está definida.")
-            
-            self.conn = pyodbc.connect(
+
+            self._connection_string = (
                 f"DRIVER={{{driver}}};SERVER={settings.db_config['host']},1435;DATABASE={settings.db_config['dbname']};UID={settings.db_config['user']};PWD={db_password};TrustServerCertificate=yes"
             )
-            self.conn.autocommit = False  # Desactivar autocommit
-            self.cursor = self.conn.cursor()
+            self._local = threading.local()
+            self.schema = SchemaRegistry()
+            self.bulk_chunk_size = settings.DB_BULK_CHUNK_SIZE
+            self.counters = CounterCache(ttl=settings.DB_COUNTER_TTL)
+            self.events = ChangeBus()
+            self.pool = ConnectionPool(
+                self._connect,
+                size=settings.DB_POOL_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                recycle_seconds=settings.DB_POOL_RECYCLE,
+                health_check_after=settings.DB_POOL_HEALTH_CHECK_AFTER,
+            )
+            # Abrir la primera conexión para fallar pronto si la base no está disponible
+            with self.pool.connection():
+                pass
         except pyodbc.Error as e:
             raise ConnectionError(f"Error de conexión a la base de datos: {e}")
 
+    def _connect(self):
+        conn = pyodbc.connect(self._connection_string)
+        conn.autocommit = False  # Desactivar autocommit
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Conexión de la unidad de trabajo activa o, si no hay, una del pool."""
+        ensure_not_on_event_loop("UniversalController")
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def _cursor(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def _commit(self, cursor) -> None:
+        # Dentro de una unidad de trabajo el commit se hace al cerrar el bloque
+        if getattr(self._local, "conn", None) is None:
+            cursor.connection.commit()
+
+    def _rollback(self, cursor) -> None:
+        if getattr(self._local, "conn", None) is None:
+            cursor.connection.rollback()
+
+    def _count_changed(self, table: str, delta: int) -> None:
+        # Dentro de una unidad de trabajo el cambio puede revertirse: se descarta el conteo
+        if getattr(self._local, "conn", None) is not None:
+            self.counters.invalidate(table)
+        else:
+            self.counters.adjust(table, delta)
+
+    def _publish(self, table: str, action: str, data: dict = None, previous: dict = None) -> None:
+        # Dentro de una unidad de trabajo el cambio se publica después del commit
+        pending = getattr(self._local, "events", None)
+        if getattr(self._local, "conn", None) is not None and pending is not None:
+            pending.append(ChangeEvent(table, action, dict(data or {}), previous))
+        else:
+            self.events.emit(table, action, data, previous)
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Ejecuta varias operaciones del controlador sobre una misma conexión y
+        transacción. Hace commit al salir del bloque o rollback si hay un error.
+        """
+        if getattr(self._local, "conn", None) is not None:
+            yield self._local.conn
+            return
+        ensure_not_on_event_loop("UniversalController.unit_of_work")
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            self._local.events = []
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn = None
+                events, self._local.events = self._local.events, None
+        for event in events:
+            self.events.publish(event)
+
+    def pool_metrics(self) -> dict:
+        return self.pool.metrics()
+
+    def close(self) -> None:
+        self.counters.stop_refresher()
+        self.pool.close()
+
     def _get_table_name(self, obj: Any) -> str:
         if hasattr(obj, "__entity_name__"):
             return obj.__entity_name__
@@ -44,14 +151,13 @@ class UniversalController:
         Ejecuta una consulta SQL y retorna los resultados como una lista de diccionarios.
         """
         try:
-            if not self.cursor:
-                raise RuntimeError("El cursor de la base de datos no está disponible.")
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            rows = self.cursor.fetchall()  # Recupera todos los registros
-            return [dict(zip([column[0] for column in self.cursor.description], row)) for row in rows]
+            with self._cursor() as cursor:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                rows = cursor.fetchall()  # Recupera todos los registros
+                return [dict(zip([column[0] for column in cursor.description], row)) for row in rows]
         except pyodbc.Error as e:
             logger.error(f"Error al ejecutar la consulta: {e}")
             raise RuntimeError(f"Error al ejecutar la consulta: {e}")
@@ -87,8 +193,10 @@ class UniversalController:
             raise RuntimeError(f"Error al obtener registros de RutaParada por IDParada={id_parada}: {e}")
     
     def _ensure_table_exists(self, obj: Any):
-            """Crea la tabla si no existe."""
+            """Crea la tabla si no existe. La verificación se hace una vez por tabla y proceso."""
             table = self._get_table_name(obj)
+            if self.schema.is_known(table):
+                return
             fields = obj.get_fields()
 
             columns = []
@@ -99,29 +207,140 @@ class UniversalController:
                     columns.append(f"{k} {v}")
 
             sql = f"IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{table}' AND xtype='U') CREATE TABLE {table} ({', '.join(columns)})"
-            self.cursor.execute(sql)
-            self.conn.commit()
+
+            def create():
+                with self._cursor() as cursor:
+                    cursor.execute(sql)
+                    self._commit(cursor)
+
+            self.schema.ensure(table, create)
+
+    def refresh_schema(self, table: str = None) -> None:
+        """Olvida las tablas verificadas para que se comprueben de nuevo en el próximo uso."""
+        self.schema.refresh(table)
+
+    def _sequence_of(self, obj: Any) -> str:
+        """Nombre de la tabla de `obj` (modelo o nombre de tabla); crea la tabla de secuencias si falta."""
+        if isinstance(obj, str):
+            table = obj
+        else:
+            table = self._get_table_name(obj)
+            self._ensure_table_exists(obj)
+
+        def create():
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f"IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{SEQUENCE_TABLE}' AND xtype='U') "
+                    f"CREATE TABLE {SEQUENCE_TABLE} (Tabla VARCHAR(100) PRIMARY KEY, Siguiente BIGINT NOT NULL)"
+                )
+                self._commit(cursor)
+
+        self.schema.ensure(SEQUENCE_TABLE, create)
+        return table
+
+    def peek_ids(self, obj: Any) -> int:
+        """
+        Devuelve el siguiente ID libre de la tabla de `obj` sin reservarlo: el
+        siguiente valor de la secuencia, o MAX(ID) + 1 si es mayor.
+        """
+        table = self._sequence_of(obj)
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"SELECT (SELECT Siguiente FROM {SEQUENCE_TABLE} WHERE Tabla = ?), "
+                f"(SELECT ISNULL(MAX(ID), 0) + 1 FROM {table})",
+                (table,),
+            )
+            siguiente, maximo = cursor.fetchone()
+            return int(max(siguiente or 0, maximo))
+
+    def reserve_ids(self, obj: Any, count: int = 1) -> int:
+        """
+        Reserva `count` IDs consecutivos para la tabla de `obj` (modelo o nombre de
+        tabla) en la tabla de secuencias y devuelve el primero. La reserva arranca
+        después de MAX(ID), así que los IDs insertados por fuera de la secuencia
+        no se vuelven a entregar.
+        """
+        table = self._sequence_of(obj)
+        ensure_not_on_event_loop("UniversalController.reserve_ids")
+        # Transacción propia: la reserva no debe depender de una unidad de trabajo abierta
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"INSERT INTO {SEQUENCE_TABLE} (Tabla, Siguiente) "
+                    f"SELECT ?, 1 "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM {SEQUENCE_TABLE} WITH (UPDLOCK, HOLDLOCK) WHERE Tabla = ?)",
+                    (table, table),
+                )
+                cursor.execute(
+                    f"UPDATE s SET Siguiente = CASE WHEN s.Siguiente > m.Siguiente THEN s.Siguiente "
+                    f"ELSE m.Siguiente END + ? OUTPUT inserted.Siguiente - ? "
+                    f"FROM {SEQUENCE_TABLE} s CROSS JOIN (SELECT ISNULL(MAX(ID), 0) + 1 AS Siguiente FROM {table}) m "
+                    f"WHERE s.Tabla = ?",
+                    (count, count, table),
+                )
+                first = cursor.fetchone()[0]
+                conn.commit()
+                return int(first)
+            finally:
+                cursor.close()
 
     def drop_table(self, obj: Any) -> None:
         """Elimina la tabla de la base de datos."""
         table = self._get_table_name(obj)
         sql = f"IF EXISTS (SELECT * FROM sysobjects WHERE name='{table}' AND xtype='U') DROP TABLE {table}"
-        self.cursor.execute(sql)
-        self.conn.commit()
+        with self._cursor() as cursor:
+            cursor.execute(sql)
+            self._commit(cursor)
+        self.schema.refresh(table)
+        self.counters.invalidate(table)
+        self._publish(table, RESET)
 
     def read_all(self, obj: Any) -> list[dict]:
         self._ensure_table_exists(obj)
         table = self._get_table_name(obj)
-        self.cursor.execute(f"SELECT * FROM {table}")
-        return [dict(zip([column[0] for  column in self.cursor.description], row)) for row in self.cursor.fetchall()]
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT * FROM {table}")
+            return [dict(zip([column[0] for  column in cursor.description], row)) for row in cursor.fetchall()]
+
+    def read_page(self, cls: Any, limit: int, after: Any = None, columns: List[str] = None, filters: dict = None) -> dict:
+        """
+        Devuelve hasta `limit` registros con ID mayor que `after`, ordenados por ID.
+        El resultado trae `items` y `next_cursor` (None en la última página).
+        """
+        self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters, after)
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT TOP (?) {query}", [int(limit) + 1, *params])
+            names = [column[0] for column in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        return page_result(rows, limit)
+
+    def iter_rows(self, cls: Any, columns: List[str] = None, filters: dict = None, batch_size: int = 500):
+        """
+        Recorre la tabla en orden de ID leyendo de a `batch_size` filas, sin cargarla
+        completa en memoria. La conexión queda tomada hasta agotar o cerrar el generador.
+        """
+        self._ensure_table_exists(cls)
+        _, query, params = build_keyset_query(cls, self._get_table_name(cls), columns, filters)
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT {query}", params)
+            names = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
 
     def get_by_id(self, cls: Any, id_value: Any) -> Any | None:
         table = cls.__entity_name__
         sql = f"SELECT * FROM {table} WHERE id = ?"
         try:
-            self.cursor.execute(sql, (id_value,))
-            row = self.cursor.fetchone()
-            return cls.from_dict(dict(zip([column[0] for column in self.cursor.description], row))) if row else None
+            with self._cursor() as cursor:
+                cursor.execute(sql, (id_value,))
+                row = cursor.fetchone()
+                return cls.from_dict(dict(zip([column[0] for column in cursor.description], row))) if row else None
         except Exception as e:
             logger.error(f"Error en get_by_id: {e}")
             return None
@@ -130,10 +349,11 @@ class UniversalController:
         table = cls.__entity_name__
         sql = f"SELECT * FROM {table} WHERE {column_name} = ?"
 
-        self.cursor.execute(sql, (value,))
-        row = self.cursor.fetchone()
+        with self._cursor() as cursor:
+            cursor.execute(sql, (value,))
+            row = cursor.fetchone()
 
-        return cls.from_dict(dict(zip([column[0] for column in self.cursor.description], row))) if row else None
+            return cls.from_dict(dict(zip([column[0] for column in cursor.description], row))) if row else None
 
     def add(self, obj: Any) -> Any:
         """
@@ -151,13 +371,16 @@ class UniversalController:
         placeholders = ", ".join(["?" for _ in data.values()])
         sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
 
-        try:
-            self.cursor.execute(sql, tuple(data.values()))
-            self.conn.commit()
-            return obj
-        except Exception as e:
-            self.conn.rollback()
-            raise ValueError(f"Error al agregar el registro: {e}")
+        with self._cursor() as cursor:
+            try:
+                cursor.execute(sql, tuple(data.values()))
+                self._commit(cursor)
+            except Exception as e:
+                self._rollback(cursor)
+                raise ValueError(f"Error al agregar el registro: {e}")
+        self._count_changed(table, 1)
+        self._publish(table, INSERT, obj.to_dict())
+        return obj
 
     def update(self, obj: Any) -> Any:
         """
@@ -173,15 +396,22 @@ class UniversalController:
         columns = [f"{key} = ?" for key in data.keys() if key != "ID"]
         sql = f"UPDATE {table} SET {', '.join(columns)} WHERE ID = ?"
 
-        try:
-            # Ejecutar la consulta con los valores correspondientes
-            values = [data[key] for key in data.keys() if key != "ID"] + [data["ID"]]
-            self.cursor.execute(sql, values)
-            self.conn.commit()
-            return obj
-        except Exception as e:
-            self.conn.rollback()
-            raise ValueError(f"Error al actualizar el registro: {e}")
+        with self._cursor() as cursor:
+            try:
+                # Ejecutar la consulta con los valores correspondientes
+                values = [data[key] for key in data.keys() if key != "ID"] + [data["ID"]]
+                cursor.execute(sql, values)
+                actualizadas = cursor.rowcount
+                self._commit(cursor)
+            except Exception as e:
+                self._rollback(cursor)
+                raise ValueError(f"Error al actualizar el registro: {e}")
+        # Como en el controlador SQLite: sin fila que actualizar no hay evento
+        if actualizadas == 0:
+            raise ValueError(f"No se encontró un registro con ID = {data['ID']} en la tabla '{table}'.")
+        self._count_changed(table, 0)
+        self._publish(table, UPDATE, data)
+        return obj
 
     def delete(self, obj: Any) -> bool:
         """
@@ -194,59 +424,335 @@ class UniversalController:
             raise ValueError("El objeto debe tener un campo 'ID' válido para ser eliminado.")
 
         sql = f"DELETE FROM {table} WHERE ID = ?"
-        try:
-            # Ejecutar la consulta para eliminar el registro
-            self.cursor.execute(sql, (data["ID"],))
-            self.conn.commit()
-
-            # Verificar si el registro fue eliminado
-            self.cursor.execute(f"SELECT * FROM {table} WHERE ID = ?", (data["ID"],))
-            if self.cursor.fetchone() is None:
-                return True
-            else:
-                return False
-        except Exception as e:
-            self.conn.rollback()
-            raise ValueError(f"Error al eliminar el registro: {e}")
+        with self._cursor() as cursor:
+            try:
+                # Ejecutar la consulta para eliminar el registro
+                cursor.execute(sql, (data["ID"],))
+                deleted = cursor.rowcount
+                self._commit(cursor)
+                if deleted and deleted > 0:
+                    self._count_changed(table, -deleted)
+                    self._publish(table, DELETE, data)
+
+                # Verificar si el registro fue eliminado
+                cursor.execute(f"SELECT * FROM {table} WHERE ID = ?", (data["ID"],))
+                if cursor.fetchone() is None:
+                    return True
+                else:
+                    return False
+            except Exception as e:
+                self._rollback(cursor)
+                raise ValueError(f"Error al eliminar el registro: {e}")
     
+    def _run_bulk(self, sql: str, params: List[tuple], ids: list, chunk_size: int = None,
+                  must_exist: Optional[str] = None) -> dict:
+        """
+        Ejecuta `sql` en lotes (ver `execute_in_chunks`). Con `must_exist`, los IDs que
+        no están en esa tabla quedan como errores: un UPDATE sin filas no falla solo.
+        """
+        # Dentro de una unidad de trabajo no se puede revertir solo un lote: el error se propaga
+        strict = getattr(self._local, "conn", None) is not None
+        with self._cursor() as cursor:
+            cursor.fast_executemany = True
+
+            def missing(chunk_ids: list) -> set:
+                found = {row[0] for row in self._select_in(cursor, f"SELECT ID FROM {must_exist} WHERE ID IN", set(chunk_ids))}
+                return {id_ for id_ in chunk_ids if id_ not in found}
+
+            return execute_in_chunks(
+                sql, params, ids, chunk_size or self.bulk_chunk_size,
+                executemany=cursor.executemany,
+                execute=cursor.execute,
+                commit=lambda: self._commit(cursor),
+                rollback=lambda: self._rollback(cursor),
+                strict=strict,
+                missing=missing if must_exist else None,
+            )
+
+    def add_many(self, objs: List[Any], chunk_size: int = None) -> dict:
+        """
+        Inserta varios registros de la misma tabla con `fast_executemany`, haciendo
+        commit cada `chunk_size` filas. Devuelve `total`, `succeeded`, `failed` y
+        `errors` (índice, ID y mensaje de cada registro que no se pudo insertar).
+        """
+        if not objs:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        sql, params, ids = insert_batch(objs, self._get_table_name)
+        result = self._run_bulk(sql, params, ids, chunk_size)
+        table = self._get_table_name(objs[0])
+        self._count_changed(table, result["succeeded"])
+        for obj in succeeded_items(objs, result):
+            self._publish(table, INSERT, obj.to_dict())
+        return result
+
+    def update_many(self, objs: List[Any], chunk_size: int = None) -> dict:
+        """Actualiza varios registros de la misma tabla por ID, en lotes. Ver `add_many`."""
+        if not objs:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        sql, params, ids = update_batch(objs, self._get_table_name)
+        table = self._get_table_name(objs[0])
+        result = self._run_bulk(sql, params, ids, chunk_size, must_exist=table)
+        self._count_changed(table, 0)
+        for obj in succeeded_items(objs, result):
+            self._publish(table, UPDATE, obj.to_dict())
+        return result
+
+    def update_field_many(self, cls: Any, field: str, values: List[tuple], chunk_size: int = None) -> dict:
+        """
+        Actualiza una sola columna de varios registros de `cls`; `values` son pares
+        (ID, valor). Ver `add_many`.
+        """
+        if not values:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        if field == "ID" or field not in cls.get_fields():
+            raise ValueError(f"'{field}' no es una columna actualizable de {cls.__entity_name__}.")
+        table = self._get_table_name(cls)
+        ids = [id_ for id_, _ in values]
+        result = self._run_bulk(
+            update_sql(table, (field, "ID")), [(value, id_) for id_, value in values], ids, chunk_size, must_exist=table
+        )
+        for id_, value in succeeded_items(values, result):
+            self._publish(table, UPDATE, {"ID": id_, field: value})
+        return result
+
+    def delete_many(self, cls: Any, ids: List[Any], chunk_size: int = None) -> dict:
+        """Elimina los registros de `cls` con los IDs indicados, en lotes. Ver `add_many`."""
+        if not ids:
+            return {"total": 0, "succeeded": 0, "failed": 0, "errors": []}
+        table = self._get_table_name(cls)
+        result = self._run_bulk(delete_sql(table), [(i,) for i in ids], list(ids), chunk_size)
+        # Borrar un ID inexistente no es un error, así que no se sabe cuántas filas se eliminaron
+        self.counters.invalidate(table)
+        for id_ in succeeded_items(ids, result):
+            self._publish(table, DELETE, {"ID": id_})
+        return result
+
+    def charge_fares(self, charges: List[tuple], movement_type: int) -> List[dict]:
+        """
+        Cobra pasajes en una sola transacción. `charges` son tuplas (IDTarjeta,
+        IDPrecio, IDUnidad, IDMovimiento, IDPago, IDTap); el monto se lee de Precio y
+        el saldo solo se descuenta si alcanza (`UPDATE ... WHERE Saldo >= ?`). Los
+        cobros aceptados insertan su Movimiento y su Pago. Devuelve un resultado por
+        cobro con `status` (ver `fare_engine`), `Monto` y el `Saldo` nuevo.
+
+        El resultado de cada cobro con IDTap se guarda en `TAP_TABLE` en la misma
+        transacción; un tap ya procesado devuelve su resultado guardado con `duplicate`.
+        """
+        def create():
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f"IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{TAP_TABLE}' AND xtype='U') "
+                    f"CREATE TABLE {TAP_TABLE} (IDTap VARCHAR(64) PRIMARY KEY, Resultado NVARCHAR(MAX) NOT NULL)"
+                )
+                self._commit(cursor)
+
+        self.schema.ensure(TAP_TABLE, create)
+        if not charges:
+            return []
+        results, movements, payments, processed = [], [], [], {}
+        with self.unit_of_work():
+            with self._cursor() as cursor:
+                prices = dict(self._select_in(cursor, "SELECT ID, Monto FROM Precio WHERE ID IN", {c[1] for c in charges}))
+                # UPDLOCK: un mismo tap enviado a la vez por dos lotes espera al primero
+                seen = {
+                    tap_id: json.loads(outcome)
+                    for tap_id, outcome in self._select_in(
+                        cursor, f"SELECT IDTap, Resultado FROM {TAP_TABLE} WITH (UPDLOCK, HOLDLOCK) WHERE IDTap IN",
+                        {c[5] for c in charges} - {None},
+                    )
+                }
+                for card_id, price_id, unit_id, movement_id, payment_id, tap_id in charges:
+                    if tap_id is not None and tap_id in seen:
+                        results.append({**seen[tap_id], "duplicate": True})
+                        continue
+                    amount = prices.get(price_id)
+                    if amount is None:
+                        result = {"status": "price_not_found", "Monto": None, "Saldo": None}
+                    else:
+                        cursor.execute(
+                            "UPDATE Tarjeta SET Saldo = Saldo - ? OUTPUT inserted.Saldo WHERE ID = ? AND Saldo >= ?",
+                            (amount, card_id, amount),
+                        )
+                        row = cursor.fetchone()
+                        if row is None:
+                            cursor.execute("SELECT Saldo FROM Tarjeta WHERE ID = ?", (card_id,))
+                            card = cursor.fetchone()
+                            status = "card_not_found" if card is None else "insufficient_funds"
+                            result = {"status": status, "Monto": amount, "Saldo": card[0] if card else None}
+                        else:
+                            movements.append((movement_id, movement_type, amount, card_id))
+                            payments.append((movement_id, price_id, card_id, unit_id, payment_id))
+                            result = {
+                                "status": "charged", "Monto": amount, "Saldo": row[0],
+                                "IDMovimiento": movement_id, "IDPago": payment_id,
+                            }
+                    if tap_id is not None:
+                        seen[tap_id] = processed[tap_id] = result
+                    results.append(result)
+                cursor.fast_executemany = True
+                if movements:
+                    cursor.executemany(
+                        "INSERT INTO Movimiento (ID, IDTipoMovimiento, Monto, IDTarjeta) VALUES (?, ?, ?, ?)", movements
+                    )
+                    cursor.executemany(
+                        "INSERT INTO Pago (IDMovimiento, IDPrecio, IDTarjeta, IDUnidad, ID) VALUES (?, ?, ?, ?, ?)", payments
+                    )
+                if processed:
+                    cursor.executemany(
+                        f"INSERT INTO {TAP_TABLE} (IDTap, Resultado) VALUES (?, ?)",
+                        [(tap_id, json.dumps(result)) for tap_id, result in processed.items()],
+                    )
+            for (card_id, *_), result in zip(charges, results):
+                if result["status"] == "charged" and not result.get("duplicate"):
+                    self._publish("Tarjeta", UPDATE, {"ID": card_id, "Saldo": result["Saldo"]})
+            for movement in movements:
+                self._publish("Movimiento", INSERT, dict(zip(("ID", "IDTipoMovimiento", "Monto", "IDTarjeta"), movement)))
+            for payment in payments:
+                self._publish("Pago", INSERT, dict(zip(("IDMovimiento", "IDPrecio", "IDTarjeta", "IDUnidad", "ID"), payment)))
+        self.counters.adjust("Movimiento", len(movements))
+        self.counters.adjust("Pago", len(payments))
+        return results
+
+    def _ensure_idempotency_table(self) -> None:
+        def create():
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f"IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='{IDEMPOTENCY_TABLE}' AND xtype='U') "
+                    f"CREATE TABLE {IDEMPOTENCY_TABLE} (Clave VARCHAR(255) PRIMARY KEY, Huella VARCHAR(64) NOT NULL, "
+                    "Estado INT NOT NULL, Respuesta NVARCHAR(MAX) NOT NULL, Creado FLOAT NOT NULL)"
+                )
+                self._commit(cursor)
+
+        self.schema.ensure(IDEMPOTENCY_TABLE, create)
+
+    def idempotency_get(self, key: str) -> dict | None:
+        """Respuesta guardada para una llave de idempotencia, como dict, o None."""
+        self._ensure_idempotency_table()
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"SELECT Huella, Estado, Respuesta, Creado FROM {IDEMPOTENCY_TABLE} WHERE Clave = ?", (key,)
+            )
+            row = cursor.fetchone()
+        return {"Huella": row[0], "Estado": row[1], "Respuesta": row[2], "Creado": row[3]} if row else None
+
+    def idempotency_put(self, key: str, fingerprint: str, status: int, response: str, created: float) -> bool:
+        """Guarda la respuesta de una llave de idempotencia; False si la llave ya estaba guardada."""
+        self._ensure_idempotency_table()
+        with self._cursor() as cursor:
+            try:
+                cursor.execute(
+                    f"INSERT INTO {IDEMPOTENCY_TABLE} (Clave, Huella, Estado, Respuesta, Creado) "
+                    f"SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS "
+                    f"(SELECT 1 FROM {IDEMPOTENCY_TABLE} WITH (UPDLOCK, HOLDLOCK) WHERE Clave = ?)",
+                    (key, fingerprint, status, response, created, key),
+                )
+                inserted = cursor.rowcount == 1
+                self._commit(cursor)
+                return inserted
+            except Exception:
+                self._rollback(cursor)
+                raise
+
+    def idempotency_purge(self, before: float) -> int:
+        """Elimina las llaves de idempotencia creadas antes de `before` (segundos epoch)."""
+        self._ensure_idempotency_table()
+        with self._cursor() as cursor:
+            cursor.execute(f"DELETE FROM {IDEMPOTENCY_TABLE} WHERE Creado < ?", (before,))
+            removed = cursor.rowcount
+            self._commit(cursor)
+        return removed
+
+    def settlement_page(self, after: int, limit: int) -> List[tuple]:
+        """
+        Devuelve hasta `limit` pagos con ID mayor que `after`, ordenados por ID, como
+        tuplas (ID, IDUnidad, IDPrecio, IDTarjeta, Cobrado, IDTipoTarjeta, IDRuta).
+        `Cobrado` es el monto del Movimiento del pago; esa columna y las de Tarjeta y
+        UnidadTransporte vienen en None si la fila referida no existe.
+        """
+        from backend.app.models.card import CardCreate
+        from backend.app.models.movement import MovementCreate
+        from backend.app.models.payments import Payment
+        from backend.app.models.transport import UnidadTransporte
+        from backend.app.logic.settlement import PAYMENT_ID_INDEX
+
+        for model in (Payment, MovementCreate, CardCreate, UnidadTransporte):
+            self._ensure_table_exists(model)
+
+        # Pago.ID no es llave: sin este índice cada bloque recorre y ordena toda la tabla
+        def create():
+            with self._cursor() as cursor:
+                cursor.execute(
+                    f"IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='{PAYMENT_ID_INDEX}' "
+                    f"AND object_id = OBJECT_ID('Pago')) CREATE INDEX {PAYMENT_ID_INDEX} ON Pago (ID)"
+                )
+                self._commit(cursor)
+
+        self.schema.ensure(PAYMENT_ID_INDEX, create)
+        with self._cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT TOP (?) p.ID, p.IDUnidad, p.IDPrecio, p.IDTarjeta, m.Monto, t.IDTipoTarjeta, u.IDRuta
+                FROM Pago p
+                LEFT JOIN Movimiento m ON m.ID = p.IDMovimiento
+                LEFT JOIN Tarjeta t ON t.ID = p.IDTarjeta
+                LEFT JOIN UnidadTransporte u ON u.ID = p.IDUnidad
+                WHERE p.ID > ?
+                ORDER BY p.ID
+                """,
+                (limit, after),
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _select_in(cursor, query: str, values: set, chunk_size: int = 500) -> List[tuple]:
+        """Ejecuta `query IN (...)` para `values` en lotes y devuelve todas las filas como tuplas."""
+        values, rows = list(values), []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            cursor.execute(f"{query} ({', '.join('?' for _ in chunk)})", chunk)
+            rows.extend(tuple(row) for row in cursor.fetchall())
+        return rows
+
     def get_by_unit(self,cls: Any, unit_id: int) -> list[dict]:
         table= table = cls.__entity_name__
         sql = f"SELECT * FROM {table} WHERE idunidad = ?"
         try:
-            self.cursor.execute(sql, (unit_id,))
-            row = self.cursor.fetchone()
-            return cls.from_dict(dict(zip([column[0] for column in self.cursor.description], row))) if row else None
+            with self._cursor() as cursor:
+                cursor.execute(sql, (unit_id,))
+                row = cursor.fetchone()
+                return cls.from_dict(dict(zip([column[0] for column in cursor.description], row))) if row else None
 
         except pyodbc.Error as e:
             raise RuntimeError(f"Error al obtener registros de la unidad {unit_id}: {e}")
     def _execute_query(self, query: str, params: tuple = ()) -> list:
         """Ejecuta una consulta SQL y retorna los resultados como una lista de diccionarios."""
         try:
-            self.cursor.execute(query, params)
-            rows = self.cursor.fetchone()
-            return rows
+            with self._cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchone()
+                return rows
         except pyodbc.Error as e:
             raise RuntimeError(f"Error al ejecutar la consulta: {e}")
 
     def ruta_interconexion(self, ubicacion_llegada: str, ubicacion_final: str) -> dict:
         response = {"interconexiones": []}
         try:
-            rutas_llegada = self._get_rutas_por_ubicacion(ubicacion_llegada)
-            if not rutas_llegada:
-                return {"mensaje": "No se encontraron rutas desde la ubicación de llegada."}
-            rutas_final = self._get_rutas_por_ubicacion(ubicacion_final)
-            if not rutas_final:
-                return {"mensaje": "No se encontraron rutas hacia la ubicación final."}
-            for ruta_id, ruta_name, _, _ in rutas_llegada:
-                for ruta_final_id, ruta_final_name, _, _ in rutas_final:
-                    self._agregar_interconexiones(response, ruta_id, ruta_name, ruta_final_id, ruta_final_name)
-            if not response["interconexiones"]:
-                return {"mensaje": "No se encontraron rutas con interconexión."}
+            # Todas las consultas de la planificación comparten una sola conexión del pool
+            with self.unit_of_work():
+                rutas_llegada = self._get_rutas_por_ubicacion(ubicacion_llegada)
+                if not rutas_llegada:
+                    return {"mensaje": "No se encontraron rutas desde la ubicación de llegada."}
+                rutas_final = self._get_rutas_por_ubicacion(ubicacion_final)
+                if not rutas_final:
+                    return {"mensaje": "No se encontraron rutas hacia la ubicación final."}
+                for ruta_id, ruta_name, _, _ in rutas_llegada:
+                    for ruta_final_id, ruta_final_name, _, _ in rutas_final:
+                        self._agregar_interconexiones(response, ruta_id, ruta_name, ruta_final_id, ruta_final_name)
+                if not response["interconexiones"]:
+                    return {"mensaje": "No se encontraron rutas con interconexión."}
         except Exception as e:
             response = {"error": f"Error al obtener la ruta: {str(e)}"}
             logger.error(response["error"])
-        finally:
-            self.conn.commit()
         return response
 
     def _get_rutas_por_ubicacion(self, ubicacion: str):
@@ -257,8 +763,9 @@ class UniversalController:
         JOIN DB_PUBLIC_TRANSIT_AGENCY.dbo.Parada p ON rp.IDParada = p.ID
         WHERE p.Ubicacion = ?;
         '''
-        self.cursor.execute(query, (ubicacion,))
-        return self.cursor.fetchall()
+        with self._cursor() as cursor:
+            cursor.execute(query, (ubicacion,))
+            return cursor.fetchall()
 
     def _agregar_interconexiones(self, response, ruta_id, ruta_name, ruta_final_id, ruta_final_name):
         query_interconexion = '''
@@ -268,8 +775,9 @@ class UniversalController:
         JOIN DB_PUBLIC_TRANSIT_AGENCY.dbo.RutaParada rp2 ON p.ID = rp2.IDParada
         WHERE rp1.IDRuta = ? AND rp2.IDRuta = ?;
         '''
-        self.cursor.execute(query_interconexion, (ruta_id, ruta_final_id))
-        interconexiones = self.cursor.fetchall()
+        with self._cursor() as cursor:
+            cursor.execute(query_interconexion, (ruta_id, ruta_final_id))
+            interconexiones = cursor.fetchall()
         if interconexiones:
             for _, inter_ubicacion in interconexiones:
                 response["interconexiones"].append({
@@ -286,10 +794,8 @@ class UniversalController:
 
     # Método para obtener cualquier cuenta
     def total_registros(self, table: str, condition: str = "") -> int:
-        """Generar la consulta total por tabla"""
-        query = f"SELECT COUNT(*) FROM {table} {condition}"
-        result = self._execute_query(query)
-        return result[0] if result else 0
+        """Generar la consulta total por tabla (servida desde la caché de conteos si está vigente)"""
+        return self.counters.get(table, condition, self._count_loader(table, condition))
 
     # Método para obtener registros de una tabla específica
     def total_movimientos(self) -> int:
@@ -346,8 +852,9 @@ ORDER BY
     m.ID DESC;
         """
         try:
-            self.cursor.execute(query, (user_id,))
-            row = self.cursor.fetchone()
+            with self._cursor() as cursor:
+                cursor.execute(query, (user_id,))
+                row = cursor.fetchone()
             if row:
                 return {"tipo": row[0], "monto": row[1]}
             else:
@@ -378,10 +885,11 @@ ORDER BY
             sql += " WHERE " + " AND ".join(conditions)
 
         try:
-            self.cursor.execute(sql, tuple(params))
-            rows = self.cursor.fetchall()
-            # Convertir cada fila en un diccionario utilizando los nombres de las columnas
-            return [dict(zip([column[0] for column in self.cursor.description], row)) for row in rows]
+            with self._cursor() as cursor:
+                cursor.execute(sql, tuple(params))
+                rows = cursor.fetchall()
+                # Convertir cada fila en un diccionario utilizando los nombres de las columnas
+                return [dict(zip([column[0] for column in cursor.description], row)) for row in rows]
         except pyodbc.Error as e:
             raise RuntimeError(f"Error al obtener registros de Ruta-Parada: {e}")
     def get_turno_usuario(self, user_id: int) -> dict:
@@ -406,12 +914,84 @@ ORDER BY
         """
         query = "SELECT Saldo FROM Tarjeta WHERE IDUsuario = ?"
         try:
-            self.cursor.execute(query, (user_id,))
-            row = self.cursor.fetchone()
+            with self._cursor() as cursor:
+                cursor.execute(query, (user_id,))
+                row = cursor.fetchone()
             return row[0] if row else 0.0
         except pyodbc.Error as e:
             raise RuntimeError(f"Error al obtener el saldo del usuario con ID {user_id}: {e}")
 
+    DASHBOARD_COUNTERS = {
+        "total_unidades": ("unidadtransporte", ""),
+        "total_pasajeros": ("Usuario", "WHERE IDRolUsuario = 1"),
+        "total_operarios": ("usuario", "WHERE IDRolUsuario = 2"),
+        "total_supervisores": ("usuario", "WHERE IDRolUsuario = 3"),
+        "total_mantenimiento": ("mantenimientoins", ""),
+        "proximos_mantenimientos": ("mantenimientoins", "WHERE fecha < GETDATE()"),
+    }
+
+    def dashboard_globals(self) -> dict:
+        """
+        Contadores globales del dashboard (unidades, usuarios por rol y mantenimientos).
+        Se sirven desde la caché de conteos; si alguno venció se leen todos en una
+        sola consulta.
+        """
+        cached = {name: self.counters.lookup(*spec) for name, spec in self.DASHBOARD_COUNTERS.items()}
+        if all(value is not None for value in cached.values()):
+            return cached
+        query = "SELECT " + ", ".join(
+            f"(SELECT COUNT(*) FROM {table} {condition}) AS {name}"
+            for name, (table, condition) in self.DASHBOARD_COUNTERS.items()
+        )
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(query)
+                row = cursor.fetchone()
+                values = dict(zip([column[0] for column in cursor.description], row))
+        except pyodbc.Error as e:
+            raise RuntimeError(f"Error al obtener los contadores del dashboard: {e}")
+        for name, (table, condition) in self.DASHBOARD_COUNTERS.items():
+            self.counters.store(table, condition, values[name], self._count_loader(table, condition))
+        return values
+
+    def _count_loader(self, table: str, condition: str):
+        def load() -> int:
+            result = self._execute_query(f"SELECT COUNT(*) FROM {table} {condition}")
+            return result[0] if result else 0
+        return load
+
+    def dashboard_user(self, user_id: int) -> dict:
+        """
+        Campos del dashboard de un usuario en un solo lote con dos conjuntos de
+        resultados: tipo de tarjeta, turno y saldo; y el último uso de la tarjeta.
+        """
+        query = """
+        SELECT
+            (SELECT TOP 1 tt.Tipo FROM Tarjeta t JOIN TipoTarjeta tt ON t.IDTipoTarjeta = tt.ID WHERE t.IDUsuario = ?) AS type_card,
+            (SELECT TOP 1 tu.TipoTurno FROM Usuario u JOIN Turno tu ON u.IDTurno = tu.ID WHERE u.ID = ?) AS turno,
+            (SELECT TOP 1 Saldo FROM Tarjeta WHERE IDUsuario = ?) AS saldo;
+        SELECT TOP 1 tm.TipoMovimiento, m.Monto
+        FROM Pago p
+        INNER JOIN Movimiento m ON p.IDMovimiento = m.ID
+        INNER JOIN TipoMovimiento tm ON m.IDTipoMovimiento = tm.ID
+        INNER JOIN Tarjeta t ON p.IDTarjeta = t.ID
+        WHERE t.IDUsuario = ?
+        ORDER BY m.ID DESC;
+        """
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(query, (user_id, user_id, user_id, user_id))
+                fields = cursor.fetchone()
+                last = cursor.fetchone() if cursor.nextset() else None
+        except pyodbc.Error as e:
+            raise RuntimeError(f"Error al obtener el dashboard del usuario con ID {user_id}: {e}")
+        return {
+            "type_card": fields[0] if fields and fields[0] is not None else "",
+            "turno": fields[1] if fields and fields[1] is not None else 0.0,
+            "saldo": fields[2] if fields and fields[2] is not None else 0.0,
+            "last_card_used": {"tipo": last[0], "monto": last[1]} if last else {"tipo": "N/A", "monto": "N/A"},
+        }
+
     def get_type_card(self, user_id: int) -> str:
         """
         Obtiene el tipo de tarjeta de un usuario según su ID desde la tabla Tarjeta y TipoTarjeta.
@@ -423,8 +1003,9 @@ ORDER BY
         WHERE t.IDUsuario = ?
         """
         try:
-            self.cursor.execute(query, (user_id,))
-            row = self.cursor.fetchone()
+            with self._cursor() as cursor:
+                cursor.execute(query, (user_id,))
+                row = cursor.fetchone()
             return row[0] if row else ""
         except pyodbc.Error as e:
             raise RuntimeError(f"Error al obtener el tipo de tarjeta del usuario con ID {user_id}: {e}")
@@ -435,7 +1016,7 @@ ORDER BY
         """
         query = "SELECT * FROM RutaParada WHERE IDRuta = ? AND IDParada = ?"
         try:
-            with self.conn.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(query, (id_ruta, id_parada))
                 row = cursor.fetchone()
                 if row is None:
@@ -450,28 +1031,42 @@ ORDER BY
 
     def delete_ruta_parada(self, id_ruta: int, id_parada: int):
         """
-        Elimina la relación Ruta-Parada específica por clave compuesta.
+        Elimina la relación Ruta-Parada específica por clave compuesta. Devuelve
+        False si no existe.
         """
         query = "DELETE FROM RutaParada WHERE IDRuta = ? AND IDParada = ?"
         try:
-            with self.conn.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(query, (id_ruta, id_parada))
-                self.conn.commit()
-                return True
+                eliminadas = cursor.rowcount
+                self._commit(cursor)
+            if eliminadas == 0:
+                return False
+            self._publish("RutaParada", DELETE, {"IDRuta": id_ruta, "IDParada": id_parada})
+            return True
         except Exception as e:
             logger.error(f"Error en delete_ruta_parada: {e}")
             return False
 
     def update_ruta_parada(self, id_ruta: int, id_parada: int, nuevo_id_ruta: int, nuevo_id_parada: int):
         """
-        Actualiza la relación Ruta-Parada específica por clave compuesta.
+        Actualiza la relación Ruta-Parada específica por clave compuesta. Devuelve
+        False si no existe.
         """
         query = "UPDATE RutaParada SET IDRuta = ?, IDParada = ? WHERE IDRuta = ? AND IDParada = ?"
         try:
-            with self.conn.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(query, (nuevo_id_ruta, nuevo_id_parada, id_ruta, id_parada))
-                self.conn.commit()
-                return True
+                actualizadas = cursor.rowcount
+                self._commit(cursor)
+            if actualizadas == 0:
+                return False
+            self._publish(
+                "RutaParada", UPDATE,
+                {"IDRuta": nuevo_id_ruta, "IDParada": nuevo_id_parada},
+                previous={"IDRuta": id_ruta, "IDParada": id_parada},
+            )
+            return True
         except Exception as e:
             logger.error(f"Error en update_ruta_parada: {e}")
             return False
@@ -487,8 +1082,9 @@ ORDER BY
             JOIN Parada p ON rp.IDParada = p.ID
         """
         try:
-            self.cursor.execute(sql)
-            rows = self.cursor.fetchall()
+            with self._cursor() as cursor:
+                cursor.execute(sql)
+                rows = cursor.fetchall()
             return [
                 {"NombreRuta": row[0], "NombreParada": row[1]}
                 for row in rows
@@ -541,9 +1137,10 @@ ORDER BY
             LEFT JOIN TipoTransporte t ON u.IDTipo = t.ID
         """
         try:
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            columns = [column[0] for column in self.cursor.description]
+            with self._cursor() as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
             return [dict(zip(columns, row)) for row in rows]
         except Exception as e:
             logger.error(f"Error al obtener unidades con nombres: {e}")
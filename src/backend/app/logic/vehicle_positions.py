@@ -0,0 +1,243 @@
+import logging
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from backend.app.core.config import settings
+from backend.app.logic.spatial_index import parse_coordinates
+from backend.app.models.transport import UnidadTransporte
+
+logger = logging.getLogger(__name__)
+
+# (timestamp, Ubicacion, lat, lon); lat/lon son None si la ubicación no trae coordenadas
+Position = Tuple[float, str, Optional[float], Optional[float]]
+# ID de UnidadTransporte: VARCHAR(20), sin caracteres de control
+_UNIT_ID = re.compile(r"[^\x00-\x1f\x7f]{1,20}")
+
+
+def _as_dict(unit_id: str, position: Position) -> dict:
+    timestamp, ubicacion, lat, lon = position
+    return {"ID": unit_id, "Ubicacion": ubicacion, "lat": lat, "lon": lon, "timestamp": timestamp}
+
+
+def parse_unit_id(value: Any) -> str:
+    """Devuelve `value` como ID de unidad. Lanza ValueError si no es válido."""
+    unit_id = str(value)
+    if not _UNIT_ID.fullmatch(unit_id):
+        raise ValueError(f"ID de unidad inválido: {unit_id[:40]!r}.")
+    return unit_id
+
+
+def parse_position(item: Any) -> Tuple[str, str, Optional[float]]:
+    """
+    Valida un reporte `{"ID", "Ubicacion" | "lat"+"lon", "timestamp"?}` y devuelve
+    (ID, Ubicacion, timestamp). Lanza ValueError si no es válido.
+    """
+    if not isinstance(item, dict) or not item.get("ID"):
+        raise ValueError("Cada posición debe tener 'ID'.")
+    unit_id = parse_unit_id(item["ID"])
+    if item.get("Ubicacion"):
+        ubicacion = " ".join(str(item["Ubicacion"]).split())
+    elif item.get("lat") is not None and item.get("lon") is not None:
+        lat, lon = float(item["lat"]), float(item["lon"])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Coordenadas fuera de rango para la unidad {unit_id}.")
+        ubicacion = f"{lat:.6f}, {lon:.6f}"
+    else:
+        raise ValueError(f"La posición de la unidad {unit_id} debe tener 'Ubicacion' o 'lat' y 'lon'.")
+    if len(ubicacion) > 200:
+        raise ValueError(f"La ubicación de la unidad {unit_id} supera los 200 caracteres.")
+    timestamp = item.get("timestamp")
+    return unit_id, ubicacion, float(timestamp) if timestamp is not None else None
+
+
+class VehiclePositionStore:
+    """
+    Posiciones de las unidades de transporte en memoria.
+
+    Cada unidad tiene un buffer circular con sus últimos `history` reportes; la
+    posición actual se lee siempre de aquí, sin tocar la base de datos. La
+    columna `UnidadTransporte.Ubicacion` se escribe por detrás: un hilo junta la
+    última posición de cada unidad cambiada y la guarda en un solo lote cada
+    `POSITION_FLUSH_INTERVAL` segundos, así que mil reportes de una unidad entre
+    dos escrituras cuestan un solo UPDATE.
+    """
+
+    def __init__(self, controller: Any, history: Optional[int] = None, max_units: Optional[int] = None):
+        self.controller = controller
+        self.history = history or settings.POSITION_HISTORY
+        self.max_units = max_units or settings.POSITION_MAX_UNITS
+        self._buffers: Dict[str, Deque[Position]] = {}
+        # Unidad -> última Ubicacion aún no escrita en la base de datos
+        self._dirty: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._received = 0
+        self._stale = 0
+        self._flushes = 0
+        self._written = 0
+        self._write_errors = 0
+        self._unknown = 0
+        self._last_flush: Optional[float] = None
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def subscribe(self, listener: Callable[[dict], None]) -> Callable[[], None]:
+        """Registra `listener`, que recibe cada posición aceptada; devuelve la función que lo da de baja."""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def record(self, unit_id: str, ubicacion: str, timestamp: Optional[float] = None) -> bool:
+        """
+        Guarda un reporte. Devuelve False si es más viejo que la última posición de la
+        unidad (se descarta); lanza ValueError si no caben más unidades.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        coordinates = parse_coordinates(ubicacion) or (None, None)
+        with self._lock:
+            self._received += 1
+            buffer = self._buffers.get(unit_id)
+            if buffer is None:
+                if len(self._buffers) >= self.max_units:
+                    raise ValueError(f"Se alcanzó el máximo de {self.max_units} unidades con posición.")
+                buffer = self._buffers[unit_id] = deque(maxlen=self.history)
+            elif buffer and timestamp < buffer[-1][0]:
+                self._stale += 1
+                return False
+            position = (timestamp, ubicacion, *coordinates)
+            buffer.append(position)
+            self._dirty[unit_id] = ubicacion
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(_as_dict(unit_id, position))
+            except Exception as e:
+                logger.error(f"Error al notificar la posición de la unidad {unit_id}: {e}")
+        return True
+
+    def record_many(self, items: Iterable[Any]) -> dict:
+        """Valida (ver `parse_position`) y guarda un lote de reportes; uno inválido no frena el resto."""
+        result = {"total": 0, "accepted": 0, "stale": 0, "failed": 0, "errors": []}
+        for index, item in enumerate(items):
+            result["total"] += 1
+            try:
+                if self.record(*parse_position(item)):
+                    result["accepted"] += 1
+                else:
+                    result["stale"] += 1
+            except (TypeError, ValueError) as e:
+                result["failed"] += 1
+                result["errors"].append({"index": index, "error": str(e)})
+        return result
+
+    def latest(self, unit_id: str) -> Optional[dict]:
+        with self._lock:
+            buffer = self._buffers.get(unit_id)
+            return _as_dict(unit_id, buffer[-1]) if buffer else None
+
+    def history_of(self, unit_id: str, limit: Optional[int] = None) -> List[dict]:
+        """Últimos reportes de la unidad, del más reciente al más viejo."""
+        with self._lock:
+            positions = list(self._buffers.get(unit_id, ()))
+        positions.reverse()
+        return [_as_dict(unit_id, position) for position in positions[:limit]]
+
+    def snapshot(self) -> List[dict]:
+        """Última posición de cada unidad."""
+        with self._lock:
+            return [_as_dict(unit_id, buffer[-1]) for unit_id, buffer in self._buffers.items() if buffer]
+
+    def flush(self) -> int:
+        """Escribe en la base de datos la última posición de las unidades cambiadas. Devuelve cuántas."""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return 0
+            values = list(dirty.items())
+            unknown: set = set()
+            try:
+                result = self.controller.update_field_many(UnidadTransporte, "Ubicacion", values)
+                failed = {values[error["index"]][0] for error in result["errors"] if not error.get("missing")}
+                unknown = {values[error["index"]][0] for error in result["errors"] if error.get("missing")}
+            except Exception as e:
+                logger.error(f"No se pudieron escribir {len(values)} posiciones: {e}")
+                failed = set(dirty)
+            if unknown:
+                logger.warning(f"Posiciones descartadas de {len(unknown)} unidades que no existen: {sorted(unknown)[:10]}")
+            with self._lock:
+                self._flushes += 1
+                self._last_flush = time.time()
+                self._written += len(values) - len(failed) - len(unknown)
+                self._write_errors += len(failed)
+                self._unknown += len(unknown)
+                # Se reintentan en la próxima escritura, salvo que ya haya una posición más nueva
+                for unit_id in failed:
+                    self._dirty.setdefault(unit_id, dirty[unit_id])
+                # Las unidades que no existen no se vuelven a escribir ni se muestran
+                for unit_id in unknown:
+                    self._dirty.pop(unit_id, None)
+                    self._buffers.pop(unit_id, None)
+            return len(values) - len(failed) - len(unknown)
+
+    def start_writer(self, interval: Optional[float] = None) -> None:
+        """Inicia el hilo que escribe las posiciones cada `interval` segundos."""
+        interval = settings.POSITION_FLUSH_INTERVAL if interval is None else interval
+        if interval <= 0 or (self._writer is not None and self._writer.is_alive()):
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._writer = threading.Thread(target=run, name="position-writer", daemon=True)
+        self._writer.start()
+
+    def stop_writer(self) -> None:
+        """Detiene el hilo y escribe las posiciones pendientes."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "units": len(self._buffers),
+                "history": self.history,
+                "received": self._received,
+                "stale": self._stale,
+                "pending_writes": len(self._dirty),
+                "flushes": self._flushes,
+                "written": self._written,
+                "write_errors": self._write_errors,
+                "unknown_units": self._unknown,
+                "last_flush": self._last_flush,
+                "writer_running": self._writer is not None and self._writer.is_alive(),
+            }
+
+
+_stores: "weakref.WeakKeyDictionary[Any, VehiclePositionStore]" = weakref.WeakKeyDictionary()
+_stores_lock = threading.Lock()
+
+
+def position_store_for(controller: Any) -> VehiclePositionStore:
+    """Devuelve el almacén de posiciones del proceso para `controller`."""
+    with _stores_lock:
+        store = _stores.get(controller)
+        if store is None:
+            store = _stores[controller] = VehiclePositionStore(controller)
+        return store
@@ -81,7 +81,7 @@ def test_dashboard_build_error(monkeypatch, test_user):
             return {"ID": 9999}
         Nombre = "TestUser"
     monkeypatch.setattr(controller, "get_by_column", lambda *a, **kw: GoodUser())
-    monkeypatch.setattr(controller, "total_unidades", lambda: 1/0)  # Provoca excepción
+    monkeypatch.setattr(controller, "dashboard_globals", lambda: 1/0)  # Provoca excepción
     token = make_token(test_user.ID)
     headers = {"Authorization": f"Bearer {token}"}
     response = client.get("/login/dashboard", headers=headers)
@@ -17,6 +17,17 @@ def test_create_movement():
     assert data["operation"] == "create"
     assert data["data"]["ID"] == 1
 
+def test_create_movement_assigns_distinct_ids():
+    # Sin ID en el formulario, cada creación recibe un ID distinto asignado por el servidor
+    ids = []
+    for _ in range(2):
+        response = client.post("/movement/create", data={"IDTipoMovimiento": 2, "Monto": 100, "IDTarjeta": 1}, headers=headers)
+        assert response.status_code == 201
+        ids.append(response.json()["data"]["ID"])
+    assert ids[0] != ids[1]
+    for movement_id in ids:
+        client.post("/movement/delete", data={"ID": movement_id}, headers=headers)
+
 def test_update_movement_existing():
     # Primero lo creamos si no existe
     response = client.post("/movement/update", data={"ID": 1, "IDTipoMovimiento": 2, "Monto": 90000,"IDTarjeta":1}, headers=headers)
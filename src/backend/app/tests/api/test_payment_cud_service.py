@@ -1,5 +1,6 @@
 import pytest
 import logging
+import uuid
 from fastapi.testclient import TestClient
 from backend.app.api.routes.payment_cud_service import app
 from backend.app.models.payments import Payment
@@ -115,4 +116,42 @@ def test_update_pago_no_existente():
         assert "no encontrado" in response.json().get("detail", "").lower()
     logger.warning(
         f"Test update_pago_no_existente ejecutado: status={response.status_code}, body={response.text}"
-    )
\ No newline at end of file
+    )
+
+def test_cobrar_pasaje_tarjeta_inexistente():
+    """
+    Prueba que un tap con una tarjeta que no existe se rechace sin registrar el pago.
+    """
+    response = client.post("/payments/tap", data={"IDTarjeta": 987654321, "IDPrecio": 1}, headers=headers)
+    assert response.status_code == 404
+    assert response.json()["data"]["status"] in ("card_not_found", "price_not_found")
+    logger.info("Test cobrar_pasaje_tarjeta_inexistente ejecutado correctamente.")
+
+def test_cobrar_taps_lote_invalidos():
+    """
+    Prueba que los taps inválidos de un lote se informen uno por uno.
+    """
+    response = client.post("/payments/taps/batch", json={"taps": [{"IDPrecio": 1}, "tap"]}, headers=headers)
+    assert response.status_code == 200
+    resultado = response.json()
+    assert (resultado["total"], resultado["failed"]) == (2, 2)
+    assert [r["status"] for r in resultado["results"]] == ["invalid", "invalid"]
+    logger.info("Test cobrar_taps_lote_invalidos ejecutado correctamente.")
+
+def test_crear_pago_idempotente():
+    """
+    Prueba que un reintento con la misma Idempotency-Key devuelva la respuesta original.
+    """
+    pago = Payment(IDMovimiento=2, IDPrecio=1, IDTarjeta=42, IDUnidad="1", ID=67891)
+    idempotente = {**headers, "Idempotency-Key": f"test-{uuid.uuid4()}"}
+    try:
+        first = client.post("/payments/create", data=pago.model_dump(), headers=idempotente)
+        again = client.post("/payments/create", data=pago.model_dump(), headers=idempotente)
+        assert first.status_code == again.status_code == 200
+        assert again.headers["Idempotent-Replayed"] == "true"
+        assert again.json() == first.json()
+        otro = client.post("/payments/create", data={**pago.model_dump(), "IDPrecio": 2}, headers=idempotente)
+        assert otro.status_code == 422
+        logger.info("Test crear_pago_idempotente ejecutado correctamente.")
+    finally:
+        controller.delete(pago)
@@ -43,4 +43,10 @@ def test_detalle_parada_no_existente():
     assert response.status_code in (404, 500)
     logger.warning(
         f"Test detalle_parada_no_existente ejecutado: status={response.status_code}, body={response.text}"
-    )
\ No newline at end of file
+    )
+
+def test_buscar_paradas_sin_tildes(setup_and_teardown):
+    response = client.get("/stops/search", params={"q": "parada de prueba ubicacion"}, headers=headers)
+    assert response.status_code == 200
+    assert any(p["ID"] == setup_and_teardown.ID for p in response.json())
+    logger.info("Test buscar_paradas ejecutado correctamente.")
@@ -6,7 +6,7 @@ from backend.app.models.transport import UnidadTransporte
 from backend.app.logic.universal_controller_instance import universal_controller as controller
 from unittest.mock import patch
 
-from backend.app.core.conf import headers
+from backend.app.core.conf import headers, test_token
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("backend.app.api.routes.transport_unit_query_service")
@@ -106,6 +106,17 @@ def test_listar_unidades_con_horarios(setup_and_teardown):
         assert isinstance(u["horarios"], list)
     logger.info("Test listar_unidades_con_horarios ejecutado correctamente.")
 
+def test_listar_unidades_con_horarios_etag(setup_and_teardown):
+    """
+    Prueba que una vista sin cambios se responda con 304 cuando el cliente envía su ETag.
+    """
+    response = client.get("/transport_units/with_schedules", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get("/transport_units/with_schedules", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    logger.info("Test listar_unidades_con_horarios_etag ejecutado correctamente.")
+
 def test_listar_unidades_con_nombres(setup_and_teardown):
     """
     Prueba para listar todas las unidades de transporte mostrando los nombres de ruta y tipo de transporte.
@@ -122,4 +133,11 @@ def test_listar_unidades_con_nombres(setup_and_teardown):
         assert "NombreTipoTransporte" in u
         assert "IDRuta" not in u
         assert "IDTipo" not in u
-    logger.info("Test listar_unidades_con_nombres ejecutado correctamente.")
\ No newline at end of file
+    logger.info("Test listar_unidades_con_nombres ejecutado correctamente.")
+
+def test_flota_en_vivo_ws(setup_and_teardown):
+    with client.websocket_connect(f"/transport_units/ws?token={test_token}") as websocket:
+        snapshot = websocket.receive_json()
+    assert snapshot["type"] == "snapshot"
+    assert any(u["ID"] == setup_and_teardown.ID for u in snapshot["data"])
+    logger.info("Test flota_en_vivo_ws ejecutado correctamente.")
@@ -0,0 +1,42 @@
+import logging
+import pytest
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+from backend.app.api.routes.vehicle_position_service import app
+from backend.app.core.conf import headers, test_token
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("backend.app.api.routes.vehicle_position_service")
+
+api = FastAPI()
+api.include_router(app)
+client = TestClient(api, raise_server_exceptions=False)
+
+def test_registrar_y_consultar_posiciones():
+    response = client.post("/positions/batch", json=[
+        {"ID": "POS-TEST", "lat": 10.42, "lon": -75.54, "timestamp": 1},
+        {"ID": "POS-TEST", "Ubicacion": "10.43, -75.55", "timestamp": 2},
+        {"Ubicacion": "sin ID"},
+    ], headers=headers)
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 2 and response.json()["failed"] == 1
+    response = client.get("/positions/POS-TEST", params={"history": 5}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["Ubicacion"] == "10.43, -75.55"
+    assert len(response.json()["historial"]) == 2
+    logger.info("Test registrar_y_consultar_posiciones ejecutado correctamente.")
+
+def test_websocket_posiciones():
+    with client.websocket_connect(f"/positions/ws?token={test_token}") as websocket:
+        websocket.send_text('{"ID": "POS-WS", "Ubicacion": "Terminal"}')
+        assert websocket.receive_json()["accepted"] == 1
+        websocket.send_text("[]" * 2)
+        assert "error" in websocket.receive_json()
+    assert client.get("/positions/POS-WS", headers=headers).json()["Ubicacion"] == "Terminal"
+
+def test_peticiones_invalidas():
+    response = client.post("/positions/batch", content="no es json", headers=headers)
+    assert response.status_code == 400
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/positions/ws") as websocket:
+            websocket.receive_json()
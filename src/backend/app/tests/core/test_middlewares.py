@@ -2,6 +2,7 @@ import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from backend.app.core.middlewares import add_middlewares
+from backend.app.logic.async_controller import DatabaseBusyError
 
 @pytest.fixture
 def app_with_middleware():
@@ -16,6 +17,10 @@ def app_with_middleware():
     async def fail():
         raise Exception("fail")
 
+    @app.get("/busy")
+    async def busy():
+        raise DatabaseBusyError("busy")
+
     return app
 
 def test_ok_response(app_with_middleware):
@@ -29,3 +34,9 @@ def test_exception_caught(app_with_middleware):
     response = client.get("/fail")
     assert response.status_code == 500
     assert response.json() == {"detail": "Internal server error"}
+
+def test_database_busy_returns_503(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    response = client.get("/busy")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,47 @@
+import json
+import sqlite3
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from backend.app.core.pagination import ndjson_export, parse_columns
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.movement import MovementCreate, MovementOut
+
+@pytest.fixture
+def controller(tmp_path):
+    c = UniversalController(str(tmp_path / "data.db"))
+    for i in range(1, 8):
+        c.add(MovementCreate(ID=i, IDTipoMovimiento=1, Monto=i, IDTarjeta=3))
+    yield c
+    c.close()
+
+def test_parse_columns_validates():
+    assert parse_columns(MovementOut, "monto, IDTarjeta") == ["ID", "Monto", "IDTarjeta"]
+    assert parse_columns(MovementOut, None) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_columns(MovementOut, "Saldo")
+    assert exc.value.status_code == 400
+
+def test_read_page_walks_all_rows(controller):
+    seen, after = [], None
+    while True:
+        page = controller.read_page(MovementOut, 3, after=after)
+        seen += [row["ID"] for row in page["items"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert seen == list(range(1, 8))
+
+def test_ndjson_export_streams_rows(controller):
+    app = FastAPI()
+
+    @app.get("/export")
+    def export():
+        return ndjson_export(controller, MovementOut, columns=["ID", "Monto"])
+
+    response = TestClient(app).get("/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[0] == {"ID": 1, "Monto": 1.0}
+    assert len(rows) == 7
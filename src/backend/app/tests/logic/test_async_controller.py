@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+import pytest
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import (
+    AsyncControllerFacade,
+    BlockingCallOnEventLoopError,
+    DatabaseBusyError,
+    DatabaseExecutor,
+    ensure_not_on_event_loop,
+)
+
+class FakeController:
+    limit = 5
+
+    def get_by_id(self, cls, id_value):
+        return {"thread": threading.current_thread().name, "id": id_value}
+
+    def slow(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+def test_facade_runs_on_worker_thread():
+    executor = DatabaseExecutor(max_workers=2, max_queue=2, queue_timeout=1)
+    db = AsyncControllerFacade(FakeController(), executor)
+    result = asyncio.run(db.get_by_id(object, 7))
+    assert result["id"] == 7
+    assert result["thread"].startswith("db-worker")
+    assert db.limit == 5
+    assert executor.metrics()["completed"] == 1
+
+def test_facade_resolves_patched_methods():
+    controller = FakeController()
+    db = AsyncControllerFacade(controller, DatabaseExecutor(1, 0, 1))
+    controller.get_by_id = lambda cls, id_value: "patched"
+    assert asyncio.run(db.get_by_id(object, 1)) == "patched"
+
+def test_backpressure_rejects_when_queue_is_full():
+    executor = DatabaseExecutor(max_workers=1, max_queue=0, queue_timeout=0.05)
+    db = AsyncControllerFacade(FakeController(), executor)
+
+    async def scenario():
+        first = asyncio.ensure_future(db.slow(0.3))
+        await asyncio.sleep(0.01)
+        with pytest.raises(DatabaseBusyError):
+            await db.slow(0)
+        assert await first == 0.3
+
+    asyncio.run(scenario())
+    assert executor.metrics()["rejected"] == 1
+
+def test_event_loop_guard(monkeypatch):
+    monkeypatch.setattr(settings, "DB_EVENT_LOOP_GUARD", "raise")
+
+    async def on_loop():
+        ensure_not_on_event_loop("test")
+
+    with pytest.raises(BlockingCallOnEventLoopError):
+        asyncio.run(on_loop())
+    # Fuera del loop la llamada es válida
+    ensure_not_on_event_loop("test")
+
+def test_event_loop_guard_off_by_default():
+    async def on_loop():
+        ensure_not_on_event_loop("test")
+
+    asyncio.run(on_loop())
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import pytest
+from backend.app.core.config import settings
+from backend.app.logic import batch_planner
+from backend.app.logic.batch_planner import parse_od_pairs, plan_batch
+from backend.app.logic.transit_graph import RoutePlanner, TransitGraph
+
+RUTAS = [{"ID": 1, "Nombre": "A", "IDHorario": 1}, {"ID": 2, "Nombre": "B", "IDHorario": 1}]
+PARADAS = [{"ID": i, "Ubicacion": f"Calle {i}"} for i in range(1, 4)]
+ENLACES = [{"IDRuta": r, "IDParada": p} for r, p in [(1, 1), (1, 2), (2, 2), (2, 3)]]
+HORARIOS = [{"ID": 1, "Salida": "08:00", "Llegada": "08:30"}]
+
+def make_planner():
+    planner = RoutePlanner(None)
+    planner.graph = TransitGraph.from_rows(RUTAS, PARADAS, ENLACES, HORARIOS)
+    return planner
+
+def run(planner, pairs, chunk_size=2):
+    async def collect():
+        return [r async for r in plan_batch(planner, pairs, chunk_size=chunk_size)]
+    return sorted(asyncio.run(collect()), key=lambda r: r["index"])
+
+def test_parse_json_and_ndjson_bodies():
+    par = {"ubicacion_entrada": " Calle 1", "ubicacion_final": "Calle 3", "hora_salida": "07:00"}
+    assert parse_od_pairs(json.dumps([par]).encode()) == parse_od_pairs(json.dumps({"pares": [par]}).encode())
+    ndjson = "\n".join(json.dumps(p) for p in [par, {"ubicacion_entrada": "a", "ubicacion_final": "b"}])
+    pairs = parse_od_pairs(ndjson.encode(), "application/x-ndjson")
+    assert pairs[0] == {"ubicacion_entrada": "Calle 1", "ubicacion_final": "Calle 3", "hora_salida": 7 * 3600}
+    assert pairs[1]["hora_salida"] is None
+    for body in (b"", b"[]", b'[{"ubicacion_entrada": "a"}]', b"{no json"):
+        with pytest.raises(ValueError):
+            parse_od_pairs(body)
+
+def test_batch_in_threads(monkeypatch):
+    monkeypatch.setattr(settings, "PLANNER_BATCH_WORKERS", 0)
+    pairs = parse_od_pairs(json.dumps([
+        {"ubicacion_entrada": "Calle 1", "ubicacion_final": "Calle 3"},
+        {"ubicacion_entrada": "Calle 1", "ubicacion_final": "NoExiste"},
+        {"ubicacion_entrada": "Calle 1", "ubicacion_final": "Calle 2", "hora_salida": "09:00"},
+    ]).encode())
+    results = run(make_planner(), pairs)
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["interconexiones"][0]["transbordos"] == 1
+    assert "mensaje" in results[1] and "mensaje" in results[2]
+
+def test_batch_in_process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "PLANNER_BATCH_WORKERS", 1)
+    pairs = parse_od_pairs(json.dumps([{"ubicacion_entrada": "Calle 1", "ubicacion_final": "Calle 3"}] * 3).encode())
+    try:
+        results = run(make_planner(), pairs, chunk_size=1)
+    finally:
+        batch_planner.shutdown_planner_pool()
+    assert len(results) == 3
+    assert all(r["interconexiones"][0]["ruta_final"] == "B" for r in results)
+
+def test_graph_is_serialized_once_per_version(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PLANNER_BATCH_WORKERS", 0)
+    snapshots = batch_planner.GraphSnapshots(str(tmp_path))
+    monkeypatch.setattr(batch_planner, "_snapshots", snapshots)
+    planner = make_planner()
+    calls = []
+    original = planner.snapshot
+    monkeypatch.setattr(planner, "snapshot", lambda: calls.append(1) or original())
+    pairs = parse_od_pairs(json.dumps([{"ubicacion_entrada": "Calle 1", "ubicacion_final": "Calle 3"}] * 4).encode())
+    run(planner, pairs, chunk_size=1)
+    run(planner, pairs, chunk_size=1)
+    assert len(calls) == 1 and len(list(tmp_path.iterdir())) == 1
+    planner.version += 1
+    assert run(planner, pairs)[0]["graph_version"] == planner.version
+    # El archivo de la versión anterior se borra cuando ya nadie lo usa
+    assert len(calls) == 2 and [p.name for p in tmp_path.iterdir()] == [f"graph-{id(planner)}-{planner.version}.pkl"]
@@ -0,0 +1,55 @@
+import pytest
+from backend.app.logic.bulk import insert_batch, insert_sql
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.movement import MovementCreate, MovementOut
+from backend.app.models.asistance import AsistanceCreate
+
+@pytest.fixture
+def controller(tmp_path):
+    c = UniversalController(str(tmp_path / "data.db"))
+    yield c
+    c.close()
+
+def movement(i, monto=100):
+    return MovementCreate(ID=i, IDTipoMovimiento=1, Monto=monto, IDTarjeta=9)
+
+def test_add_many_commits_in_chunks(controller):
+    result = controller.add_many([movement(i) for i in range(1, 11)], chunk_size=3)
+    assert result == {"total": 10, "succeeded": 10, "failed": 0, "errors": []}
+    assert len(controller.read_all(MovementOut)) == 10
+
+def test_add_many_reports_failed_rows(controller):
+    controller.add(movement(5))
+    result = controller.add_many([movement(i) for i in range(1, 8)], chunk_size=4)
+    assert result["succeeded"] == 6
+    assert result["failed"] == 1
+    assert result["errors"][0]["index"] == 4 and result["errors"][0]["ID"] == 5
+    assert sorted(r["ID"] for r in controller.read_all(MovementOut)) == list(range(1, 8))
+
+def test_update_and_delete_many(controller):
+    controller.add_many([movement(i) for i in range(1, 5)])
+    result = controller.update_many([MovementOut(ID=i, IDTipoMovimiento=2, Monto=500, IDTarjeta=9) for i in (1, 2)])
+    assert result["succeeded"] == 2
+    assert controller.get_by_id(MovementOut, 2).Monto == 500
+    assert controller.delete_many(MovementOut, [1, 3])["succeeded"] == 2
+    assert sorted(r["ID"] for r in controller.read_all(MovementOut)) == [2, 4]
+
+def test_updates_of_missing_ids_fail_without_events(controller):
+    controller.add_many([movement(i) for i in range(1, 4)])
+    events = []
+    controller.events.subscribe(events.append, tables=["Movimiento"])
+    result = controller.update_many([MovementOut(ID=i, IDTipoMovimiento=2, Monto=500, IDTarjeta=9) for i in (1, 7, 3)])
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["index"] == 1 and result["errors"][0]["missing"]
+    result = controller.update_field_many(MovementOut, "Monto", [(8, 1), (2, 300)], chunk_size=1)
+    assert (result["succeeded"], result["failed"]) == (1, 1) and result["errors"][0]["ID"] == 8
+    assert [e.data["ID"] for e in events] == [1, 3, 2]
+
+def test_mixed_tables_are_rejected(controller):
+    with pytest.raises(ValueError):
+        controller.add_many([movement(1), AsistanceCreate(ID=1, iduser=1, horainicio="8", horafinal="9", fecha="x")])
+
+def test_statement_is_cached_per_model():
+    sql, params, ids = insert_batch([movement(1), movement(2)], lambda o: o.__entity_name__)
+    assert sql is insert_sql("Movimiento", ("ID", "IDTipoMovimiento", "Monto", "IDTarjeta"))
+    assert ids == [1, 2] and params[1] == (2, 1, 100.0, 9)
@@ -12,3 +12,9 @@ def test_use_card_insufficient_balance():
     result = card.use_card()
     assert result is False
     assert card.balance == 2000
+
+def test_use_card_with_fare():
+    card = CardUser(id_card=3, card_type="Pasajero", balance=5000, user_id=102)
+    assert card.use_card(fare=2500) is True
+    assert card.use_card(fare=2600) is False
+    assert card.balance == 2500
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import pytest
+from backend.app.logic.connection_pool import ConnectionPool, PoolTimeoutError
+
+def make_pool(**kwargs):
+    return ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), **kwargs)
+
+def test_reuses_idle_connection():
+    pool = make_pool(size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.metrics()["connections_created"] == 1
+
+def test_bounded_size_times_out():
+    pool = make_pool(size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+    metrics = pool.metrics()
+    assert metrics["timeouts"] == 1
+    assert metrics["in_use"] == 0
+
+def test_waiting_checkout_is_counted():
+    pool = make_pool(size=1, timeout=2)
+    release = threading.Event()
+    taken = threading.Event()
+
+    def hold():
+        with pool.connection():
+            taken.set()
+            release.wait()
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    taken.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection():
+        assert pool.metrics()["saturation"] == 1.0
+    worker.join()
+    metrics = pool.metrics()
+    assert metrics["waited_checkouts"] == 1
+    assert metrics["max_wait_seconds"] > 0
+    assert metrics["peak_in_use"] == 1
+
+def test_recycles_stale_connections():
+    pool = make_pool(size=1, recycle_seconds=0)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is not first
+    assert pool.metrics()["recycled"] == 1
+
+def test_health_check_discards_broken_connection():
+    pool = make_pool(size=1, health_check_after=0)
+    with pool.connection() as first:
+        pass
+    first.close()
+    with pool.connection() as second:
+        assert second is not first
+        assert second.execute("SELECT 1").fetchone() == (1,)
+    assert pool.metrics()["health_check_failures"] == 1
+
+def test_exception_rolls_back_and_returns_connection():
+    pool = make_pool(size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.commit()
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise ValueError("fallo")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    assert pool.metrics()["in_use"] == 0
+
+def test_read_only_use_does_not_leave_transaction_open():
+    pool = make_pool(size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
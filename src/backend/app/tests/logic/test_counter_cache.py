@@ -0,0 +1,58 @@
+import asyncio
+import time
+from backend.app.logic.counter_cache import CounterCache
+from backend.app.logic.universal_controller_async import AsyncUniversalController, AsyncSQLiteBackend
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.movement import MovementCreate, MovementOut
+
+def test_hits_misses_and_ttl():
+    cache = CounterCache(ttl=0.05)
+    loads = []
+    loader = lambda: loads.append(1) or 10
+    assert cache.get("Movimiento", "", loader) == 10
+    assert cache.get("movimiento", "", loader) == 10
+    assert len(loads) == 1
+    time.sleep(0.06)
+    cache.get("Movimiento", "", loader)
+    assert len(loads) == 2
+    stats = cache.stats()["counters"]["movimiento"]
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_adjust_updates_totals_and_drops_conditioned_counts():
+    cache = CounterCache(ttl=60)
+    cache.store("Usuario", "", 5)
+    cache.store("Usuario", "WHERE IDRolUsuario = 1", 3)
+    cache.adjust("usuario", 2)
+    assert cache.lookup("Usuario") == 7
+    assert cache.lookup("Usuario", "WHERE  IDRolUsuario = 1") is None
+
+def test_refresh_due_reloads_expiring_counters():
+    cache = CounterCache(ttl=1)
+    values = iter([1, 2])
+    cache.get("Pago", "", lambda: next(values))
+    assert cache.refresh_due(margin=5) == 1
+    assert cache.lookup("Pago") == 2
+
+def test_background_refresher_starts_and_stops():
+    cache = CounterCache(ttl=60)
+    cache.start_refresher(0.01)
+    assert cache.stats()["refresher_running"]
+    cache.stop_refresher()
+    assert not cache.stats()["refresher_running"]
+
+def test_controller_writes_keep_counts_current(tmp_path):
+    sync = UniversalController(str(tmp_path / "data.db"))
+    controller = AsyncUniversalController(AsyncSQLiteBackend(str(tmp_path / "data.db")), counters=sync.counters)
+
+    async def scenario():
+        await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        assert await controller.total_movimientos() == 1
+        sync.add_many([MovementCreate(ID=i, IDTipoMovimiento=1, Monto=1, IDTarjeta=1) for i in (2, 3)])
+        await controller.delete(MovementOut(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        total = await controller.total_movimientos()
+        await controller.close()
+        return total
+
+    assert asyncio.run(scenario()) == 2
+    assert sync.counters.stats()["counters"]["movimiento"]["hits"] == 1
+    sync.close()
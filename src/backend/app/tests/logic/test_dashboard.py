@@ -0,0 +1,66 @@
+import asyncio
+from backend.app.logic.dashboard import DashboardProvider
+from backend.app.logic.universal_controller_async import AsyncUniversalController, AsyncSQLiteBackend
+
+class FakeDB:
+    def __init__(self):
+        self.calls = []
+
+    async def dashboard_globals(self):
+        self.calls.append("globals")
+        return {"total_unidades": 4, "total_pasajeros": 10, "total_operarios": 2, "total_supervisores": 1,
+                "total_mantenimiento": 3, "proximos_mantenimientos": 1}
+
+    async def dashboard_user(self, user_id):
+        self.calls.append(("user", user_id))
+        return {"type_card": "Estudiante", "turno": "Mañana", "saldo": 5000,
+                "last_card_used": {"tipo": "Recarga", "monto": 2000}}
+
+def test_provider_maps_legacy_keys_and_times_each_part():
+    db = FakeDB()
+    data, timings = asyncio.run(DashboardProvider().load(db, 7))
+    assert sorted(db.calls, key=str) == sorted(["globals", ("user", 7)], key=str)
+    assert data["total_vehiculos"] == data["buses_mantenimiento"] == 4
+    assert data["Saldo"] == 5000 and data["ultimo_uso_tarjeta"]["tipo"] == "Recarga"
+    assert set(timings) == {"globals", "user"}
+    header = DashboardProvider.server_timing(timings)
+    assert header.startswith("dashboard-globals;dur=") and "dashboard-user;dur=" in header
+
+def test_async_controller_dashboard_queries(tmp_path):
+    controller = AsyncUniversalController(AsyncSQLiteBackend(str(tmp_path / "dash.db")))
+    ddl = [
+        "CREATE TABLE UnidadTransporte (ID TEXT)",
+        "CREATE TABLE Usuario (ID INTEGER, IDRolUsuario INTEGER, IDTurno INTEGER)",
+        "CREATE TABLE mantenimientoins (ID INTEGER, fecha TEXT)",
+        "CREATE TABLE Tarjeta (ID INTEGER, IDUsuario INTEGER, IDTipoTarjeta INTEGER, Saldo INTEGER)",
+        "CREATE TABLE TipoTarjeta (ID INTEGER, Tipo TEXT)",
+        "CREATE TABLE Turno (ID INTEGER, TipoTurno TEXT)",
+        "CREATE TABLE Movimiento (ID INTEGER, IDTipoMovimiento INTEGER, Monto REAL, IDTarjeta INTEGER)",
+        "CREATE TABLE TipoMovimiento (ID INTEGER, TipoMovimiento TEXT)",
+        "CREATE TABLE Pago (ID INTEGER, IDMovimiento INTEGER, IDPrecio INTEGER, IDTarjeta INTEGER, IDUnidad TEXT)",
+        "INSERT INTO UnidadTransporte VALUES ('U1'), ('U2')",
+        "INSERT INTO Usuario VALUES (1, 1, 1), (2, 2, 1)",
+        "INSERT INTO mantenimientoins VALUES (1, '2000-01-01')",
+        "INSERT INTO Tarjeta VALUES (10, 1, 1, 3500)",
+        "INSERT INTO TipoTarjeta VALUES (1, 'Estudiante')",
+        "INSERT INTO Turno VALUES (1, 'Mañana')",
+        "INSERT INTO TipoMovimiento VALUES (1, 'Pasaje')",
+        "INSERT INTO Movimiento VALUES (5, 1, 2500, 10)",
+        "INSERT INTO Pago VALUES (1, 5, 1, 10, 'U1')",
+    ]
+
+    async def scenario():
+        for sql in ddl:
+            await controller._write(sql)
+        globales = await controller.dashboard_globals()
+        usuario = await controller.dashboard_user(1)
+        sin_tarjeta = await controller.dashboard_user(2)
+        await controller.close()
+        return globales, usuario, sin_tarjeta
+
+    globales, usuario, sin_tarjeta = asyncio.run(scenario())
+    assert globales == {"total_unidades": 2, "total_pasajeros": 1, "total_operarios": 1, "total_supervisores": 0,
+                        "total_mantenimiento": 1, "proximos_mantenimientos": 1}
+    assert usuario == {"type_card": "Estudiante", "turno": "Mañana", "saldo": 3500,
+                       "last_card_used": {"tipo": "Pasaje", "monto": 2500.0}}
+    assert sin_tarjeta["type_card"] == "" and sin_tarjeta["last_card_used"] == {"tipo": "N/A", "monto": "N/A"}
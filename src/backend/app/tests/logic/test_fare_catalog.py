@@ -0,0 +1,47 @@
+import numpy as np
+from backend.app.logic.fare_catalog import FareCatalog
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.price import PriceCreate
+from backend.app.models.type_card import TypeCardCreate
+from backend.app.models.type_transport import TypeTransportCreate
+
+def make_controller(path):
+    controller = UniversalController(str(path))
+    controller.add_many([TypeTransportCreate(ID=1, TipoTransporte="Bus"), TypeTransportCreate(ID=2, TipoTransporte="Metro")])
+    controller.add_many([TypeCardCreate(ID=1, Tipo="General"), TypeCardCreate(ID=2, Tipo="Estudiante")])
+    controller.add_many([
+        PriceCreate(ID=1, IDTipoTransporte=1, Monto=2500),
+        PriceCreate(ID=2, IDTipoTransporte=2, Monto=3000),
+        PriceCreate(ID=3, IDTipoTransporte=1, Monto=2800),
+    ])
+    return controller
+
+def test_compute_fares_by_price_and_by_transport_type(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    catalog = FareCatalog(controller, factors={2: 0.5})
+
+    fares = catalog.compute_fares({"IDPrecio": [1, 2, 3, 9, 1], "IDTipoTarjeta": [1, 2, 1, 1, 7]})
+    np.testing.assert_array_equal(fares, [2500, 1500, 2800, np.nan, np.nan])
+
+    # Por tipo de transporte se usa el precio de mayor ID
+    taps = np.array([(1, 1), (1, 2), (2, 2), (5, 1)], dtype=[("IDTipoTransporte", "i8"), ("IDTipoTarjeta", "i8")])
+    np.testing.assert_array_equal(catalog.compute_fares(taps), [2800, 1400, 1500, np.nan])
+    np.testing.assert_array_equal(catalog.compute_fares({"IDTipoTransporte": [2, 3]}), [3000, np.nan])
+    assert catalog.stats()["builds"] == 1 and catalog.stats()["taps_priced"] == 11
+    controller.close()
+
+def test_price_changes_rebuild_the_catalog(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    catalog = FareCatalog(controller)
+    assert catalog.compute_fares({"IDPrecio": [2]})[0] == 3000
+
+    controller.update(PriceCreate(ID=2, IDTipoTransporte=2, Monto=3200))
+    assert not catalog.stats()["loaded"]
+    assert catalog.compute_fares({"IDPrecio": [2]})[0] == 3200
+
+    controller.add(PriceCreate(ID=4, IDTipoTransporte=2, Monto=3500))
+    taps = {"IDTipoTransporte": np.full(1_000_000, 2), "IDTipoTarjeta": np.ones(1_000_000, dtype=np.int64)}
+    fares = catalog.compute_fares(taps)
+    assert fares.shape == (1_000_000,) and fares.sum() == 3500 * 1_000_000
+    assert catalog.stats()["version"] == 2 and catalog.stats()["builds"] == 3
+    controller.close()
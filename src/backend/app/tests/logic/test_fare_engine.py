@@ -0,0 +1,75 @@
+import time
+import pytest
+from backend.app.logic.change_events import INSERT, UPDATE
+from backend.app.logic.fare_engine import FareEngine
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.card import CardCreate
+from backend.app.models.price import PriceCreate
+
+def make_engine(tmp_path, cards):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=2500))
+    controller.add(PriceCreate(ID=2, IDTipoTransporte=2, Monto=3200))
+    controller.add_many([CardCreate(ID=card_id, IDUsuario=card_id, IDTipoTarjeta=1, Saldo=saldo) for card_id, saldo in cards])
+    return controller, FareEngine(controller, movement_type=1)
+
+def test_charges_only_when_balance_covers_the_fare(tmp_path):
+    controller, engine = make_engine(tmp_path, [(1, 6000), (2, 1000)])
+    events = []
+    controller.events.subscribe(events.append, tables=["Tarjeta", "Pago"])
+    result = engine.charge_many([
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDUnidad": "BUS 01"},
+        {"IDTarjeta": 1, "IDPrecio": 1},
+        {"IDTarjeta": 1, "IDPrecio": 1},
+        {"IDTarjeta": 2, "IDPrecio": 2},
+        {"IDTarjeta": 9, "IDPrecio": 1},
+        {"IDTarjeta": 1, "IDPrecio": 7},
+        {"IDPrecio": 1},
+    ])
+    assert [r["status"] for r in result["results"]] == [
+        "charged", "charged", "insufficient_funds", "insufficient_funds", "card_not_found", "price_not_found", "invalid",
+    ]
+    assert (result["charged"], result["rejected"], result["failed"]) == (2, 4, 1)
+    assert [r["Saldo"] for r in result["results"][:4]] == [3500, 1000, 1000, 1000]
+    saldos = {row["ID"]: row["Saldo"] for row in controller.read_all(CardCreate)}
+    assert saldos == {1: 1000, 2: 1000}
+    pagos = controller.cursor.execute(
+        "SELECT p.IDUnidad, m.Monto, m.IDTarjeta FROM Pago p JOIN Movimiento m ON p.IDMovimiento = m.ID ORDER BY p.ID"
+    ).fetchall()
+    assert [tuple(row) for row in pagos] == [("BUS 01", 2500.0, 1), ("EMPTY", 2500.0, 1)]
+    assert [(e.table, e.action) for e in events] == [("Tarjeta", UPDATE)] * 2 + [("Pago", INSERT)] * 2
+    assert engine.charge(2, 1)["status"] == "insufficient_funds"
+    controller.close()
+
+def test_invalid_unit_ids_are_rejected_per_tap(tmp_path):
+    controller, engine = make_engine(tmp_path, [(1, 10000)])
+    result = engine.charge_many([
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDUnidad": "BUS\n01"},
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDUnidad": "X" * 21},
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDUnidad": "BUS-01"},
+    ])
+    assert [r["status"] for r in result["results"]] == ["invalid", "invalid", "charged"]
+    assert "ID de unidad inválido" in result["results"][0]["error"]
+    pagos = controller.cursor.execute("SELECT IDUnidad FROM Pago").fetchall()
+    assert [row[0] for row in pagos] == ["BUS-01"]
+    controller.close()
+
+def charge_in_batches(tmp_path):
+    controller, engine = make_engine(tmp_path, [(card_id, 100000) for card_id in range(1, 501)])
+    taps = [{"IDTarjeta": 1 + i % 500, "IDPrecio": 1 + i % 2, "IDUnidad": "U1"} for i in range(5000)]
+    start = time.perf_counter()
+    for chunk in range(0, len(taps), 500):
+        assert engine.charge_many(taps[chunk:chunk + 500])["charged"] == 500
+    elapsed = time.perf_counter() - start
+    assert controller.cursor.execute("SELECT COUNT(*), SUM(Monto) FROM Movimiento").fetchone()[:] == (5000, 2850 * 5000)
+    controller.close()
+    return len(taps) / elapsed
+
+def test_charges_thousands_of_taps_in_batches(tmp_path):
+    charge_in_batches(tmp_path)
+
+@pytest.mark.benchmark
+def test_thousands_of_taps_per_second(tmp_path):
+    taps_per_second = charge_in_batches(tmp_path)
+    print(f"{taps_per_second:.0f} taps/s")
+    assert taps_per_second > 2000
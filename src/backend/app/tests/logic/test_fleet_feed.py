@@ -0,0 +1,66 @@
+import asyncio
+from backend.app.logic.fleet_feed import FleetBroadcaster
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.logic.vehicle_positions import VehiclePositionStore
+from backend.app.models.routes import Ruta
+from backend.app.models.transport import UnidadTransporte
+from backend.app.models.type_transport import TypeTransportCreate
+
+def make_fleet(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(Ruta(ID=1, IDHorario=1, Nombre="Troncal"))
+    controller.add(TypeTransportCreate(ID=1, TipoTransporte="Bus"))
+    for unit_id in ("U1", "U2", "U3"):
+        controller.add(UnidadTransporte(ID=unit_id, Ubicacion="Patio", Capacidad=40, IDRuta=1, IDTipo=1))
+    store = VehiclePositionStore(controller)
+    return controller, store, FleetBroadcaster(controller, positions=store, interval=0.01, heartbeat=0.5)
+
+def test_clients_share_one_read_and_receive_deltas(tmp_path):
+    controller, store, fleet = make_fleet(tmp_path)
+
+    async def scenario():
+        first, second = fleet.feed(), fleet.feed()
+        snapshots = await asyncio.gather(first.__anext__(), second.__anext__())
+        assert [s["type"] for s in snapshots] == ["snapshot", "snapshot"]
+        assert fleet.stats()["loads"] == 1 and fleet.stats()["clients"] == 2
+        assert {u["NombreRuta"] for u in snapshots[0]["data"]} == {"Troncal"}
+
+        store.record("U1", "10.42, -75.54")
+        delta = await asyncio.wait_for(first.__anext__(), 1)
+        assert delta["type"] == "delta" and delta["removed"] == []
+        assert [(u["ID"], u["Ubicacion"], u["NombreTipoTransporte"]) for u in delta["updated"]] == [
+            ("U1", "10.42, -75.54", "Bus"),
+        ]
+
+        # El segundo cliente no leyó nada: recibe un solo delta con el estado más reciente
+        store.record("U1", "10.43, -75.54")
+        controller.delete_many(UnidadTransporte, ["U2"])
+        controller.update(Ruta(ID=1, IDHorario=1, Nombre="Troncal Norte"))
+        await asyncio.sleep(0.05)
+        delta = await asyncio.wait_for(second.__anext__(), 1)
+        assert delta["removed"] == ["U2"]
+        assert sorted((u["ID"], u["Ubicacion"], u["NombreRuta"]) for u in delta["updated"]) == [
+            ("U1", "10.43, -75.54", "Troncal Norte"), ("U3", "Patio", "Troncal Norte"),
+        ]
+        assert (await asyncio.wait_for(second.__anext__(), 1))["type"] == "heartbeat"
+        await first.aclose()
+        await second.aclose()
+        assert fleet.stats()["clients"] == 0
+
+    asyncio.run(scenario())
+    controller.close()
+
+def test_reset_sends_a_new_snapshot(tmp_path):
+    controller, store, fleet = make_fleet(tmp_path)
+
+    async def scenario():
+        feed = fleet.feed()
+        assert len((await feed.__anext__())["data"]) == 3
+        controller.clear_tables()
+        snapshot = await asyncio.wait_for(feed.__anext__(), 1)
+        assert snapshot["type"] == "snapshot" and snapshot["data"] == []
+        assert fleet.stats()["loads"] == 2
+        await feed.aclose()
+
+    asyncio.run(scenario())
+    controller.close()
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from backend.app.logic.id_allocator import IdAllocator, id_allocator_for
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.movement import MovementCreate, MovementOut
+
+def make_controller(tmp_path):
+    return UniversalController(str(tmp_path / "data.db"))
+
+def test_sequence_starts_after_existing_max(tmp_path):
+    controller = make_controller(tmp_path)
+    controller.add(MovementCreate(ID=41, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+    allocator = IdAllocator(controller, block_size=3)
+    assert [allocator.next_id(MovementOut) for _ in range(5)] == [42, 43, 44, 45, 46]
+    controller.close()
+
+def test_processes_get_disjoint_blocks(tmp_path):
+    # Dos controladores sobre el mismo archivo simulan dos procesos
+    first = IdAllocator(make_controller(tmp_path), block_size=5)
+    second = IdAllocator(make_controller(tmp_path), block_size=5)
+    assert first.next_id(MovementOut) == 1
+    assert second.next_id(MovementOut) == 6
+    assert first.next_id(MovementOut) == 2
+
+def test_concurrent_requests_never_share_an_id(tmp_path):
+    allocator = IdAllocator(make_controller(tmp_path), block_size=4)
+    ids, lock = [], threading.Lock()
+
+    def take():
+        for _ in range(25):
+            value = allocator.next_id(MovementOut)
+            with lock:
+                ids.append(value)
+
+    threads = [threading.Thread(target=take) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(ids) == list(range(1, 101))
+
+def test_id_allocator_for_is_cached_per_controller(tmp_path):
+    controller = make_controller(tmp_path)
+    assert id_allocator_for(controller) is id_allocator_for(controller)
+
+def test_client_chosen_ids_are_skipped(tmp_path):
+    controller = make_controller(tmp_path)
+    allocator = IdAllocator(controller, block_size=5)
+    assert allocator.next_id(MovementOut) == 1
+    # Dentro del bloque reservado por este proceso
+    controller.add(MovementCreate(ID=3, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+    assert allocator.next_id(MovementOut) == 4
+    # Más allá del bloque: el bloque se descarta y las reservas arrancan después de MAX(ID)
+    controller.add(MovementCreate(ID=9, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+    other = IdAllocator(make_controller(tmp_path), block_size=5)
+    assert other.next_id(MovementOut) > 9
+    assert [allocator.next_id(MovementOut) for _ in range(2)][-1] > 9
+    controller.close()
+
+def test_peek_does_not_reserve(tmp_path):
+    controller = make_controller(tmp_path)
+    controller.add(MovementCreate(ID=7, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+    allocator = IdAllocator(controller, block_size=5)
+    assert allocator.peek_id(MovementOut) == allocator.peek_id(MovementOut) == 8
+    assert allocator.next_id(MovementOut) == 8
+    assert allocator.peek_id(MovementOut) == 9
+    controller.close()
+
+def test_inserts_never_write_the_sequence(tmp_path):
+    controller = make_controller(tmp_path)
+    allocator = IdAllocator(controller, block_size=5)
+    assert allocator.next_id(MovementOut) == 1
+    reservations = []
+    reserve_ids = controller.reserve_ids
+    controller.reserve_ids = lambda obj, count: reservations.append(obj) or reserve_ids(obj, count)
+    for i in range(2, 12):
+        controller.add(MovementCreate(ID=i, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+    assert reservations == []
+    assert allocator.next_id(MovementOut) == 12
+    assert reservations == [MovementOut]
+    controller.close()
+
+def test_allocate_runs_off_the_event_loop(tmp_path):
+    controller = make_controller(tmp_path)
+    allocator = IdAllocator(controller, block_size=2)
+
+    async def allocate():
+        return [await allocator.allocate(MovementOut) for _ in range(3)]
+
+    assert asyncio.run(allocate()) == [1, 2, 3]
+    controller.close()
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from backend.app.logic.idempotency import IdempotencyKeyReused, IdempotencyStore, fingerprint
+from backend.app.logic.universal_controller_sql import UniversalController
+
+def test_retry_replays_stored_response(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    calls = []
+
+    async def create():
+        calls.append(1)
+        return 201, {"ID": len(calls)}
+
+    store = IdempotencyStore(controller)
+    huella = fingerprint({"ID": 7})
+    assert asyncio.run(store.run("/card/create:u:k1", huella, create)) == (201, {"ID": 1}, False)
+    assert asyncio.run(store.run("/card/create:u:k1", huella, create)) == (201, {"ID": 1}, True)
+    assert store.stats()["hits"] == 1
+    controller.close()
+
+    # Otro proceso (o un reinicio) la encuentra en la tabla sin volver a crear
+    controller = UniversalController(str(tmp_path / "data.db"))
+    store = IdempotencyStore(controller)
+    assert asyncio.run(store.run("/card/create:u:k1", huella, create)) == (201, {"ID": 1}, True)
+    assert store.stats()["db_hits"] == 1
+    assert len(calls) == 1
+    with pytest.raises(IdempotencyKeyReused):
+        asyncio.run(store.run("/card/create:u:k1", fingerprint({"ID": 8}), create))
+    controller.close()
+
+def test_errors_are_not_stored_and_cache_is_bounded(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    responses = iter([(400, {"detail": "x"}), (200, {"ok": True})])
+
+    async def create():
+        return next(responses)
+
+    async def ok():
+        return 200, {}
+
+    store = IdempotencyStore(controller, max_entries=2)
+    assert asyncio.run(store.run("k", "h", create)) == (400, {"detail": "x"}, False)
+    assert asyncio.run(store.run("k", "h", create)) == (200, {"ok": True}, False)
+    for key in ("a", "b"):
+        asyncio.run(store.run(key, "h", ok))
+    assert store.stats()["size"] == 2
+    assert asyncio.run(store.lookup("k"))[2] == {"ok": True}
+    controller.close()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import pytest
+from backend.app.logic.planner_cache import PlannerCache
+from backend.app.logic.transit_graph import RoutePlanner
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.routes import Ruta
+from backend.app.models.rutaparada import RutaParada
+from backend.app.models.stops import Parada
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = PlannerCache(max_entries=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr("backend.app.logic.planner_cache.time.monotonic", lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["expirations"] == 1
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache = PlannerCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"interconexiones": []}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1 and all(r is results[0] for r in results)
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+    asyncio.run(cache.get_or_compute("k", compute))
+    assert cache.stats()["hits"] == 1
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = PlannerCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falla")
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+    assert cache.get("k") is None
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("k", compute))
+
+def test_planner_cache_follows_graph_version(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(Ruta(ID=1, IDHorario=1, Nombre="A"))
+    for i in (1, 2):
+        controller.add(Parada(ID=i, Nombre=f"P{i}", Ubicacion=f"Calle {i}"))
+    controller.add(RutaParada(IDRuta=1, IDParada=1))
+    planner = RoutePlanner(controller)
+    first = asyncio.run(planner.plan("Calle 1", "Calle 2"))
+    assert asyncio.run(planner.plan("  Calle 1 ", "Calle  2")) is first
+    controller.add(RutaParada(IDRuta=1, IDParada=2))
+    second = asyncio.run(planner.plan("Calle 1", "Calle 2"))
+    assert "interconexiones" in second and second["graph_version"] == first["graph_version"] + 1
+    assert planner.cache.stats()["invalidations"] == 1
+    controller.close()
+
+def test_planner_coalesces_searches_off_the_loop(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(Ruta(ID=1, IDHorario=1, Nombre="A"))
+    for i in (1, 2):
+        controller.add(Parada(ID=i, Nombre=f"P{i}", Ubicacion=f"Calle {i}"))
+    controller.add_many([RutaParada(IDRuta=1, IDParada=1), RutaParada(IDRuta=1, IDParada=2)])
+    planner = RoutePlanner(controller)
+    threads = []
+    search = planner.search
+
+    def recording_search(*args):
+        threads.append(threading.current_thread())
+        return search(*args)
+
+    planner.search = recording_search
+
+    async def main():
+        await planner.load()
+        return await asyncio.gather(*(planner.plan("Calle 1", "Calle 2") for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert all(r is results[0] for r in results) and "interconexiones" in results[0]
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+    stats = planner.cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+    controller.close()
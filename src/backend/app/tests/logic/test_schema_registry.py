@@ -0,0 +1,30 @@
+from backend.app.logic.schema_registry import SchemaRegistry
+
+def test_ensure_runs_create_once():
+    registry = SchemaRegistry()
+    calls = []
+    assert registry.ensure("Tarjeta", lambda: calls.append(1)) is True
+    assert registry.ensure("tarjeta", lambda: calls.append(1)) is False
+    assert calls == [1]
+    assert registry.known_tables() == ["tarjeta"]
+
+def test_failed_create_is_not_cached():
+    registry = SchemaRegistry()
+
+    def boom():
+        raise RuntimeError("sin conexión")
+
+    try:
+        registry.ensure("Pago", boom)
+    except RuntimeError:
+        pass
+    assert not registry.is_known("Pago")
+
+def test_refresh_forgets_tables():
+    registry = SchemaRegistry()
+    registry.mark("Pago")
+    registry.mark("Movimiento")
+    registry.refresh("pago")
+    assert registry.known_tables() == ["movimiento"]
+    registry.refresh()
+    assert registry.known_tables() == []
@@ -0,0 +1,109 @@
+import datetime
+import numpy as np
+import pytest
+from backend.app.logic.fare_catalog import FareCatalog
+from backend.app.logic.settlement import SettlementRun, iter_settlement_chunks, load_settlement
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.card import CardCreate
+from backend.app.models.movement import MovementCreate
+from backend.app.models.payments import Payment
+from backend.app.models.price import PriceCreate
+from backend.app.models.type_card import TypeCardCreate
+from backend.app.models.transport import UnidadTransporte
+
+DAY = datetime.date(2026, 3, 2)
+
+def make_controller(path, payments=40):
+    controller = UniversalController(str(path))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=2500))
+    controller.add_many([TypeCardCreate(ID=1, Tipo="General"), TypeCardCreate(ID=2, Tipo="Estudiante")])
+    controller.add_many([CardCreate(ID=1, IDUsuario=1, IDTipoTarjeta=1, Saldo=0), CardCreate(ID=2, IDUsuario=2, IDTipoTarjeta=2, Saldo=0)])
+    controller.add_many([
+        UnidadTransporte(ID="U1", Ubicacion="", Capacidad=40, IDRuta=10, IDTipo=1),
+        UnidadTransporte(ID="U2", Ubicacion="", Capacidad=40, IDRuta=20, IDTipo=1),
+    ])
+    add_payments(controller, 1, payments)
+    return controller
+
+def add_payments(controller, start, count):
+    # Tarjeta 2 paga con descuento pero el pago 6 se cobró completo; el pago 5 no tiene Movimiento
+    movements, payments = [], []
+    for i in range(start, start + count):
+        card = 1 if i % 2 else 2
+        amount = 2500 if card == 1 or i == 6 else 1250
+        if i != 5:
+            movements.append(MovementCreate(ID=i, IDTipoMovimiento=1, Monto=amount, IDTarjeta=card))
+        payments.append(Payment(ID=i, IDMovimiento=i, IDPrecio=1, IDTarjeta=card, IDUnidad="U1" if i % 4 < 2 else "U2"))
+    controller.add_many(movements)
+    controller.add_many(payments)
+
+def grouped(data):
+    return {
+        (str(data["unit"][i]), int(data["route"][i]), int(data["card_type"][i])): (int(data["payments"][i]), data["charged"][i], int(data["unmatched"][i]), int(data["mismatched"][i]))
+        for i in range(len(data["payments"]))
+    }
+
+def test_chunks_are_columnar_and_keyset_paged(tmp_path):
+    controller = make_controller(tmp_path / "data.db", payments=25)
+    chunks = list(iter_settlement_chunks(controller, after=3, chunk_size=10))
+    assert [len(c["ID"]) for c in chunks] == [10, 10, 2]
+    assert chunks[0]["ID"][0] == 4 and chunks[-1]["ID"][-1] == 25
+    assert np.isnan(chunks[0]["Cobrado"][1]) and list(chunks[0]["IDRuta"][:3]) == [10, 10, 20]
+    controller.close()
+
+def test_settlement_groups_and_reconciles(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    catalog = FareCatalog(controller, factors={2: 0.5})
+    summary = SettlementRun(controller, str(tmp_path / "out"), DAY, chunk_size=7, catalog=catalog).run()
+    assert (summary["rows"], summary["groups"], summary["unmatched"], summary["mismatched"]) == (40, 4, 1, 1)
+
+    data = load_settlement(summary["output"])
+    assert set(data["day"].astype(str)) == {"2026-03-02"} and int(data["last_id"]) == 40
+    groups = grouped(data)
+    assert groups[("U1", 10, 1)] == (10, 2500 * 9, 1, 0)
+    assert groups[("U2", 20, 2)] == (10, 1250 * 9 + 2500, 0, 1)
+    assert data["expected"].sum() == 20 * 2500 + 20 * 1250
+    controller.close()
+
+def test_next_day_continues_after_previous_run(tmp_path):
+    controller = make_controller(tmp_path / "data.db", payments=12)
+    SettlementRun(controller, str(tmp_path), DAY, chunk_size=5).run()
+    add_payments(controller, 13, 8)
+    summary = SettlementRun(controller, str(tmp_path), DAY + datetime.timedelta(days=1), chunk_size=5).run()
+    assert (summary["first_id"], summary["last_id"], summary["rows"]) == (12, 20, 8)
+    controller.close()
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    out = str(tmp_path / "out")
+    expected = SettlementRun(controller, str(tmp_path / "full"), DAY, chunk_size=6).run()
+
+    original = controller.settlement_page
+    calls = []
+
+    def failing_page(after, limit):
+        calls.append(after)
+        if len(calls) == 5:
+            raise RuntimeError("conexión perdida")
+        return original(after, limit)
+
+    controller.settlement_page = failing_page
+    run = SettlementRun(controller, out, DAY, chunk_size=6, checkpoint_every=2)
+    with pytest.raises(RuntimeError):
+        run.run()
+    assert load_settlement(run.checkpoint_path)["last_id"] == 24
+
+    controller.settlement_page = original
+    summary = SettlementRun(controller, out, DAY, chunk_size=6, checkpoint_every=2).run()
+    assert summary["resumed"] and summary["rows"] == 40
+    assert summary["charged"] == expected["charged"] and summary["groups"] == expected["groups"]
+    controller.close()
+
+def test_pages_are_read_through_the_payment_id_index(tmp_path):
+    controller = make_controller(tmp_path / "data.db", payments=10)
+    assert [row[0] for row in controller.settlement_page(4, 3)] == [5, 6, 7]
+    plan = " ".join(row[3] for row in controller.cursor.execute(
+        "EXPLAIN QUERY PLAN SELECT p.ID FROM Pago p WHERE p.ID > ? ORDER BY p.ID LIMIT ?", (4, 3)
+    ))
+    assert "IX_Pago_ID" in plan and "TEMP B-TREE" not in plan
+    controller.close()
@@ -0,0 +1,56 @@
+import asyncio
+import numpy as np
+from backend.app.logic.change_events import UPDATE
+from backend.app.logic.spatial_index import GridIndex, SpatialIndex, haversine, nearby, parse_coordinates
+from backend.app.logic.transit_graph import RoutePlanner, TransitGraph
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.transport import UnidadTransporte
+
+# Centro de Cartagena; 0.001° de latitud son ~111 m
+LAT, LON = 10.4236, -75.5478
+
+def test_parse_coordinates_only_accepts_decimal_pairs():
+    assert parse_coordinates("Torre del Reloj (10.4236, -75.5478)") == (LAT, LON)
+    assert parse_coordinates("10.4236;-75.5478") == (LAT, LON)
+    assert parse_coordinates("Calle 5, 10") is None
+    assert parse_coordinates("95.0, 10.0") is None
+
+def test_grid_matches_brute_force():
+    rng = np.random.default_rng(7)
+    lats = LAT + rng.uniform(-0.05, 0.05, 2000)
+    lons = LON + rng.uniform(-0.05, 0.05, 2000)
+    grid = GridIndex(cell_meters=300)
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        grid.upsert(i, lat, lon)
+    for i in range(0, 2000, 2):
+        grid.remove(i)
+    distances = haversine(LAT, LON, lats, lons)
+    expected = sorted((d, i) for i, d in enumerate(distances) if d <= 1500 and i % 2)
+    assert [i for i, _ in grid.nearby(LAT, LON, 1500)] == [i for _, i in expected]
+    assert len(grid.nearby(LAT, LON, 100000)) == 1000
+
+def test_spatial_index_follows_unit_changes(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(UnidadTransporte(ID="U1", Ubicacion=f"{LAT}, {LON}", Capacidad=40, IDRuta=1, IDTipo=1))
+    controller.add(UnidadTransporte(ID="U2", Ubicacion="Patio", Capacidad=40, IDRuta=1, IDTipo=1))
+    units = asyncio.run(nearby(controller, UnidadTransporte, LAT, LON, 500))
+    assert [(u["ID"], u["distancia_m"]) for u in units] == [("U1", 0.0)]
+    # El controlador SQLite toma la primera columna como llave, y en UnidadTransporte ID es la última
+    controller.events.emit("UnidadTransporte", UPDATE, {"ID": "U2", "Ubicacion": "10.4256, -75.5478"})
+    controller.events.emit("UnidadTransporte", UPDATE, {"ID": "U1", "Ubicacion": "10.4336, -75.5478"})
+    units = asyncio.run(nearby(controller, UnidadTransporte, LAT, LON, 500))
+    assert [u["ID"] for u in units] == ["U2"] and 200 < units[0]["distancia_m"] < 250
+    assert units[0]["Capacidad"] == 40
+    controller.close()
+
+def test_planner_starts_from_a_coordinate():
+    graph = TransitGraph.from_rows(
+        [{"ID": 1, "Nombre": "A"}],
+        [{"ID": 1, "Ubicacion": f"Muelle ({LAT}, {LON})"}, {"ID": 2, "Ubicacion": "Centro"}],
+        [{"IDRuta": 1, "IDParada": 1}, {"IDRuta": 1, "IDParada": 2}],
+    )
+    cerca = f"{LAT + 0.001}, {LON}"
+    [itinerario] = RoutePlanner(None).search(graph, cerca, "Centro")["interconexiones"]
+    assert itinerario["ruta_inicio"] == "A" and itinerario["tramos"][0]["desde"] == cerca
+    assert "mensaje" in RoutePlanner(None).search(graph, f"{LAT + 0.01}, {LON}", "Centro")
+    assert SpatialIndex.from_rows([{"ID": 1, "Ubicacion": "sin coordenadas"}]).nearby(LAT, LON, 1000) == []
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from backend.app.logic.stop_search import StopSearchIndex, StopSearchService, fold
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.stops import Parada
+
+PARADAS = [
+    {"ID": 1, "Nombre": "Estación Bocagrande", "Ubicacion": "Av. San Martín 10"},
+    {"ID": 2, "Nombre": "Portal Bolívar", "Ubicacion": "Calle Real 5"},
+    {"ID": 3, "Nombre": "Bodega Norte", "Ubicacion": "Carrera 4"},
+]
+
+def test_fold_removes_accents_and_symbols():
+    assert fold("  Estación   PEÑA-Ávila ") == "estacion pena avila"
+
+def test_prefix_search_ignores_accents_in_alphabetical_order():
+    index = StopSearchIndex.from_rows(PARADAS)
+    # bocagrande, bodega, bolivar
+    assert [p["ID"] for p in index.search("bo", limit=3)] == [1, 3, 2]
+    assert [p["ID"] for p in index.search("ESTACION boca")] == [1]
+    assert index.search("martin")[0]["Nombre"] == "Estación Bocagrande"
+
+def test_fuzzy_match_and_incremental_updates():
+    index = StopSearchIndex.from_rows(PARADAS)
+    [match] = index.search("Bolibar")
+    assert match["ID"] == 2 and 0 < match["score"] < 1
+    index.add({"ID": 2, "Nombre": "Terminal Sur", "Ubicacion": "Calle Real 5"})
+    assert all(p["score"] < 1 for p in index.search("portal"))
+    assert index.search("terminal")[0]["ID"] == 2
+    assert index.remove(2) and not index.remove(2)
+    assert index.search("terminal") == [] and len(index) == 2
+    assert index._trie.get("t") is None
+
+def test_service_follows_controller_changes(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    for parada in PARADAS:
+        controller.add(Parada(**parada))
+    service = StopSearchService(controller)
+    assert asyncio.run(service.search("portal"))[0]["ID"] == 2
+    controller.update(Parada(ID=2, Nombre="Terminal Sur", Ubicacion="Calle Real 5"))
+    controller.add(Parada(ID=4, Nombre="Muelle Pegasos", Ubicacion="Centro"))
+    controller.delete(Parada(**PARADAS[0]))
+    index = service.index
+    assert asyncio.run(service.search("terminal"))[0]["ID"] == 2
+    assert asyncio.run(service.search("muelle"))[0]["ID"] == 4
+    assert index is service.index and len(index) == 3
+    controller.clear_tables()
+    assert service.index is None
+    controller.close()
+
+def test_concurrent_first_searches_share_one_load(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    for parada in PARADAS:
+        controller.add(Parada(**parada))
+    service = StopSearchService(controller)
+
+    async def both():
+        return await asyncio.gather(service.search("estacion"), service.search("portal"))
+
+    estacion, portal = asyncio.run(both())
+    assert estacion[0]["ID"] == 1 and portal[0]["ID"] == 2
+    assert service.index is not None and len(service.index) == 3
+    controller.close()
+
+def test_lookup_is_fast_on_a_large_index():
+    index = StopSearchIndex.from_rows(
+        {"ID": i, "Nombre": f"Parada {i} Barrio {i % 97}", "Ubicacion": f"Calle {i}"} for i in range(20000)
+    )
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search("parada 1999")
+    assert (time.perf_counter() - start) / 100 < 0.005
@@ -0,0 +1,52 @@
+import asyncio
+from backend.app.logic.fare_engine import FareEngine
+from backend.app.logic.tap_ingestion import TapIngestor
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.card import CardCreate
+from backend.app.models.price import PriceCreate
+
+def make_controller(path):
+    controller = UniversalController(str(path))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=2500))
+    controller.add_many([CardCreate(ID=card_id, IDUsuario=card_id, IDTipoTarjeta=1, Saldo=10000) for card_id in range(1, 11)])
+    return controller
+
+def test_concurrent_requests_share_commits(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    ingestor = TapIngestor(controller, FareEngine(controller), batch_size=50, max_wait=0.05)
+    requests = [
+        [{"IDTarjeta": card_id, "IDPrecio": 1, "IDTap": f"V1-{card_id}-{n}"} for n in range(3)]
+        for card_id in range(1, 11)
+    ]
+
+    async def scenario():
+        return await asyncio.gather(*(ingestor.submit(taps) for taps in requests))
+
+    summaries = asyncio.run(scenario())
+    assert all(summary["charged"] == 3 for summary in summaries)
+    assert [r["index"] for r in summaries[4]["results"]] == [0, 1, 2]
+    assert [r["IDTap"] for r in summaries[4]["results"]] == ["V1-5-0", "V1-5-1", "V1-5-2"]
+    assert ingestor.stats()["batches"] == 1 and ingestor.stats()["taps"] == 30
+    controller.close()
+
+def test_retried_taps_are_not_charged_twice(tmp_path):
+    controller = make_controller(tmp_path / "data.db")
+    taps = [
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDTap": "A"},
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDTap": "A"},
+        {"IDTarjeta": 1, "IDPrecio": 1, "IDTap": "B"},
+        {"IDTarjeta": 1, "IDPrecio": 1},
+    ]
+    first = asyncio.run(TapIngestor(controller, FareEngine(controller), max_wait=0).submit(taps))
+    assert (first["charged"], first["duplicate"]) == (3, 1)
+    assert first["results"][1]["duplicate"] and first["results"][1]["IDPago"] == first["results"][0]["IDPago"]
+    controller.close()
+
+    # El validador vuelve a subir el lote después de un reinicio del servidor
+    controller = UniversalController(str(tmp_path / "data.db"))
+    again = asyncio.run(TapIngestor(controller, FareEngine(controller), max_wait=0).submit(taps[:3]))
+    assert (again["charged"], again["duplicate"]) == (0, 3)
+    assert [r["Saldo"] for r in again["results"]] == [7500, 7500, 5000]
+    assert controller.cursor.execute("SELECT Saldo FROM Tarjeta WHERE ID = 1").fetchone()[0] == 2500
+    assert controller.cursor.execute("SELECT COUNT(*) FROM Pago").fetchone()[0] == 3
+    controller.close()
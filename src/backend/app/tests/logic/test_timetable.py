@@ -0,0 +1,60 @@
+import datetime
+import pytest
+from backend.app.logic.change_events import ChangeEvent, UPDATE
+from backend.app.logic.timetable import format_time, parse_time
+from backend.app.logic.transit_graph import RoutePlanner, TransitGraph
+
+# A: 1-2 (08:00-08:20), B: 2-3 (08:30-08:50), C: 1-3 (09:00-09:10)
+HORARIOS = [
+    {"ID": 1, "Salida": "08:00:00", "Llegada": "08:20:00"},
+    {"ID": 2, "Salida": "08:30", "Llegada": "08:50"},
+    {"ID": 3, "Salida": datetime.time(9, 0), "Llegada": "09:10:00.0000000"},
+]
+RUTAS = [{"ID": 1, "Nombre": "A", "IDHorario": 1}, {"ID": 2, "Nombre": "B", "IDHorario": 2}, {"ID": 3, "Nombre": "C", "IDHorario": 3}]
+PARADAS = [{"ID": i, "Ubicacion": f"Calle {i}"} for i in range(1, 4)]
+ENLACES = [{"IDRuta": r, "IDParada": p} for r, p in [(1, 1), (1, 2), (2, 2), (2, 3), (3, 1), (3, 3)]]
+
+def make_graph():
+    return TransitGraph.from_rows(RUTAS, PARADAS, ENLACES, HORARIOS)
+
+def test_parse_and_format_time():
+    assert parse_time("07:05") == 7 * 3600 + 300
+    assert format_time(parse_time("23:59:59.5000000")) == "23:59:59"
+    with pytest.raises(ValueError):
+        parse_time("25:00")
+
+def test_earliest_arrival_pareto_front():
+    result = RoutePlanner(None).search_at(make_graph(), "Calle 1", "Calle 3", parse_time("07:50"))
+    assert [(i["ruta_inicio"], i["ruta_final"], i["transbordos"], i["hora_llegada"]) for i in result["interconexiones"]] == [
+        ("A", "B", 1, "08:50:00"), ("C", "C", 0, "09:10:00"),
+    ]
+    first = result["interconexiones"][0]
+    assert first["interconexion"] == "Calle 2"
+    assert [(t["desde"], t["hasta"], t["salida"]) for t in first["tramos"]] == [
+        ("Calle 1", "Calle 2", "08:00:00"), ("Calle 2", "Calle 3", "08:30:00"),
+    ]
+
+def test_departure_time_filters_trips():
+    planner, graph = RoutePlanner(None), make_graph()
+    late = planner.search_at(graph, "Calle 1", "Calle 3", parse_time("08:10"))
+    assert [i["ruta_inicio"] for i in late["interconexiones"]] == ["C"]
+    assert "mensaje" in planner.search_at(graph, "Calle 1", "Calle 3", parse_time("09:05"))
+
+def test_schedule_change_rebuilds_timetable():
+    graph = make_graph()
+    graph.apply(ChangeEvent("horario", UPDATE, {"ID": 3, "Salida": "08:05", "Llegada": "08:15"}))
+    result = RoutePlanner(None).search_at(graph, "Calle 1", "Calle 3", parse_time("07:50"))
+    assert [i["ruta_inicio"] for i in result["interconexiones"]] == ["C"]
+
+def test_destination_at_an_origin_stop():
+    planner = RoutePlanner(None)
+    assert "mensaje" in planner.search_at(make_graph(), "Calle 1", "Calle 1", parse_time("07:50"))
+    # El destino está a pie de la parada 1 (origen) y de la parada 3
+    paradas = [
+        {"ID": 1, "Ubicacion": "10.4000, -75.5000"},
+        {"ID": 2, "Ubicacion": "10.5000, -75.5000"},
+        {"ID": 3, "Ubicacion": "10.4020, -75.5000"},
+    ]
+    graph = TransitGraph.from_rows(RUTAS, paradas, ENLACES, HORARIOS)
+    result = planner.search_at(graph, "10.4000, -75.5000", "10.4010, -75.5000", parse_time("07:50"))
+    assert [(i["ruta_inicio"], i["hora_llegada"]) for i in result["interconexiones"]] == [("A", "08:50:00"), ("C", "09:10:00")]
@@ -0,0 +1,28 @@
+from backend.app.logic.transfer_table import TransferTable, edge_hash
+
+EDGES = [(1, 10), (1, 11), (2, 11), (2, 12), (3, 11), (3, 12), (4, 13)]
+
+def test_shared_stops_by_route_pair():
+    table = TransferTable.from_edges(EDGES)
+    assert table.shared_stops(1, 2) == [11]
+    assert table.shared_stops(3, 2) == [11, 12]
+    assert table.shared_stops(1, 4) == []
+    assert table.connected_routes(2) == [1, 3]
+    assert table.transfers_from(3) == {1: [11], 2: [11, 12]}
+
+def test_incremental_edges_match_full_build():
+    table = TransferTable.from_edges(EDGES)
+    table.add_edge(4, 10)
+    table.remove_edge(2, 11)
+    expected = TransferTable.from_edges([e for e in EDGES if e != (2, 11)] + [(4, 10)])
+    for first in range(1, 5):
+        assert table.transfers_from(first) == expected.transfers_from(first)
+
+def test_snapshot_is_reused_only_for_the_same_edges(tmp_path):
+    path = str(tmp_path / "transfers.bin")
+    built = TransferTable.load_or_build(EDGES, path)
+    assert TransferTable.load(path, EDGES, edge_hash(EDGES)).transfers_from(3) == built.transfers_from(3)
+    changed = EDGES + [(4, 12)]
+    assert TransferTable.load(path, changed, edge_hash(changed)) is None
+    assert TransferTable.load_or_build(changed, path).shared_stops(2, 4) == [12]
+    assert TransferTable.load(path, changed, edge_hash(changed)) is not None
@@ -0,0 +1,99 @@
+import asyncio
+from backend.app.logic.transit_graph import RoutePlanner, TransitGraph
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.routes import Ruta
+from backend.app.models.rutaparada import RutaParada
+from backend.app.models.stops import Parada
+
+# A: 1-2, B: 2-3, C: 3-4, D: 1-4 (directa entre los extremos)
+RUTAS = [{"ID": 1, "Nombre": "A"}, {"ID": 2, "Nombre": "B"}, {"ID": 3, "Nombre": "C"}]
+PARADAS = [{"ID": i, "Ubicacion": f"Calle {i}"} for i in range(1, 6)]
+ENLACES = [(1, 1), (1, 2), (2, 2), (2, 3), (3, 3), (3, 4)]
+
+def make_graph():
+    return TransitGraph.from_rows(RUTAS, PARADAS, [{"IDRuta": r, "IDParada": p} for r, p in ENLACES])
+
+def test_multi_transfer_itinerary():
+    result = RoutePlanner(None).search(make_graph(), "Calle 1", "Calle 4")
+    [itinerario] = result["interconexiones"]
+    assert itinerario["ruta_inicio"] == "A" and itinerario["ruta_final"] == "C"
+    assert itinerario["interconexion"] == "Calle 2"
+    assert itinerario["transbordos"] == 2
+    assert [(t["ruta"], t["desde"], t["hasta"]) for t in itinerario["tramos"]] == [
+        ("A", "Calle 1", "Calle 2"), ("B", "Calle 2", "Calle 3"), ("C", "Calle 3", "Calle 4"),
+    ]
+
+def test_itineraries_ranked_by_transfers():
+    graph = make_graph()
+    graph.add_route(4, "D")
+    graph.link(4, 1)
+    graph.link(4, 4)
+    result = RoutePlanner(None).search(graph, "Calle 1", "Calle 4")
+    assert [(i["ruta_inicio"], i["ruta_final"], i["transbordos"]) for i in result["interconexiones"]] == [
+        ("D", "D", 0), ("A", "C", 2),
+    ]
+
+def test_transfer_limit_and_messages():
+    planner = RoutePlanner(None, max_transfers=1)
+    graph = make_graph()
+    assert planner.search(graph, "Calle 1", "Calle 4") == {"mensaje": "No se encontraron rutas con interconexión."}
+    assert "mensaje" in planner.search(graph, "NoExiste", "Calle 4")
+    assert "mensaje" in planner.search(graph, "Calle 1", "Calle 5")
+
+def test_planner_loads_graph_from_controller(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    for ruta in RUTAS:
+        controller.add(Ruta(IDHorario=1, **ruta))
+    for parada in PARADAS:
+        controller.add(Parada(Nombre=parada["Ubicacion"], **parada))
+    for ruta, parada in ENLACES:
+        controller.add(RutaParada(IDRuta=ruta, IDParada=parada))
+    planner = RoutePlanner(controller)
+    result = asyncio.run(planner.plan("Calle 1", "Calle 3"))
+    assert [(i["ruta_inicio"], i["ruta_final"], i["interconexion"]) for i in result["interconexiones"]] == [
+        ("A", "B", "Calle 2"),
+    ]
+    assert planner.graph.stats() == {"rutas": 3, "paradas": 5, "enlaces": 6, "pares": 2, "transbordos": 2}
+    controller.close()
+
+def test_graph_follows_controller_changes_without_reload(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    for ruta in RUTAS:
+        controller.add(Ruta(IDHorario=1, **ruta))
+    for parada in PARADAS:
+        controller.add(Parada(Nombre=parada["Ubicacion"], **parada))
+    controller.add(RutaParada(IDRuta=1, IDParada=1))
+    planner = RoutePlanner(controller)
+    assert "mensaje" in asyncio.run(planner.plan("Calle 1", "Calle 5"))
+    graph, version = planner.graph, planner.version
+
+    controller.add(RutaParada(IDRuta=1, IDParada=5))
+    result = asyncio.run(planner.plan("Calle 1", "Calle 5"))
+    assert result["interconexiones"][0]["ruta_inicio"] == "A"
+    assert result["graph_version"] == version + 1
+
+    controller.update_ruta_parada(1, 5, 2, 5)
+    assert "mensaje" in asyncio.run(planner.plan("Calle 1", "Calle 5"))
+    assert graph.routes_at("Calle 5") == [graph.route_index[2]]
+
+    controller.update(Parada(ID=5, Nombre="Terminal", Ubicacion="Terminal"))
+    controller.delete_ruta_parada(1, 1)
+    assert graph.routes_at("Terminal") == [graph.route_index[2]]
+    assert graph.routes_at("Calle 1") == []
+    assert planner.graph is graph and planner.version == version + 4
+
+    # Una relación que no existe no cambia el grafo
+    assert controller.update_ruta_parada(1, 9, 2, 9) is False
+    assert controller.delete_ruta_parada(1, 9) is False
+    assert graph.routes_at("Calle 1") == []
+    assert planner.version == version + 4
+    controller.close()
+
+def test_reset_event_discards_graph(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(Ruta(ID=1, IDHorario=1, Nombre="A"))
+    planner = RoutePlanner(controller)
+    asyncio.run(planner.load())
+    controller.clear_tables()
+    assert planner.graph is None
+    controller.close()
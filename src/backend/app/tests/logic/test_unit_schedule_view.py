@@ -0,0 +1,38 @@
+import asyncio
+import json
+from backend.app.logic.unit_schedule_view import UnitScheduleView, etag_matches
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.routes import Ruta
+from backend.app.models.schedule import Schedule
+from backend.app.models.transport import UnidadTransporte
+from backend.app.models.type_transport import TypeTransportCreate
+
+def test_view_is_served_from_memory_until_a_change(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(Schedule(ID=1, Llegada="06:30", Salida="06:00"))
+    controller.add(Ruta(ID=1, IDHorario=1, Nombre="Troncal"))
+    controller.add(TypeTransportCreate(ID=1, TipoTransporte="Bus"))
+    controller.add(UnidadTransporte(ID="U1", Ubicacion="Patio", Capacidad=40, IDRuta=1, IDTipo=1))
+    controller.add(UnidadTransporte(ID="U2", Ubicacion="Patio", Capacidad=40, IDRuta=9, IDTipo=1))
+    view = UnitScheduleView(controller)
+
+    body, etag = asyncio.run(view.get())
+    unidades = {u["ID"]: u for u in json.loads(body)}
+    assert unidades["U1"]["NombreRuta"] == "Troncal" and unidades["U1"]["NombreTipoTransporte"] == "Bus"
+    assert unidades["U1"]["horarios"] == [{"ID": 1, "Llegada": "06:30", "Salida": "06:00"}]
+    assert unidades["U2"]["NombreRuta"] is None and unidades["U2"]["horarios"] == []
+    assert asyncio.run(view.get()) == (body, etag)
+    assert view.stats()["builds"] == 1 and view.stats()["hits"] == 1
+
+    controller.update(Schedule(ID=1, Llegada="07:30", Salida="07:00"))
+    body, nuevo_etag = asyncio.run(view.get())
+    assert nuevo_etag != etag and json.loads(body)[0]["horarios"][0]["Salida"] == "07:00"
+    assert view.stats()["builds"] == 2
+    # Una vista armada de nuevo con el mismo contenido conserva el ETag
+    assert asyncio.run(UnitScheduleView(controller).get())[1] == nuevo_etag
+    controller.close()
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"') and not etag_matches('"a"', '"b"')
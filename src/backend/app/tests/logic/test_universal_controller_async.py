@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import pytest
+from backend.app.logic.universal_controller_async import AsyncUniversalController, AsyncSQLiteBackend
+from backend.app.logic.async_controller import as_async, register_async_controller
+from backend.app.models.movement import MovementCreate, MovementOut
+from backend.app.models.stops import Parada
+from backend.app.models.routes import Ruta
+from backend.app.models.rutaparada import RutaParada
+
+def run(coro):
+    return asyncio.run(coro)
+
+@pytest.fixture
+def controller(tmp_path):
+    return AsyncUniversalController(AsyncSQLiteBackend(str(tmp_path / "async.db"), pool_size=2))
+
+def test_crud_roundtrip(controller):
+    async def scenario():
+        await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=2500, IDTarjeta=7))
+        assert await controller.read_all(MovementOut) == [
+            {"ID": 1, "IDTipoMovimiento": 1, "Monto": 2500.0, "IDTarjeta": 7}
+        ]
+        found = await controller.get_by_id(MovementOut, 1)
+        assert found.IDTarjeta == 7
+        await controller.update(MovementOut(ID=1, IDTipoMovimiento=2, Monto=3000, IDTarjeta=7))
+        assert (await controller.get_by_column(MovementOut, "IDTarjeta", 7)).Monto == 3000
+        assert await controller.total_registros("Movimiento") == 1
+        assert await controller.delete(found) is True
+        assert await controller.get_by_id(MovementOut, 1) is None
+        await controller.close()
+    run(scenario())
+
+def test_add_duplicate_raises_value_error(controller):
+    async def scenario():
+        await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        with pytest.raises(ValueError):
+            await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        await controller.close()
+    run(scenario())
+
+def test_update_missing_raises(controller):
+    async def scenario():
+        with pytest.raises(ValueError):
+            await controller.update(MovementOut(ID=99, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        await controller.close()
+    run(scenario())
+
+def test_listeners_run_off_the_event_loop(controller):
+    threads = []
+    controller.events.subscribe(lambda event: threads.append(threading.current_thread()))
+
+    async def scenario():
+        await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        await controller.update(MovementOut(ID=1, IDTipoMovimiento=1, Monto=2, IDTarjeta=1))
+        await controller.delete(MovementOut(ID=1, IDTipoMovimiento=1, Monto=2, IDTarjeta=1))
+        await controller.close()
+    run(scenario())
+    assert len(threads) == 3
+    assert threading.current_thread() not in threads
+
+def test_cancelled_transaction_is_rolled_back(tmp_path):
+    backend = AsyncSQLiteBackend(str(tmp_path / "async.db"), pool_size=1)
+
+    async def scenario():
+        async with backend.connection() as conn:
+            await conn.execute("CREATE TABLE T (ID INTEGER PRIMARY KEY)")
+            await conn.commit()
+        with pytest.raises(asyncio.CancelledError):
+            async with backend.connection() as conn:
+                await conn.execute("INSERT INTO T (ID) VALUES (1)")
+                raise asyncio.CancelledError()
+        # La única conexión del pool vuelve sin la transacción pendiente
+        async with backend.connection() as conn:
+            assert not conn.in_transaction
+            async with conn.execute("SELECT COUNT(*) FROM T") as cursor:
+                assert (await cursor.fetchone())[0] == 0
+        await backend.close()
+    run(scenario())
+
+def test_get_by_column_rejects_unknown_column(controller):
+    with pytest.raises(ValueError):
+        run(controller.get_by_column(MovementOut, "ID; DROP TABLE Movimiento", 1))
+
+def test_concurrent_reads(controller):
+    async def scenario():
+        await controller.add(MovementCreate(ID=1, IDTipoMovimiento=1, Monto=1, IDTarjeta=1))
+        results = await asyncio.gather(*(controller.get_by_id(MovementOut, 1) for _ in range(50)))
+        assert all(r.ID == 1 for r in results)
+        await controller.close()
+    run(scenario())
+
+def test_ruta_interconexion(controller):
+    async def scenario():
+        for parada in [Parada(ID=1, Ubicacion="A", Nombre="A"), Parada(ID=2, Ubicacion="B", Nombre="B"),
+                       Parada(ID=3, Ubicacion="C", Nombre="C")]:
+            await controller.add(parada)
+        await controller.add(Ruta(ID=1, IDHorario=1, Nombre="R1"))
+        await controller.add(Ruta(ID=2, IDHorario=1, Nombre="R2"))
+        for ruta, parada in [(1, 1), (1, 2), (2, 2), (2, 3)]:
+            await controller.add(RutaParada(IDRuta=ruta, IDParada=parada))
+        result = await controller.ruta_interconexion("A", "C")
+        assert result == {"interconexiones": [{"ruta_inicio": "R1", "ruta_final": "R2", "interconexion": "B"}]}
+        assert "mensaje" in await controller.ruta_interconexion("Z", "C")
+        await controller.close()
+    run(scenario())
+
+def test_as_async_prefers_registered_native_controller(controller):
+    class SyncController:
+        pass
+    sync = SyncController()
+    register_async_controller(sync, controller)
+    assert as_async(sync) is controller
+
+def test_read_page_keyset_and_projection(controller):
+    async def scenario():
+        for i in range(1, 6):
+            await controller.add(MovementCreate(ID=i, IDTipoMovimiento=1, Monto=i * 100, IDTarjeta=i % 2))
+        first = await controller.read_page(MovementOut, 2, columns=["monto"])
+        assert first == {"items": [{"ID": 1, "Monto": 100.0}, {"ID": 2, "Monto": 200.0}], "next_cursor": 2}
+        last = await controller.read_page(MovementOut, 2, after=4)
+        assert [r["ID"] for r in last["items"]] == [5] and last["next_cursor"] is None
+        filtered = await controller.read_page(MovementOut, 10, filters={"IDTarjeta": 1})
+        assert [r["ID"] for r in filtered["items"]] == [1, 3, 5]
+        with pytest.raises(ValueError):
+            await controller.read_page(MovementOut, 2, columns=["Monto FROM Movimiento --"])
+        streamed = [row["ID"] async for row in controller.iter_rows(MovementOut, batch_size=2)]
+        assert streamed == [1, 2, 3, 4, 5]
+        await controller.close()
+    run(scenario())
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import pytest
+from backend.app.core.config import settings
+from backend.app.logic.async_controller import BlockingCallOnEventLoopError, as_async
+from backend.app.logic.fare_engine import FareEngine
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.models.card import CardCreate
+from backend.app.models.movement import MovementOut
+from backend.app.models.price import PriceCreate
+from backend.app.models.type_card import TypeCardCreate
+
+def test_threads_use_their_own_connections(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=10))
+    controller.add_many([CardCreate(ID=card_id, IDUsuario=card_id, IDTipoTarjeta=1, Saldo=1000) for card_id in range(1, 21)])
+    engine = FareEngine(controller, movement_type=1)
+    errors = []
+
+    def run(work):
+        try:
+            for n in range(50):
+                work(n)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=run, args=(lambda n: engine.charge_many([{"IDTarjeta": card_id, "IDPrecio": 1} for card_id in range(1, 21)]),)),
+        threading.Thread(target=run, args=(lambda n: controller.add(TypeCardCreate(ID=n, Tipo=f"T{n}")),)),
+        threading.Thread(target=run, args=(lambda n: controller.read_all(MovementOut),)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert controller.cursor.execute("SELECT SUM(Saldo) FROM Tarjeta").fetchone()[0] == 20 * 1000 - 50 * 20 * 10
+    assert controller.cursor.execute("SELECT COUNT(*) FROM Pago").fetchone()[0] == 50 * 20
+    assert len(controller.read_all(TypeCardCreate)) == 50
+    controller.close()
+
+def test_rollback_in_one_thread_keeps_other_thread_transaction(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=10))
+    controller.conn.execute("INSERT INTO Precio (ID, IDTipoTransporte, Monto) VALUES (2, 1, 20)")
+
+    # Otro hilo confirma y revierte en su propia conexión
+    worker = threading.Thread(target=lambda: (controller.conn.commit(), controller.conn.rollback()))
+    worker.start()
+    worker.join()
+    controller.conn.commit()
+    assert [row["ID"] for row in controller.read_all(PriceCreate)] == [1, 2]
+
+    def interrupt():
+        controller.conn.execute("INSERT INTO Precio (ID, IDTipoTransporte, Monto) VALUES (3, 1, 30)")
+        controller.conn.rollback()
+
+    controller.conn.execute("INSERT INTO Precio (ID, IDTipoTransporte, Monto) VALUES (4, 1, 40)")
+    worker = threading.Thread(target=interrupt)
+    worker.start()
+    worker.join(timeout=0.5)
+    controller.conn.commit()
+    worker.join()
+    assert [row["ID"] for row in controller.read_all(PriceCreate)] == [1, 2, 4]
+    controller.close()
+
+def test_iter_rows_can_be_resumed_from_another_thread(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add_many([PriceCreate(ID=n, IDTipoTransporte=1, Monto=n) for n in range(1, 6)])
+    rows = controller.iter_rows(PriceCreate, batch_size=2)
+    seen = [next(rows)["ID"]]
+    worker = threading.Thread(target=lambda: seen.extend(row["ID"] for row in rows))
+    worker.start()
+    worker.join()
+    assert seen == [1, 2, 3, 4, 5]
+    controller.close()
+
+def test_event_loop_guard_covers_sqlite_controller(tmp_path, monkeypatch):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    controller.add(PriceCreate(ID=1, IDTipoTransporte=1, Monto=10))
+    monkeypatch.setattr(settings, "DB_EVENT_LOOP_GUARD", "raise")
+
+    async def on_loop():
+        with pytest.raises(BlockingCallOnEventLoopError):
+            controller.read_all(PriceCreate)
+        # Desde el ejecutor de la base de datos la misma llamada es válida
+        return await as_async(controller).read_all(PriceCreate)
+
+    assert len(asyncio.run(on_loop())) == 1
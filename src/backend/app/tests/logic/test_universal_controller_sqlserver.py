@@ -17,12 +17,18 @@ class DummyModel:
     def from_dict(cls, d):
         return cls(d["ID"], d["Nombre"], d["Valor"])
 
+def execute(c, sql):
+    with c.pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        conn.commit()
+
 @pytest.fixture(scope="module")
 def controller():
     c = UniversalController()
     # Crea la tabla antes de cada test si no existe
     try:
-        c.cursor.execute("""
+        execute(c, """
         IF OBJECT_ID('TestTable', 'U') IS NULL
         CREATE TABLE TestTable (
             ID INT PRIMARY KEY,
@@ -30,7 +36,7 @@ def controller():
             Valor FLOAT
         )
         """)
-        c.cursor.execute("""
+        execute(c, """
         IF OBJECT_ID('UnitTable', 'U') IS NULL
         CREATE TABLE UnitTable (
             ID INT PRIMARY KEY,
@@ -38,22 +44,20 @@ def controller():
             Nombre VARCHAR(50)
         )
         """)
-        c.cursor.execute("""
+        execute(c, """
         IF OBJECT_ID('BadTable', 'U') IS NULL
         CREATE TABLE BadTable (
             ID INT PRIMARY KEY,
             idunidad INT
         )
         """)
-        c.conn.commit()
     except Exception:
         pass
     return c
 
 def test_add_and_read_all(controller):
     # Limpia toda la tabla para asegurar que solo haya un registro
-    controller.cursor.execute("DELETE FROM TestTable")
-    controller.conn.commit()
+    execute(controller, "DELETE FROM TestTable")
     obj = DummyModel(1, "Test", 10.5)
     controller.add(obj)
     results = controller.read_all(obj)
@@ -86,14 +90,15 @@ def test_delete(controller):
 
 def test_update_not_found(controller):
     obj = DummyModel(999, "No existe", 0.0)
-    # Si la tabla existe pero el registro no, update debe devolver None o no afectar filas
+    # Como en el controlador SQLite: sin registro, update falla y no publica el cambio
+    events = []
+    unsubscribe = controller.events.subscribe(events.append, tables=["TestTable"])
     try:
-        controller.update(obj)
-    except ValueError as exc:
-        assert "actualizar" in str(exc).lower() or "no se encontró" in str(exc).lower()
-    else:
-        # Si no lanza, es porque no encontró el registro y no hizo nada
-        pass
+        with pytest.raises(ValueError, match="No se encontró"):
+            controller.update(obj)
+    finally:
+        unsubscribe()
+    assert events == []
 
 def test_delete_not_found(controller):
     obj = DummyModel(999, "No existe", 0.0)
@@ -139,8 +144,7 @@ def test_get_by_unit(controller):
         def from_dict(cls, d):
             return cls(d["ID"], d["idunidad"], d["Nombre"])
     c = controller
-    c.cursor.execute("DELETE FROM UnitTable WHERE ID=1")
-    c.conn.commit()
+    execute(c, "DELETE FROM UnitTable WHERE ID=1")
     obj = UnitModel(1, 42, "UnidadX")
     c.add(obj)
     result = c.get_by_unit(UnitModel, 42)
@@ -165,8 +169,7 @@ def test_get_by_unit_exception(controller):
         def from_dict(cls, d):
             raise Exception("fail")
     c = controller
-    c.cursor.execute("DELETE FROM BadTable WHERE ID=1")
-    c.conn.commit()
+    execute(c, "DELETE FROM BadTable WHERE ID=1")
     obj = BadModel(1, 1)
     c.add(obj)
     with pytest.raises(Exception):
@@ -215,3 +218,25 @@ def test_get_ruta_parada_full(controller):
         pass
     else:
         assert True
+
+def test_unit_of_work_rollback(controller):
+    execute(controller, "DELETE FROM TestTable")
+    with pytest.raises(RuntimeError):
+        with controller.unit_of_work():
+            controller.add(DummyModel(10, "Tx", 1.0))
+            raise RuntimeError("abortar")
+    assert controller.get_by_id(DummyModel, 10) is None
+
+def test_pool_metrics(controller):
+    controller.read_all(DummyModel)
+    metrics = controller.pool_metrics()
+    assert metrics["checkouts"] > 0
+    assert metrics["in_use"] == 0
+
+def test_schema_checked_once_and_refreshed_on_drop(controller):
+    controller.read_all(DummyModel)
+    assert controller.schema.is_known(DummyModel.__entity_name__)
+    controller.drop_table(DummyModel)
+    assert not controller.schema.is_known(DummyModel.__entity_name__)
+    controller.read_all(DummyModel)
+    assert controller.schema.is_known(DummyModel.__entity_name__)
@@ -0,0 +1,67 @@
+from backend.app.logic.universal_controller_sql import UniversalController
+from backend.app.logic.vehicle_positions import VehiclePositionStore
+from backend.app.models.transport import UnidadTransporte
+
+def make_controller(tmp_path):
+    controller = UniversalController(str(tmp_path / "data.db"))
+    for unit_id in ("U1", "U2"):
+        controller.add(UnidadTransporte(ID=unit_id, Ubicacion="Patio", Capacidad=40, IDRuta=1, IDTipo=1))
+    return controller
+
+def ubicaciones(controller):
+    controller.cursor.execute("SELECT ID, Ubicacion FROM UnidadTransporte ORDER BY ID")
+    return [tuple(row) for row in controller.cursor.fetchall()]
+
+def test_ring_buffer_keeps_latest_reports():
+    store = VehiclePositionStore(None, history=3)
+    for second in range(5):
+        assert store.record("U1", f"10.42{second}, -75.54", timestamp=100 + second)
+    assert not store.record("U1", "10.4, -75.5", timestamp=50)
+    assert store.latest("U1")["timestamp"] == 104 and store.latest("U1")["lat"] == 10.424
+    assert [p["timestamp"] for p in store.history_of("U1")] == [104, 103, 102]
+    assert store.stats()["stale"] == 1
+
+def test_record_many_validates_each_report():
+    store = VehiclePositionStore(None, max_units=2)
+    result = store.record_many([
+        {"ID": "U1", "lat": 10.42, "lon": -75.54},
+        {"ID": "U 2", "Ubicacion": "Terminal"},
+        {"Ubicacion": "sin ID"},
+        {"ID": "U\n3", "Ubicacion": "Terminal"},
+        {"ID": "U3", "Ubicacion": "no cabe"},
+    ])
+    assert (result["accepted"], result["failed"]) == (2, 3)
+    assert [e["index"] for e in result["errors"]] == [2, 3, 4]
+    assert store.latest("U1")["Ubicacion"] == "10.420000, -75.540000"
+    assert store.latest("U 2")["Ubicacion"] == "Terminal"
+
+def test_flush_writes_only_the_latest_position_per_unit(tmp_path):
+    controller = make_controller(tmp_path)
+    store = VehiclePositionStore(controller)
+    events = []
+    controller.events.subscribe(events.append, tables=["UnidadTransporte"])
+    for second in range(50):
+        store.record("U1", f"10.{second:04d}, -75.5", timestamp=second)
+    assert ubicaciones(controller) == [("U1", "Patio"), ("U2", "Patio")]
+    assert store.flush() == 1 and store.flush() == 0
+    assert ubicaciones(controller) == [("U1", "10.0049, -75.5"), ("U2", "Patio")]
+    assert [e.data for e in events] == [{"ID": "U1", "Ubicacion": "10.0049, -75.5"}]
+    store.record("U2", "Terminal")
+    store.stop_writer()
+    assert ubicaciones(controller)[1] == ("U2", "Terminal")
+    assert store.stats()["written"] == 2
+    controller.close()
+
+def test_flush_drops_units_that_do_not_exist(tmp_path):
+    controller = make_controller(tmp_path)
+    store = VehiclePositionStore(controller)
+    events = []
+    controller.events.subscribe(events.append, tables=["UnidadTransporte"])
+    store.record("U1", "Terminal")
+    store.record("U9", "Fantasma")
+    assert store.flush() == 1
+    assert [e.data["ID"] for e in events] == ["U1"]
+    assert store.latest("U9") is None and store.flush() == 0
+    stats = store.stats()
+    assert (stats["written"], stats["write_errors"], stats["unknown_units"], stats["pending_writes"]) == (1, 0, 1, 0)
+    controller.close()
@@ -1524,28 +1524,10 @@ class _RecargaWidgetState extends State<RecargaWidget> {
     final random = Random();
     String nuevoId = '';
     try {
-      // 2. Obtener nuevo ID de movimiento
-      final movIdResp = await http.get(
-        Uri.parse('${AppConfig.baseUrl}/movement/administrador/crear'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'accept': 'application/json'
-        },
-      );
-      debugPrint(
-          '[RecargaWidget] movIdResp: statusCode=${movIdResp.statusCode}, body=${movIdResp.body}');
-      if (movIdResp.statusCode != 200) {
-        setState(() {
-          _error = 'Error al generar ID de movimiento.';
-          _loading = false;
-        });
-        return;
-      }
-      nuevoId = json.decode(movIdResp.body)['nuevo_id'].toString();
       final idTarjeta = widget.user['IDTarjeta'] is int
           ? widget.user['IDTarjeta']
           : int.tryParse(widget.user['IDTarjeta']?.toString() ?? '0') ?? 0;
-      // 3. POST /movement/create
+      // 2. POST /movement/create (el servidor asigna el ID del movimiento)
       final movResp = await http.post(
         Uri.parse('${AppConfig.baseUrl}/movement/create'),
         headers: {
@@ -1554,7 +1536,6 @@ class _RecargaWidgetState extends State<RecargaWidget> {
           'Content-Type': 'application/x-www-form-urlencoded'
         },
         body: {
-          'ID': nuevoId,
           'IDTipoMovimiento': '2',
           'Monto': montoStr,
           'IDTarjeta': idTarjeta.toString()
@@ -1569,7 +1550,8 @@ class _RecargaWidgetState extends State<RecargaWidget> {
         });
         return;
       }
-      // 4. POST /payments/create
+      nuevoId = json.decode(movResp.body)['data']['ID'].toString();
+      // 3. POST /payments/create
       final idPago = (100 + random.nextInt(2147483547 - 100)).toString();
       final payBody = {
         'IDMovimiento': nuevoId.toString(),
@@ -1598,7 +1580,7 @@ class _RecargaWidgetState extends State<RecargaWidget> {
         });
         return;
       }
-      // 5. GET /payments/{IDPago}
+      // 4. GET /payments/{IDPago}
       final detResp = await http.get(
         Uri.parse('${AppConfig.baseUrl}/payments/$idPago'),
         headers: {